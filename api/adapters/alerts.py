@@ -0,0 +1,158 @@
+# adapters/alerts.py
+"""
+Server-side threshold alerts over ingested readings.
+
+Every stored batch is checked against its owner's settings (temp, hum and
+light min/max, soil min). A reading outside a bound only counts towards an
+alert: ALERT_DEBOUNCE_SAMPLES consecutive violations of the same bound
+raise it, and it clears after as many consecutive readings that are back
+inside the bound by at least the metric's hysteresis margin. Only those
+transitions are stored (`alerts` table), never the violating samples.
+
+State lives in process memory per (owner, device, metric) and is seeded
+from the owner's open alerts the first time the owner is seen, so no
+reading costs a database lookup of its own. Like the live stream it is
+per worker: with several workers, a device should stick to one of them.
+"""
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from domain.entities import Alert, GreenhouseSettings, SensorReading
+from metrics import metrics
+
+ALERT_DEBOUNCE_SAMPLES = int(os.getenv("ALERT_DEBOUNCE_SAMPLES", "3"))
+
+# metric -> (settings field of the lower bound, of the upper bound)
+ALERT_RULES: Dict[str, Tuple[Optional[str], Optional[str]]] = {
+    "temp": ("temp_min", "temp_max"),
+    "hum": ("hum_min", "hum_max"),
+    "light": ("light_min", "light_max"),
+    "soil": ("soil_min", None),
+}
+# How far back inside a bound a value has to be before its alert clears.
+ALERT_HYSTERESIS: Dict[str, float] = {"temp": 0.5, "hum": 2.0, "light": 20.0, "soil": 10.0}
+
+RAISED, CLEARED = "raised", "cleared"
+MIN, MAX = "min", "max"
+ALERT_STATES = (RAISED, CLEARED)
+
+
+class _Track:
+    __slots__ = ("active", "pending", "streak")
+
+    def __init__(self, active: Optional[str] = None):
+        self.active = active    # bound of the open alert, if any
+        self.pending = None     # transition the current streak counts towards
+        self.streak = 0
+
+
+class AlertEngine:
+    def __init__(self, debounce: int = ALERT_DEBOUNCE_SAMPLES,
+                 hysteresis: Dict[str, float] = ALERT_HYSTERESIS):
+        self.debounce = max(1, debounce)
+        self.hysteresis = hysteresis
+        self._tracks: Dict[tuple, _Track] = {}
+        self._seeded = set()
+        self._lock = threading.Lock()
+
+    def evaluate(self, owner: str, readings: List[SensorReading],
+                 settings: Optional[GreenhouseSettings],
+                 load_open: Callable[[], Iterable[Alert]]) -> List[Alert]:
+        """
+        Advance the alert state with a batch of stored readings and return
+        the transitions it caused. `load_open` returns the owner's open
+        alerts; it is only called the first time the owner is seen.
+        """
+        if settings is None or not readings:
+            return []
+        by_device: Dict[Optional[str], List[SensorReading]] = {}
+        for r in readings:
+            by_device.setdefault(r.device_id, []).append(r)
+
+        events: List[Alert] = []
+        self._seed(owner, load_open)
+        with self._lock:
+            for device_id, group in by_device.items():
+                group.sort(key=lambda r: (r.timestamp, r.id))
+                for metric, (lo_field, hi_field) in ALERT_RULES.items():
+                    lo = getattr(settings, lo_field) if lo_field else None
+                    hi = getattr(settings, hi_field) if hi_field else None
+                    events.extend(self._scan(owner, device_id, metric, group, lo, hi))
+        if events:
+            metrics.inc("alert_transitions", len(events))
+        return events
+
+    def _seed(self, owner: str, load_open: Callable[[], Iterable[Alert]]):
+        if owner in self._seeded:
+            return
+        # load_open queries the database, which on the async ingest path
+        # waits on the event loop: never call it under the lock
+        opened = list(load_open())
+        with self._lock:
+            if owner not in self._seeded:
+                for a in opened:
+                    self._tracks[(owner, a.device_id, a.metric)] = _Track(a.bound)
+                self._seeded.add(owner)
+
+    def forget(self, owner: str):
+        """Drop the owner's state; it is re-seeded from the table next time."""
+        with self._lock:
+            self._seeded.discard(owner)
+            for key in [k for k in self._tracks if k[0] == owner]:
+                del self._tracks[key]
+
+    def clear(self):
+        with self._lock:
+            self._tracks.clear()
+            self._seeded.clear()
+
+    def _scan(self, owner, device_id, metric, group, lo, hi) -> List[Alert]:
+        key = (owner, device_id, metric)
+        values = [getattr(r, metric) for r in group]
+        # whole-column comparisons first: a metric without an open alert or
+        # a pending streak needs no per-reading walk unless something is out
+        below = [v is not None and lo is not None and v < lo for v in values]
+        above = [v is not None and hi is not None and v > hi for v in values]
+        track = self._tracks.get(key)
+        if track is None:
+            if not any(below) and not any(above):
+                return []
+            track = self._tracks[key] = _Track()
+
+        margin = self.hysteresis.get(metric, 0.0)
+        events = []
+        for i, v in enumerate(values):
+            if v is None:
+                continue
+            if track.active is None:
+                target = MIN if below[i] else MAX if above[i] else None
+            elif track.active == MIN:
+                target = CLEARED if lo is None or v >= lo + margin else None
+            else:
+                target = CLEARED if hi is None or v <= hi - margin else None
+
+            if target != track.pending:
+                track.pending, track.streak = target, 0
+            if target is None:
+                continue
+            track.streak += 1
+            if track.streak < self.debounce:
+                continue
+
+            bound = track.active if target == CLEARED else target
+            events.append(Alert(
+                owner=owner, device_id=device_id, metric=metric,
+                state=CLEARED if target == CLEARED else RAISED, bound=bound,
+                value=float(v), threshold=lo if bound == MIN else hi,
+                reading_id=group[i].id, timestamp=group[i].timestamp,
+            ))
+            track.active = None if target == CLEARED else target
+            track.pending, track.streak = None, 0
+
+        if track.active is None and track.pending is None:
+            del self._tracks[key]
+        return events
+
+
+alert_engine = AlertEngine()
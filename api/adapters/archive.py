@@ -0,0 +1,181 @@
+# adapters/archive.py
+"""
+Cold storage for raw sensor readings: one directory per UTC day holding
+zstd-compressed Parquet files with the `sensor_data` columns.
+
+    <SENSOR_ARCHIVE_DIR>/date=2024-01-31/part-1706745600123.parquet
+
+Files are written by `SensorRepository.archive_older_than` before the rows
+leave the hot table; readers merge them back in by (timestamp, id). pyarrow
+is optional and only needed once something has been archived.
+"""
+import heapq
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer, String
+
+from adapters.db.models import SensorDB
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pc = pq = None
+
+SENSOR_ARCHIVE_DIR = os.getenv("SENSOR_ARCHIVE_DIR", "./archive/sensor_data")
+# Raw readings older than this many days are archived; 0 disables the job.
+SENSOR_RETENTION_DAYS = int(os.getenv("SENSOR_RETENTION_DAYS", "0"))
+SENSOR_ARCHIVE_CHUNK_ROWS = int(os.getenv("SENSOR_ARCHIVE_CHUNK_ROWS", "5000"))
+
+_COLUMNS = list(SensorDB.__table__.columns)
+COLUMN_NAMES = tuple(c.name for c in _COLUMNS)
+_TS = COLUMN_NAMES.index("timestamp")
+_ID = COLUMN_NAMES.index("id")
+
+
+def _arrow_type(column):
+    t = column.type
+    if isinstance(t, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(t, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(t, Float):
+        return pa.float64()
+    if isinstance(t, Boolean):
+        return pa.bool_()
+    if isinstance(t, String):
+        return pa.string()
+    raise TypeError(f"No archive type for {column.name} ({t})")
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def row_key(row: Sequence):
+    """Sort key shared by hot and archived rows (naive and aware mix)."""
+    return _utc(row[_TS]), row[_ID]
+
+
+def merge_rows(*sources: Iterable[Sequence]) -> Iterator[Sequence]:
+    """
+    Merge row streams that are each sorted by (timestamp, id). A row that
+    sits in both the archive and the hot table (archived, then the prune
+    was interrupted) is yielded once.
+    """
+    last = None
+    for row in heapq.merge(*sources, key=row_key):
+        key = row_key(row)
+        if key != last:
+            yield row
+        last = key
+
+
+class SensorArchive:
+    def __init__(self, root: str = SENSOR_ARCHIVE_DIR):
+        self.root = root
+
+    def day_dir(self, day: date) -> str:
+        return os.path.join(self.root, f"date={day.isoformat()}")
+
+    def days(self, from_time: datetime, to_time: datetime) -> List[date]:
+        """Archived days overlapping [from_time, to_time]."""
+        if not os.path.isdir(self.root):
+            return []
+        first, last = _utc(from_time).date(), _utc(to_time).date()
+        found = []
+        for name in os.listdir(self.root):
+            if not name.startswith("date="):
+                continue
+            day = date.fromisoformat(name[5:])
+            if first <= day <= last:
+                found.append(day)
+        return sorted(found)
+
+    def write_day(self, day: date, chunks: Iterable[Sequence[tuple]]) -> int:
+        """Write one day's rows (tuples in `SensorDB` column order) to a new file."""
+        if pa is None:
+            raise RuntimeError("Archiving sensor data requires pyarrow")
+        schema = pa.schema([(c.name, _arrow_type(c)) for c in _COLUMNS])
+        os.makedirs(self.day_dir(day), exist_ok=True)
+        name = f"part-{time.time_ns() // 1000}.parquet"
+        path = os.path.join(self.day_dir(day), name)
+        tmp = os.path.join(self.day_dir(day), f".{name}.tmp")  # dot files are skipped by readers
+        written = 0
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            for chunk in chunks:
+                columns = list(zip(*chunk)) if chunk else [[] for _ in _COLUMNS]
+                writer.write_table(pa.table(
+                    [pa.array(col, type=f.type) for col, f in zip(columns, schema)],
+                    schema=schema,
+                ))
+                written += len(chunk)
+        if written:
+            os.replace(tmp, path)  # readers never see half-written files
+        else:
+            os.remove(tmp)
+        return written
+
+    def day_files(self, day: date) -> List[str]:
+        """Finished Parquet files of one day, oldest first."""
+        d = self.day_dir(day)
+        names = sorted(n for n in os.listdir(d)
+                       if n.endswith(".parquet") and not n.startswith("."))
+        return [os.path.join(d, n) for n in names]
+
+    def read(self, from_time: datetime, to_time: datetime,
+             device_id: Optional[str] = None, aware: bool = False,
+             batch_size: int = SENSOR_ARCHIVE_CHUNK_ROWS) -> Iterator[tuple]:
+        """
+        Archived rows in [from_time, to_time], sorted by (timestamp, id), as
+        tuples in `SensorDB` column order. Timestamps are naive UTC unless
+        `aware`, to match what the hot table's driver returns.
+
+        Rows are generated lazily: days are walked in order and their files
+        read `batch_size` rows at a time, so only one day's matching rows
+        are held (to sort them) however many days the range spans.
+        """
+        days = self.days(from_time, to_time)
+        if not days:
+            return
+        if pq is None:
+            raise RuntimeError("Reading archived sensor data requires pyarrow")
+        lo, hi = _utc(from_time), _utc(to_time)
+        for day in days:
+            rows = []
+            for path in self.day_files(day):
+                with pq.ParquetFile(path) as f:
+                    for batch in f.iter_batches(batch_size=batch_size):
+                        rows.extend(_batch_rows(batch, lo, hi, device_id, aware))
+            rows.sort(key=row_key)
+            yield from rows
+
+
+def _batch_rows(batch, lo: datetime, hi: datetime,
+                device_id: Optional[str], aware: bool) -> Iterator[tuple]:
+    ts = batch.column("timestamp")
+    mask = pc.and_(pc.greater_equal(ts, pa.scalar(lo, type=ts.type)),
+                   pc.less_equal(ts, pa.scalar(hi, type=ts.type)))
+    if device_id is not None:
+        mask = pc.and_(mask, pc.equal(batch.column("device_id"), device_id))
+    batch = batch.filter(mask)
+    present = set(batch.schema.names)
+    cols = [batch.column(n).to_pylist() if n in present else [None] * batch.num_rows
+            for n in COLUMN_NAMES]
+    rows = zip(*cols)
+    if aware:
+        return rows
+    return (r[:_TS] + (r[_TS].replace(tzinfo=None),) + r[_TS + 1:] for r in rows)
+
+def retention_cutoff(now: Optional[datetime] = None,
+                     days: int = SENSOR_RETENTION_DAYS) -> datetime:
+    """Start of the first UTC day that stays in the hot table (naive UTC)."""
+    now = now or datetime.utcnow()
+    return datetime.combine(now.date() - timedelta(days=days), datetime.min.time())
+
+
+sensor_archive = SensorArchive()
@@ -0,0 +1,229 @@
+# adapters/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from domain.entities import RevokedToken, User
+from metrics import metrics
+
+# How often each worker pulls revocations made by other workers.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+# Re-read this much history on every sync so rows committed late or
+# stamped by a worker with a slightly skewed clock are not missed.
+REVOCATION_SYNC_OVERLAP = timedelta(
+    seconds=float(os.getenv("REVOCATION_SYNC_OVERLAP", "30"))
+)
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+AUTH_FAILURE_TTL = float(os.getenv("AUTH_FAILURE_TTL", "60"))
+AUTH_FAILURE_CACHE_SIZE = int(os.getenv("AUTH_FAILURE_CACHE_SIZE", "10000"))
+# Writes go through the cache, so the TTL only bounds how long another
+# worker can serve settings that were changed elsewhere.
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", "1024"))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    When `name` is given, hits/misses are reported as `<name>_cache_hits`
+    and `<name>_cache_misses`, plus a `<name>_cache_hit_ratio` gauge.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if name:
+            metrics.gauge(f"{name}_cache_hit_ratio", self.hit_ratio)
+
+    def get(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                value = item[1]
+            else:
+                if item is not None:
+                    del self._data[key]
+                value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def remaining(self, key: Hashable) -> float:
+        """Seconds until `key` expires; 0 if it is absent or expired."""
+        item = self._data.get(key)
+        return max(0.0, item[0] - time.monotonic()) if item is not None else 0.0
+
+    def increment(self, key: Hashable) -> int:
+        """
+        Add one to a counter and return it. The expiry is that of the first
+        increment (a fixed window), so repeated increments cannot keep the
+        counter alive indefinitely.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                expiry, count = item[0], item[1] + 1
+            else:
+                expiry, count = now + self.ttl, 1
+            self._data[key] = (expiry, count)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return count
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def hit_ratio(self) -> float:
+        hits = metrics.counter(f"{self.name}_cache_hits")
+        total = hits + metrics.counter(f"{self.name}_cache_misses")
+        return hits / total if total else 0.0
+
+    def _count(self, outcome: str):
+        if self.name:
+            metrics.inc(f"{self.name}_cache_{outcome}")
+
+
+class PrincipalCache:
+    """
+    Authenticated principals keyed by (username, password stamp). The stamp
+    travels in the JWT, so tokens issued after a password change miss the
+    cache on every worker; the TTL bounds staleness of everything else.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE,
+                 ttl: float = PRINCIPAL_CACHE_TTL):
+        self._cache = TTLCache(maxsize, ttl, name="principal")
+
+    def get(self, username: str, stamp: Optional[str]) -> Optional[User]:
+        return self._cache.get((username, stamp))
+
+    def put(self, user: User, stamp: Optional[str]):
+        # never keep password hashes around longer than needed
+        principal = User(id=user.id, username=user.username,
+                         is_first_login=user.is_first_login)
+        self._cache.set((user.username, stamp), principal)
+
+    def invalidate(self, username: str):
+        self._cache.discard_where(lambda key: key[0] == username)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class RevocationCache:
+    """
+    Process-local set of revoked JWT ids, each kept until its token expires.
+
+    Local revocations are added immediately; revocations made by other
+    workers arrive through a periodic delta sync against `revoked_tokens`,
+    so a lookup only touches the database once per `sync_interval`.
+    """
+
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_SECONDS,
+                 overlap: timedelta = REVOCATION_SYNC_OVERLAP):
+        self.sync_interval = sync_interval
+        self.overlap = overlap
+        self._entries: Dict[str, Optional[datetime]] = {}
+        self._lock = threading.Lock()
+        self._synced_at: Optional[datetime] = None
+        self._next_sync = 0.0
+        self._syncing = False
+
+    def add(self, jti: str, expires_at: Optional[datetime]):
+        self._entries[jti] = expires_at
+
+    def is_revoked(self, jti: str,
+                   load: Callable[[Optional[datetime]], Iterable[RevokedToken]]) -> bool:
+        """
+        `load(since)` must return the revocations recorded since `since`
+        (all unexpired ones when `since` is None).
+        """
+        self._maybe_sync(load)
+        return jti in self._entries
+
+    def contains(self, jti: str) -> bool:
+        """Lookup without syncing; pair with `sync_due` on async paths."""
+        return jti in self._entries
+
+    def sync_due(self) -> bool:
+        return time.monotonic() >= self._next_sync
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._synced_at = None
+            self._next_sync = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _maybe_sync(self, load):
+        if not self.sync_due():
+            return
+        # Single flight, but `load` runs outside the lock: on the async path
+        # it waits on the event loop (AsyncSession.run_sync), and a second
+        # coroutine blocking on the lock would stop the loop for good. Others
+        # answer from the current entries until the sync lands.
+        with self._lock:
+            if self._syncing or not self.sync_due():
+                return
+            self._syncing = True
+            started = datetime.utcnow()
+            since = self._synced_at - self.overlap if self._synced_at else None
+        try:
+            loaded = list(load(since))
+            with self._lock:
+                for t in loaded:
+                    self._entries[t.jti] = t.expires_at
+                self._prune(started)
+                self._synced_at = started
+                self._next_sync = time.monotonic() + self.sync_interval
+        finally:
+            self._syncing = False
+
+    def _prune(self, now: datetime):
+        # list() snapshots the items: add() does not take the lock
+        for jti, exp in list(self._entries.items()):
+            if exp is not None and exp <= now:
+                self._entries.pop(jti, None)
+
+
+revocation_cache = RevocationCache()
+principal_cache = PrincipalCache()
+# Keys are (username, attempt digest) for known-bad passwords and
+# (username, None, client address) for the failure count of that username
+# from that client within one AUTH_FAILURE_TTL window.
+failed_login_cache = TTLCache(AUTH_FAILURE_CACHE_SIZE, AUTH_FAILURE_TTL,
+                              name="failed_login")
+# owner -> GreenhouseSettings; SettingsRepository writes through on upsert
+settings_cache = TTLCache(SETTINGS_CACHE_SIZE, SETTINGS_CACHE_TTL, name="settings")
@@ -0,0 +1,126 @@
+# adapters/db/async_repositories.py
+"""
+AsyncSession counterparts of the repositories in `repositories.py`.
+
+Each method runs the sync implementation through `AsyncSession.run_sync`,
+which drives it on the async connection via greenlets: the I/O is truly
+non-blocking, yet the queries, rollup maintenance and cache updates stay
+defined in exactly one place.
+"""
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from adapters.db.repositories import (
+    AGGREGATE_FIELDS,
+    SensorRepository,
+    SettingsRepository,
+    TokenBlacklistRepository,
+    UserRepository,
+)
+from domain.entities import (
+    GreenhouseSettings,
+    RevokedToken,
+    SensorAggregate,
+    SensorReading,
+    User,
+)
+
+
+class AsyncSensorRepository:
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def insert(self, r: SensorReading,
+                     owner: Optional[str] = None) -> Optional[SensorReading]:
+        return await self.db.run_sync(lambda s: SensorRepository(s).insert(r, owner))
+
+    async def insert_many(self, readings: List[SensorReading],
+                          owner: Optional[str] = None) -> List[Optional[SensorReading]]:
+        return await self.db.run_sync(
+            lambda s: SensorRepository(s).insert_many(readings, owner)
+        )
+
+    async def fetch_by_key(self, device_id: str, seq: int) -> Optional[SensorReading]:
+        return await self.db.run_sync(
+            lambda s: SensorRepository(s).fetch_by_key(device_id, seq)
+        )
+
+    async def fetch_all(self, skip=0, limit=100,
+                        device_id: Optional[str] = None) -> List[SensorReading]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).fetch_all(skip, limit, device_id)
+        )
+
+    async def fetch_page(self, limit=100,
+                         after: Optional[Tuple[datetime, int]] = None,
+                         device_id: Optional[str] = None) -> List[SensorReading]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).fetch_page(limit, after, device_id)
+        )
+
+    async def fetch_by_time(self, from_time, to_time,
+                            device_id: Optional[str] = None) -> List[SensorReading]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).fetch_by_time(from_time, to_time, device_id)
+        )
+
+    async def fetch_rows(self, skip=0, limit=100,
+                         after: Optional[Tuple[datetime, int]] = None,
+                         device_id: Optional[str] = None) -> List[tuple]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).fetch_rows(skip, limit, after, device_id)
+        )
+
+    async def fetch_rows_by_time(self, from_time, to_time,
+                                 device_id: Optional[str] = None) -> List[tuple]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).fetch_rows_by_time(from_time, to_time, device_id)
+        )
+
+    async def aggregate(self, from_time, to_time, bucket_seconds: int,
+                        fields: Sequence[str] = AGGREGATE_FIELDS,
+                        device_id: Optional[str] = None) -> List[SensorAggregate]:
+        return await self.read_db.run_sync(
+            lambda s: SensorRepository(s).aggregate(
+                from_time, to_time, bucket_seconds, fields, device_id
+            )
+        )
+
+
+class AsyncSettingsRepository:
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def get(self, owner: str) -> Optional[GreenhouseSettings]:
+        return await self.read_db.run_sync(lambda s: SettingsRepository(s).get(owner))
+
+    async def upsert(self, gh: GreenhouseSettings) -> GreenhouseSettings:
+        return await self.db.run_sync(lambda s: SettingsRepository(s).upsert(gh))
+
+
+class AsyncUserRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, username: str) -> Optional[User]:
+        return await self.db.run_sync(lambda s: UserRepository(s).get(username))
+
+
+class AsyncTokenBlacklistRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def revoke(self, jti: str, expires_at: Optional[datetime] = None):
+        await self.db.run_sync(lambda s: TokenBlacklistRepository(s).revoke(jti, expires_at))
+
+    async def is_revoked(self, jti: str) -> bool:
+        return await self.db.run_sync(lambda s: TokenBlacklistRepository(s).is_revoked(jti))
+
+    async def revoked_since(self, since: Optional[datetime] = None) -> List[RevokedToken]:
+        return await self.db.run_sync(
+            lambda s: TokenBlacklistRepository(s).revoked_since(since)
+        )
@@ -1,13 +1,21 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, Float, Boolean, DateTime, String, func
+    Column, BigInteger, Integer, Float, Boolean, DateTime, String, Index, func
 )
-from db import Base
+from db import Base, SENSOR_PARTITIONED
+
+# A unique index on a partitioned table must contain the partition key, so
+# when sensor_data is partitioned the dedup key gains the timestamp: retries
+# are then recognised only if they resend the client's own timestamp.
+SENSOR_DEDUP_KEY = ("device_id", "seq", "timestamp") if SENSOR_PARTITIONED else ("device_id", "seq")
+
 
 class SensorDB(Base):
     __tablename__ = "sensor_data"
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # partitioned: the primary key must include the partition key too
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(),
+                       primary_key=SENSOR_PARTITIONED)
     temp = Column(Float)
     hum = Column(Float)
     soil = Column(Integer)
@@ -17,6 +25,54 @@ class SensorDB(Base):
     acc_x = Column(Integer)
     acc_y = Column(Integer)
     acc_z = Column(Integer)
+    device_id = Column(String(64), nullable=True)
+    seq = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        # per-device history / pagination is a range scan of this index
+        Index("ix_sensor_data_device_timestamp", "device_id", "timestamp", "id"),
+        # fleet-wide keyset pagination / time-range scans walk (timestamp, id)
+        Index("ix_sensor_data_timestamp_id", "timestamp", "id"),
+        # retried uploads collide here and are dropped by ON CONFLICT DO
+        # NOTHING; NULLs never conflict, so keyless readings are unaffected
+        Index("ux_sensor_data_device_seq", *SENSOR_DEDUP_KEY, unique=True),
+        {"postgresql_partition_by": "RANGE (timestamp)"} if SENSOR_PARTITIONED else {},
+    )
+
+class _SensorRollupColumns:
+    """
+    Per-bucket row count plus sum/min/max and non-NULL count (`<field>_count`,
+    the divisor of the average) of the numeric sensor fields.
+    """
+    id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime(timezone=True), unique=True, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    motion_count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Float)
+    temp_min = Column(Float)
+    temp_max = Column(Float)
+    temp_count = Column(Integer)
+    hum_sum = Column(Float)
+    hum_min = Column(Float)
+    hum_max = Column(Float)
+    hum_count = Column(Integer)
+    soil_sum = Column(Float)
+    soil_min = Column(Integer)
+    soil_max = Column(Integer)
+    soil_count = Column(Integer)
+    light_sum = Column(Float)
+    light_min = Column(Integer)
+    light_max = Column(Integer)
+    light_count = Column(Integer)
+
+class SensorRollupMinuteDB(_SensorRollupColumns, Base):
+    __tablename__ = "sensor_rollup_1m"
+
+class SensorRollupHourDB(_SensorRollupColumns, Base):
+    __tablename__ = "sensor_rollup_1h"
+
+class SensorRollupDayDB(_SensorRollupColumns, Base):
+    __tablename__ = "sensor_rollup_1d"
 
 class SettingsDB(Base):
     __tablename__ = "settings"
@@ -31,6 +87,27 @@ class SettingsDB(Base):
     hum_max = Column(Float)
     soil_min = Column(Integer)
 
+class AlertDB(Base):
+    """State transitions of threshold alerts (see `adapters/alerts.py`)."""
+    __tablename__ = "alerts"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner = Column(String, nullable=False)
+    device_id = Column(String(64), nullable=True)
+    metric = Column(String(16), nullable=False)
+    state = Column(String(16), nullable=False)
+    bound = Column(String(8), nullable=False)
+    value = Column(Float)
+    threshold = Column(Float)
+    # no foreign key: a partitioned sensor_data has a composite primary key
+    reading_id = Column(BigInteger)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_alerts_owner_timestamp", "owner", "timestamp", "id"),
+        # latest transition per (device, metric) when seeding engine state
+        Index("ix_alerts_owner_device_metric", "owner", "device_id", "metric", "id"),
+    )
+
 class LoginDB(Base):
     __tablename__ = "login"
     id = Column(Integer, primary_key=True, index=True)
@@ -42,4 +119,6 @@ class RevokedTokenDB(Base):
     __tablename__ = "revoked_tokens"
     id = Column(Integer, primary_key=True, index=True)
     jti = Column(String, unique=True, index=True, nullable=False)
-    revoked_at = Column(DateTime, default=datetime.utcnow)
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # exp of the revoked JWT; the row is useless (and pruned) after it
+    expires_at = Column(DateTime, index=True)
@@ -0,0 +1,181 @@
+# adapters/db/partitions.py
+"""
+Time-range partitions of `sensor_data` on Postgres (SENSOR_PARTITION_INTERVAL).
+
+Each partition covers one day/week/month, named after its lower bound
+(`sensor_data_p20240101`), and is optionally hash sub-partitioned by
+`device_id` into SENSOR_DEVICE_PARTITIONS children. A DEFAULT partition
+catches rows outside every range so a late maintainer never fails an
+insert; when the range partition is created later, those rows are moved
+into it. Upcoming partitions are created ahead of time by
+`PartitionMaintainer` (started with the app) or `scripts.create_partitions`.
+"""
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from db import (
+    engine, SENSOR_PARTITIONED, SENSOR_PARTITION_INTERVAL, SENSOR_DEVICE_PARTITIONS
+)
+
+logger = logging.getLogger(__name__)
+
+TABLE = "sensor_data"
+# How many partitions beyond the current one to keep created.
+SENSOR_PARTITIONS_AHEAD = int(os.getenv("SENSOR_PARTITIONS_AHEAD", "3"))
+SENSOR_PARTITION_CHECK_SECONDS = float(os.getenv("SENSOR_PARTITION_CHECK_SECONDS", "3600"))
+
+# Serialises concurrent maintainers (one per worker) across the cluster.
+_ADVISORY_LOCK_ID = 0x5E45_0DA7A
+
+
+def partition_bounds(day: date, interval: str) -> Tuple[date, date]:
+    """[lower, upper) bounds of the partition containing `day`."""
+    if interval == "day":
+        return day, day + timedelta(days=1)
+    if interval == "week":
+        lower = day - timedelta(days=day.weekday())
+        return lower, lower + timedelta(days=7)
+    if interval == "month":
+        lower = day.replace(day=1)
+        upper = (lower + timedelta(days=32)).replace(day=1)
+        return lower, upper
+    raise ValueError(f"Unknown partition interval {interval!r}")
+
+
+def partition_name(lower: date) -> str:
+    return f"{TABLE}_p{lower:%Y%m%d}"
+
+
+def partition_ddl(lower: date, upper: date, device_partitions: int = 0) -> List[str]:
+    """CREATE statements for one range partition and its device children."""
+    name = partition_name(lower)
+    stmt = (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{lower.isoformat()} 00:00:00+00') "
+        f"TO ('{upper.isoformat()} 00:00:00+00')"
+    )
+    if not device_partitions:
+        return [stmt]
+    ddl = [stmt + " PARTITION BY HASH (device_id)"]
+    for remainder in range(device_partitions):
+        ddl.append(
+            f"CREATE TABLE IF NOT EXISTS {name}_h{remainder} PARTITION OF {name} "
+            f"FOR VALUES WITH (MODULUS {device_partitions}, REMAINDER {remainder})"
+        )
+    return ddl
+
+
+def _bounds_sql(lower: date, upper: date) -> str:
+    return (f"timestamp >= '{lower.isoformat()} 00:00:00+00' "
+            f"AND timestamp < '{upper.isoformat()} 00:00:00+00'")
+
+
+def partition_with_default_rows_ddl(lower: date, upper: date,
+                                    device_partitions: int = 0) -> List[str]:
+    """
+    Statements creating a range partition whose rows already sit in the
+    DEFAULT partition (Postgres refuses to attach a range the default
+    holds rows of): detach the default, create the partition, move the
+    rows through the parent so they are routed, re-attach the default.
+    """
+    default, where = f"{TABLE}_default", _bounds_sql(lower, upper)
+    return [
+        f"ALTER TABLE {TABLE} DETACH PARTITION {default}",
+        *partition_ddl(lower, upper, device_partitions),
+        f"INSERT INTO {TABLE} SELECT * FROM {default} WHERE {where}",
+        f"DELETE FROM {default} WHERE {where}",
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {default} DEFAULT",
+    ]
+
+
+def planned_partitions(today: date, interval: str, ahead: int) -> List[Tuple[date, date]]:
+    bounds = [partition_bounds(today, interval)]
+    for _ in range(ahead):
+        bounds.append(partition_bounds(bounds[-1][1], interval))
+    return bounds
+
+
+def ensure_partitions(bind: Engine = engine, today: Optional[date] = None,
+                      ahead: int = SENSOR_PARTITIONS_AHEAD) -> List[str]:
+    """
+    Create the current partition, the next `ahead` ones and the default
+    partition if missing. Returns the names of the range partitions that
+    now exist; a no-op unless partitioning is enabled. A partition that
+    cannot be created is logged and skipped, so the later ones still are.
+    """
+    if not SENSOR_PARTITIONED:
+        return []
+    today = today or datetime.utcnow().date()
+    plan = planned_partitions(today, SENSOR_PARTITION_INTERVAL, ahead)
+    with bind.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT"
+        ))
+        created = []
+        for lower, upper in plan:
+            name = partition_name(lower)
+            try:
+                with conn.begin_nested():
+                    _create_partition(conn, lower, upper)
+            except Exception:
+                logger.exception("Could not create sensor_data partition %s", name)
+                continue
+            created.append(name)
+    return created
+
+
+def _create_partition(conn, lower: date, upper: date):
+    name = partition_name(lower)
+    if conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+        return
+    in_default = conn.scalar(text(
+        f"SELECT EXISTS (SELECT 1 FROM {TABLE}_default WHERE {_bounds_sql(lower, upper)})"
+    ))
+    ddl = (partition_with_default_rows_ddl if in_default else partition_ddl)(
+        lower, upper, SENSOR_DEVICE_PARTITIONS)
+    for stmt in ddl:
+        conn.execute(text(stmt))
+
+
+class PartitionMaintainer:
+    """Background thread re-running `ensure_partitions` periodically."""
+
+    def __init__(self, interval: float = SENSOR_PARTITION_CHECK_SECONDS,
+                 enabled: bool = SENSOR_PARTITIONED):
+        self.interval = interval
+        self.enabled = enabled
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintainer",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                ensure_partitions()
+            except Exception:
+                logger.exception("Could not create upcoming sensor_data partitions")
+            if self._stop.wait(self.interval):
+                return
+
+
+partition_maintainer = PartitionMaintainer()
@@ -1,67 +1,652 @@
 # adapters/db/repositories.py
-from typing import List, Optional
+from dataclasses import replace
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    DateTime, Integer, case, cast, delete, func, insert, or_, select, tuple_, type_coerce
+)
 from sqlalchemy.orm import Session
 from domain.entities import (
     SensorReading,
+    SensorAggregate,
+    FieldStats,
     GreenhouseSettings,
     User,
     RevokedToken,
+    Alert,
 )
 from adapters.db.models import (
+    SENSOR_DEDUP_KEY,
     SensorDB,
+    SensorRollupMinuteDB,
+    SensorRollupHourDB,
+    SensorRollupDayDB,
     SettingsDB,
     LoginDB,
     RevokedTokenDB,
+    AlertDB,
+)
+from adapters.archive import (
+    SENSOR_ARCHIVE_CHUNK_ROWS, SensorArchive, merge_rows, sensor_archive
+)
+from adapters.alerts import RAISED, alert_engine
+from adapters.events import readings_stored
+from adapters.cache import (
+    failed_login_cache, principal_cache, revocation_cache, settings_cache
+)
+from security import get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+
+
+# Numeric columns that /sensors/aggregate may summarise.
+AGGREGATE_FIELDS = ("temp", "hum", "soil", "light", "dist")
+# Subset of those kept in the precomputed rollup tables.
+ROLLUP_FIELDS = ("temp", "hum", "soil", "light")
+# (bucket seconds, table), coarsest first.
+ROLLUP_LEVELS = (
+    (86400, SensorRollupDayDB),
+    (3600, SensorRollupHourDB),
+    (60, SensorRollupMinuteDB),
 )
-from security import get_password_hash
+
+# Column order of the plain tuples produced by the streaming readers.
+SENSOR_COLUMNS = tuple(c.name for c in SensorDB.__table__.columns)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def time_bucket(db: Session, column, seconds: int):
+    """
+    SQL expression flooring `column` to a `seconds`-wide bucket aligned to
+    the unix epoch, so every backend produces the same bucket boundaries.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_bin(timedelta(seconds=seconds), column, _EPOCH)
+    # SQLite has no interval type: floor the epoch seconds and convert back,
+    # padded to the microsecond format SQLAlchemy stores DATETIMEs in so the
+    # result compares equal to buckets written from Python.
+    epoch = cast(func.strftime("%s", column), Integer)
+    return type_coerce(
+        func.datetime(epoch // seconds * seconds, "unixepoch").concat(".000000"),
+        DateTime,
+    )
+
+
+def reading_from_row(row: Sequence) -> SensorReading:
+    return SensorReading(**dict(zip(SENSOR_COLUMNS, row)))
+
+
+def _time_range(from_time, to_time, device_id: Optional[str] = None) -> list:
+    clauses = [SensorDB.timestamp >= from_time, SensorDB.timestamp <= to_time]
+    if device_id is not None:
+        clauses.append(SensorDB.device_id == device_id)
+    return clauses
+
+
+def _dedup_key(values) -> tuple:
+    # the timestamp of a partitioned table's key comes back from the
+    # database in UTC, whatever zone (or none) it was sent with
+    return tuple(
+        (v if v.tzinfo else v.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+        if isinstance(v, datetime) else v
+        for v in values
+    )
+
+
+def _has_dedup_key(r: SensorReading) -> bool:
+    return r.device_id is not None and r.seq is not None
+
+
+def floor_time(ts: datetime, seconds: int) -> datetime:
+    """Python twin of `time_bucket`; naive datetimes are taken as UTC."""
+    aware = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    epoch = int(aware.timestamp())
+    floored = datetime.fromtimestamp(epoch - epoch % seconds, timezone.utc)
+    return floored if ts.tzinfo else floored.replace(tzinfo=None)
+
+
+def _as_float(v):
+    # Postgres returns AVG over integer columns as Decimal
+    return None if v is None else float(v)
+
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"No upsert support for {dialect}")
+    return dialect_insert
+
+
+def _rollup_level(bucket_seconds: int, fields: Sequence[str], from_time, to_time):
+    """
+    Coarsest rollup whose buckets tile both `bucket_seconds` and the range
+    exactly; a bucket cut by either edge would count readings outside it.
+    """
+    if any(f not in ROLLUP_FIELDS for f in fields):
+        return None
+    for level in ROLLUP_LEVELS:
+        seconds = level[0]
+        if bucket_seconds % seconds == 0 \
+                and floor_time(from_time, seconds) == from_time \
+                and floor_time(to_time, seconds) == to_time:
+            return level
+    return None
+
+
+def _aggregate_rows(rows: Iterator[Sequence], bucket_seconds: int,
+                    fields: Sequence[str]) -> List[SensorAggregate]:
+    """`SensorRepository._aggregate_raw` in Python, over rows sorted by time."""
+    ts, motion = SENSOR_COLUMNS.index("timestamp"), SENSOR_COLUMNS.index("motion")
+    idx = [SENSOR_COLUMNS.index(f) for f in fields]
+    result, acc = [], None
+    for row in rows:
+        bucket = floor_time(row[ts], bucket_seconds)
+        if acc is None or acc[0] != bucket:
+            # per field: min, max, sum, count of non-null values
+            acc = [bucket, 0, 0, [[None, None, 0.0, 0] for _ in fields]]
+            result.append(acc)
+        acc[1] += 1
+        acc[2] += 1 if row[motion] else 0
+        for stat, i in zip(acc[3], idx):
+            v = row[i]
+            if v is None:
+                continue
+            stat[0] = v if stat[0] is None else min(stat[0], v)
+            stat[1] = v if stat[1] is None else max(stat[1], v)
+            stat[2] += v
+            stat[3] += 1
+    return [
+        SensorAggregate(bucket=bucket, count=count, motion_count=motions, stats={
+            f: FieldStats(min=_as_float(lo), max=_as_float(hi),
+                          avg=total / n if n else None)
+            for f, (lo, hi, total, n) in zip(fields, stats)
+        })
+        for bucket, count, motions, stats in result
+    ]
+
+
+def _rollup_columns():
+    names = ["bucket", "count", "motion_count"]
+    for f in ROLLUP_FIELDS:
+        names += [f"{f}_sum", f"{f}_min", f"{f}_max", f"{f}_count"]
+    return names
 
 
 class SensorRepository:
-    def __init__(self, db: Session):
+    """
+    Writes go to `db`; the read-only queries run on `read_db` (a replica
+    session) when one is given.
+    """
+
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.db = db
+        self.read_db = read_db or db
+
+    def insert(self, r: SensorReading, owner: Optional[str] = None) -> Optional[SensorReading]:
+        """The stored reading, or None if its (device_id, seq) already exists."""
+        return self.insert_many([r], owner)[0]
+
+    def insert_many(self, readings: List[SensorReading],
+                    owner: Optional[str] = None) -> List[Optional[SensorReading]]:
+        """
+        Insert all readings in one transaction and return them with their
+        database ids, in input order; readings without a timestamp get the
+        current time. The rollup
+        tables are updated in the same transaction, and so are the alerts
+        of `owner` (the uploading user) when one is given.
+
+        Readings carrying both `device_id` and `seq` go through
+        ON CONFLICT DO NOTHING on that pair; the ones the unique index
+        rejects (retries, or repeats within the batch) come back as None
+        and are left out of the rollups.
+        """
+        if not readings:
+            return []
+
+        # Readings without a timestamp are stamped here rather than by the
+        # server default: SQLite's CURRENT_TIMESTAMP has no fractional
+        # seconds, and rows stored in that other text format compare wrongly
+        # against keyset cursors (see `fetch_rows`).
+        now = datetime.now(timezone.utc)
+        values = []
+        for r in readings:
+            data = {k: v for k, v in r.__dict__.items() if k != "id"}
+            if data.get("timestamp") is None:
+                data["timestamp"] = now
+            values.append(data)
+
+        saved: List[Optional[SensorReading]] = [None] * len(readings)
+        for keyed in (False, True):
+            idx = [i for i in range(len(readings)) if _has_dedup_key(readings[i]) is keyed]
+            if not idx:
+                continue
+            if keyed:
+                self._insert_keyed(readings, values, idx, saved)
+            else:
+                self._insert_plain(readings, values, idx, saved)
+        stored = [r for r in saved if r is not None]
+        self._update_rollups(stored)
+        try:
+            if owner is not None:
+                AlertRepository(self.db).record(owner, stored)
+            self.db.commit()
+        except Exception:
+            if owner is not None:
+                # the engine already advanced; re-seed it from what was committed
+                alert_engine.forget(owner)
+            raise
+        readings_stored(stored)
+        return saved
+
+    def _insert_plain(self, readings, values, idx, saved):
+        stmt = insert(SensorDB).returning(
+            SensorDB.id, SensorDB.timestamp, sort_by_parameter_order=True
+        )
+        rows = self.db.execute(stmt, [values[i] for i in idx]).all()
+        for i, (row_id, ts) in zip(idx, rows):
+            saved[i] = replace(readings[i], id=row_id, timestamp=ts)
+
+    def _insert_keyed(self, readings, values, idx, saved):
+        # Skipped rows return nothing, so results are matched back to the
+        # input by SENSOR_DEDUP_KEY rather than by position; within one
+        # batch the first occurrence of a key is the one that gets stored.
+        first = {}
+        for i in idx:
+            first.setdefault(_dedup_key(values[i][k] for k in SENSOR_DEDUP_KEY), i)
+        key_columns = [SensorDB.__table__.c[k] for k in SENSOR_DEDUP_KEY]
+        stmt = (
+            _upsert_insert(self.db)(SensorDB)
+            .on_conflict_do_nothing(index_elements=list(SENSOR_DEDUP_KEY))
+            .returning(SensorDB.id, SensorDB.timestamp, *key_columns)
+        )
+        rows = self.db.execute(stmt, [values[i] for i in first.values()]).all()
+        for row_id, ts, *key in rows:
+            i = first[_dedup_key(key)]
+            saved[i] = replace(readings[i], id=row_id, timestamp=ts)
+
+    def fetch_by_key(self, device_id: str, seq: int) -> Optional[SensorReading]:
+        row = self.db.execute(
+            select(*SensorDB.__table__.columns)
+            .where(SensorDB.device_id == device_id, SensorDB.seq == seq)
+        ).first()
+        return reading_from_row(row) if row else None
+
+    def _update_rollups(self, readings: List[SensorReading]):
+        """Fold the readings into every rollup level with one upsert each."""
+        if not readings:
+            return
+        dialect_insert = _upsert_insert(self.db)
+        for seconds, model in ROLLUP_LEVELS:
+            acc = {}
+            for r in readings:
+                b = floor_time(r.timestamp, seconds)
+                a = acc.get(b)
+                if a is None:
+                    a = acc[b] = {"bucket": b, "count": 0, "motion_count": 0}
+                    for f in ROLLUP_FIELDS:
+                        a[f"{f}_sum"] = a[f"{f}_min"] = a[f"{f}_max"] = None
+                        a[f"{f}_count"] = 0
+                a["count"] += 1
+                a["motion_count"] += 1 if r.motion else 0
+                for f in ROLLUP_FIELDS:
+                    v = getattr(r, f)
+                    if v is None:
+                        continue
+                    a[f"{f}_sum"] = (a[f"{f}_sum"] or 0) + v
+                    a[f"{f}_count"] += 1
+                    lo, hi = a[f"{f}_min"], a[f"{f}_max"]
+                    a[f"{f}_min"] = v if lo is None else min(lo, v)
+                    a[f"{f}_max"] = v if hi is None else max(hi, v)
+
+            stmt = dialect_insert(model)
+            t, ex = model.__table__.c, stmt.excluded
+            set_ = {
+                "count": t.count + ex.count,
+                "motion_count": t.motion_count + ex.motion_count,
+            }
+            for f in ROLLUP_FIELDS:
+                s_, lo, hi, n = f"{f}_sum", f"{f}_min", f"{f}_max", f"{f}_count"
+                # a sum stays NULL while every value of the bucket is NULL
+                set_[s_] = func.coalesce(t[s_] + ex[s_], t[s_], ex[s_])
+                set_[n] = func.coalesce(t[n], 0) + ex[n]
+                set_[lo] = case((ex[lo] < t[lo], ex[lo]),
+                                else_=func.coalesce(t[lo], ex[lo]))
+                set_[hi] = case((ex[hi] > t[hi], ex[hi]),
+                                else_=func.coalesce(t[hi], ex[hi]))
+            stmt = stmt.on_conflict_do_update(index_elements=[t.bucket], set_=set_)
+            # sorted so concurrent writers lock bucket rows in the same order
+            self.db.execute(stmt, [acc[b] for b in sorted(acc)])
+
+    def rebuild_rollups(self, from_time=None, to_time=None,
+                        archive: SensorArchive = sensor_archive) -> int:
+        """
+        Recompute the rollup tables from `sensor_data` (backfill). The range
+        is widened to whole days; each level is built from the next finer
+        one. Days in `archive` are skipped: their raw rows are gone from
+        `sensor_data`, so their rollups are the only aggregates left.
+        Returns the number of rollup rows written.
+        """
+        day = ROLLUP_LEVELS[0][0]
+        lo = floor_time(from_time, day) if from_time else None
+        hi = floor_time(to_time, day) + timedelta(seconds=day) if to_time else None
 
-    def insert(self, r: SensorReading) -> SensorReading:
-        row = SensorDB(**r.__dict__)
-        self.db.add(row)
+        ref = lo or hi
+        tz = timezone.utc if ref is not None and ref.tzinfo else None
+        archived = archive.days(lo or datetime.min,
+                                hi - timedelta(microseconds=1) if hi else datetime.max)
+        written, start = 0, lo
+        for d in archived:
+            d0 = datetime.combine(d, datetime.min.time(), tzinfo=tz)
+            if start is None or start < d0:
+                written += self._rebuild_span(start, d0)
+            start = d0 + timedelta(seconds=day)
+        if start is None or hi is None or start < hi:
+            written += self._rebuild_span(start, hi)
         self.db.commit()
-        self.db.refresh(row)
+        return written
 
-        # Filter out SQLAlchemy internals before passing to dataclass
-        data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-        return SensorReading(**data)
+    def _rebuild_span(self, lo, hi) -> int:
+        written = 0
+        source = None
+        for seconds, model in reversed(ROLLUP_LEVELS):
+            cond = []
+            if lo is not None:
+                cond.append(model.bucket >= lo)
+            if hi is not None:
+                cond.append(model.bucket < hi)
+            self.db.execute(delete(model).where(*cond))
+            sel = self._rollup_select(source, seconds, lo, hi)
+            result = self.db.execute(insert(model).from_select(_rollup_columns(), sel))
+            written += result.rowcount
+            source = model
+        return written
+
+    def _rollup_select(self, source, seconds: int, lo, hi):
+        if source is None:
+            time_col = SensorDB.timestamp
+            bucket = time_bucket(self.db, time_col, seconds)
+            motion = case((SensorDB.motion, 1), else_=0)
+            inner_cols = [SensorDB.temp, SensorDB.hum, SensorDB.soil, SensorDB.light]
+            inner = select(bucket.label("bucket"), motion.label("motion"), *inner_cols)
+        else:
+            time_col = source.bucket
+            bucket = time_bucket(self.db, time_col, seconds)
+            inner = select(bucket.label("bucket"),
+                           *[source.__table__.c[n] for n in _rollup_columns()[1:]])
+        if lo is not None:
+            inner = inner.where(time_col >= lo)
+        if hi is not None:
+            inner = inner.where(time_col < hi)
+        inner = inner.subquery()
+
+        if source is None:
+            cols = [inner.c.bucket, func.count(), func.sum(inner.c.motion)]
+            for f in ROLLUP_FIELDS:
+                c = inner.c[f]
+                cols += [func.sum(c), func.min(c), func.max(c), func.count(c)]
+        else:
+            cols = [inner.c.bucket, func.sum(inner.c.count),
+                    func.sum(inner.c.motion_count)]
+            for f in ROLLUP_FIELDS:
+                cols += [func.sum(inner.c[f"{f}_sum"]), func.min(inner.c[f"{f}_min"]),
+                         func.max(inner.c[f"{f}_max"]), func.sum(inner.c[f"{f}_count"])]
+        return select(*cols).group_by(inner.c.bucket)
+
+    def fetch_rows(self, skip=0, limit=100,
+                   after: Optional[Tuple[datetime, int]] = None,
+                   device_id: Optional[str] = None) -> List[tuple]:
+        """
+        Plain column tuples (in `SENSOR_COLUMNS` order) ordered by
+        (timestamp, id), for paths that serialise rows straight to JSON.
+        `after` is an exclusive keyset bound, so every page is an index
+        range scan no matter how deep it is; `skip` is a plain OFFSET.
+        `device_id` narrows the scan to that device's slice of the
+        (device_id, timestamp, id) index.
+        """
+        stmt = select(*SensorDB.__table__.columns)
+        if device_id is not None:
+            stmt = stmt.where(SensorDB.device_id == device_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(SensorDB.timestamp, SensorDB.id) > tuple_(*after))
+        stmt = stmt.order_by(SensorDB.timestamp, SensorDB.id).offset(skip).limit(limit)
+        return self.read_db.execute(stmt).all()
+
+    def fetch_rows_by_time(self, from_time, to_time,
+                           device_id: Optional[str] = None) -> List[tuple]:
+        """Like `fetch_rows` for a time range, including archived days."""
+        stmt = (
+            select(*SensorDB.__table__.columns)
+            .where(*_time_range(from_time, to_time, device_id))
+            .order_by(SensorDB.timestamp, SensorDB.id)
+        )
+        rows = self.read_db.execute(stmt).all()
+        archived = self._archived(from_time, to_time, device_id)
+        return list(merge_rows(archived, rows)) if archived is not None else rows
+
+    def fetch_latest(self, device_id: Optional[str] = None) -> Optional[SensorReading]:
+        """Newest reading: a backward scan of the (device_id,) timestamp index."""
+        stmt = select(*SensorDB.__table__.columns)
+        if device_id is not None:
+            stmt = stmt.where(SensorDB.device_id == device_id)
+        stmt = stmt.order_by(SensorDB.timestamp.desc(), SensorDB.id.desc()).limit(1)
+        row = self.read_db.execute(stmt).first()
+        return reading_from_row(row) if row else None
+
+    def fetch_all(self, skip=0, limit=100,
+                  device_id: Optional[str] = None) -> List[SensorReading]:
+        rows = self.fetch_rows(skip, limit, device_id=device_id)
+        return [reading_from_row(r) for r in rows]
+
+    def fetch_page(self, limit=100,
+                   after: Optional[Tuple[datetime, int]] = None,
+                   device_id: Optional[str] = None) -> List[SensorReading]:
+        """Keyset pagination over (timestamp, id); see `fetch_rows`."""
+        rows = self.fetch_rows(limit=limit, after=after, device_id=device_id)
+        return [reading_from_row(r) for r in rows]
+
+    def fetch_by_time(self, from_time, to_time,
+                      device_id: Optional[str] = None) -> List[SensorReading]:
+        rows = self.fetch_rows_by_time(from_time, to_time, device_id)
+        return [reading_from_row(r) for r in rows]
+
+    def stream_by_time(self, from_time, to_time, chunk_size: int = 1000,
+                       device_id: Optional[str] = None) -> Iterator[Sequence[tuple]]:
+        """
+        Yield the rows of `fetch_by_time` as chunks of plain tuples (in
+        `SENSOR_COLUMNS` order) read through a server-side cursor, so memory
+        stays flat however large the range is; archived rows are merged in
+        one day at a time.
+        """
+        stmt = (
+            select(*SensorDB.__table__.columns)
+            .where(*_time_range(from_time, to_time, device_id))
+            .order_by(SensorDB.timestamp, SensorDB.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = self.read_db.execute(stmt)
+        try:
+            archived = self._archived(from_time, to_time, device_id)
+            if archived is None:
+                yield from result.partitions()
+                return
+            hot = (row for part in result.partitions() for row in part)
+            merged = merge_rows(archived, hot)
+            while True:
+                part = list(islice(merged, chunk_size))
+                if not part:
+                    break
+                yield part
+        finally:
+            result.close()
+
+    def _archived(self, from_time, to_time, device_id=None) -> Optional[Iterator[tuple]]:
+        """Lazy sorted archived rows of the range; None when no day is archived."""
+        if not sensor_archive.days(from_time, to_time):
+            return None
+        aware = self.read_db.get_bind().dialect.name == "postgresql"
+        return sensor_archive.read(from_time, to_time, device_id, aware=aware)
+
+    def archive_older_than(self, cutoff: datetime,
+                           chunk_rows: int = SENSOR_ARCHIVE_CHUNK_ROWS,
+                           archive: SensorArchive = sensor_archive) -> int:
+        """
+        Move raw readings older than `cutoff` into `archive`, one UTC day at
+        a time: the day is written out first, then deleted from the hot
+        table `chunk_rows` at a time with a commit after each chunk, so
+        locks stay short and the WAL/undo stays bounded. Rows that arrive
+        for an archived day while it is being processed are left for the
+        next run. The rollups are untouched and keep serving aggregates.
+        Returns the number of rows moved.
+        """
+        moved = 0
+        while True:
+            oldest = self.db.scalar(
+                select(func.min(SensorDB.timestamp)).where(SensorDB.timestamp < cutoff)
+            )
+            if oldest is None:
+                return moved
+            if oldest.tzinfo is not None:
+                oldest = oldest.astimezone(timezone.utc).replace(tzinfo=None)
+            start = floor_time(oldest, 86400)
+            end = min(start + timedelta(days=1), cutoff)
+            in_day = [SensorDB.timestamp >= start, SensorDB.timestamp < end]
+
+            max_id = self.db.scalar(select(func.max(SensorDB.id)).where(*in_day))
+            in_day.append(SensorDB.id <= max_id)
+            result = self.db.execute(
+                select(*SensorDB.__table__.columns).where(*in_day)
+                .order_by(SensorDB.timestamp, SensorDB.id)
+                .execution_options(yield_per=chunk_rows)
+            )
+            try:
+                archive.write_day(start.date(), result.partitions())
+            finally:
+                result.close()
+
+            while True:
+                batch = select(SensorDB.id).where(*in_day).limit(chunk_rows)
+                deleted = self.db.execute(
+                    delete(SensorDB).where(SensorDB.id.in_(batch), *in_day[:2])
+                ).rowcount
+                self.db.commit()
+                moved += deleted
+                if deleted < chunk_rows:
+                    break
+
+    def aggregate(self, from_time, to_time, bucket_seconds: int,
+                  fields: Sequence[str] = AGGREGATE_FIELDS,
+                  device_id: Optional[str] = None) -> List[SensorAggregate]:
+        """
+        Min/max/avg per field, row count and motion count for each time
+        bucket, computed entirely in SQL so only one row per bucket leaves
+        the database. Served from the coarsest rollup table whose bucket
+        size divides `bucket_seconds` and both range edges, and from the raw
+        table otherwise (including when a reading sits exactly on the
+        inclusive `to_time`, which the rollups cannot split off). Rollups are
+        fleet-wide, so a single device is always aggregated from its slice
+        of the raw (device_id, timestamp) index. Raw aggregation over a
+        range with archived days reads the merged rows and buckets them in
+        Python instead.
+        """
+        level = None
+        if device_id is None:
+            level = _rollup_level(bucket_seconds, fields, from_time, to_time)
+        if level is not None and self.read_db.scalar(
+                select(SensorDB.id).where(SensorDB.timestamp == to_time).limit(1)) is not None:
+            level = None
+        if level is None:
+            return self._aggregate_raw(from_time, to_time, bucket_seconds, fields, device_id)
+        return self._aggregate_rollup(level, from_time, to_time, bucket_seconds, fields)
+
+    def _aggregate_raw(self, from_time, to_time, bucket_seconds, fields, device_id=None):
+        if sensor_archive.days(from_time, to_time):
+            rows = (row for part in self.stream_by_time(from_time, to_time,
+                                                        device_id=device_id)
+                    for row in part)
+            return _aggregate_rows(rows, bucket_seconds, fields)
+        bucket = time_bucket(self.read_db, SensorDB.timestamp, bucket_seconds)
+        motion = case((SensorDB.motion, 1), else_=0)
+        inner = (
+            select(bucket.label("bucket"), motion.label("motion"),
+                   *[getattr(SensorDB, f) for f in fields])
+            .where(*_time_range(from_time, to_time, device_id))
+            .subquery()
+        )
+        cols = [inner.c.bucket, func.count(), func.sum(inner.c.motion)]
+        for f in fields:
+            c = inner.c[f]
+            cols += [func.min(c), func.max(c), func.avg(c)]
+        stmt = select(*cols).group_by(inner.c.bucket).order_by(inner.c.bucket)
 
-    def fetch_all(self, skip=0, limit=100) -> List[SensorReading]:
-        rows = self.db.query(SensorDB).offset(skip).limit(limit).all()
         result = []
-        for row in rows:
-            data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-            result.append(SensorReading(**data))
+        for row in self.read_db.execute(stmt):
+            stats = {}
+            for i, f in enumerate(fields):
+                lo, hi, avg = row[3 + 3 * i: 6 + 3 * i]
+                stats[f] = FieldStats(min=_as_float(lo), max=_as_float(hi),
+                                      avg=_as_float(avg))
+            result.append(SensorAggregate(bucket=row[0], count=row[1],
+                                          motion_count=row[2] or 0, stats=stats))
         return result
 
-    def fetch_by_time(self, from_time, to_time) -> List[SensorReading]:
-        rows = (
-            self.db.query(SensorDB)
-            .filter(SensorDB.timestamp >= from_time, SensorDB.timestamp <= to_time)
-            .order_by(SensorDB.timestamp)
-            .all()
+    def _aggregate_rollup(self, level, from_time, to_time, bucket_seconds, fields):
+        seconds, model = level
+        bucket = time_bucket(self.read_db, model.bucket, bucket_seconds)
+        cols = [model.count, model.motion_count]
+        for f in fields:
+            cols += [getattr(model, f"{f}_min"), getattr(model, f"{f}_max"),
+                     getattr(model, f"{f}_sum"), getattr(model, f"{f}_count")]
+        inner = (
+            select(bucket.label("bucket"), *cols)
+            .where(model.bucket >= from_time, model.bucket < to_time)
+            .subquery()
         )
+        cols = [inner.c.bucket, func.sum(inner.c.count), func.sum(inner.c.motion_count)]
+        for f in fields:
+            cols += [func.min(inner.c[f"{f}_min"]), func.max(inner.c[f"{f}_max"]),
+                     func.sum(inner.c[f"{f}_sum"]), func.sum(inner.c[f"{f}_count"])]
+        stmt = select(*cols).group_by(inner.c.bucket).order_by(inner.c.bucket)
+
         result = []
-        for row in rows:
-            data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-            result.append(SensorReading(**data))
+        for row in self.read_db.execute(stmt):
+            count = row[1]
+            stats = {}
+            for i, f in enumerate(fields):
+                # averaged over the non-NULL values only, like SQL AVG
+                lo, hi, total, n = row[3 + 4 * i: 7 + 4 * i]
+                avg = float(total) / n if total is not None and n else None
+                stats[f] = FieldStats(min=_as_float(lo), max=_as_float(hi), avg=avg)
+            result.append(SensorAggregate(bucket=row[0], count=count,
+                                          motion_count=row[2] or 0, stats=stats))
         return result
 
 
+_NO_SETTINGS = object()
+
+
 class SettingsRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.db = db
+        self.read_db = read_db or db
 
     def get(self, owner: str) -> Optional[GreenhouseSettings]:
-        row = self.db.query(SettingsDB).filter_by(owner=owner).first()
+        cached = settings_cache.get(owner)
+        if cached is not None:
+            return None if cached is _NO_SETTINGS else cached
+        row = self.read_db.query(SettingsDB).filter_by(owner=owner).first()
         if not row:
+            # remembered too: every upload of an owner without thresholds
+            # asks for them (alert evaluation)
+            settings_cache.set(owner, _NO_SETTINGS)
             return None
         data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-        return GreenhouseSettings(**data)
+        settings = GreenhouseSettings(**data)
+        settings_cache.set(owner, settings)
+        return settings
 
     def upsert(self, s: GreenhouseSettings) -> GreenhouseSettings:
         row = self.db.query(SettingsDB).filter_by(owner=s.owner).first()
@@ -77,7 +662,70 @@ class SettingsRepository:
         self.db.refresh(row)
 
         data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
-        return GreenhouseSettings(**data)
+        saved = GreenhouseSettings(**data)
+        # write-through: the replica may lag, the primary just answered
+        settings_cache.set(saved.owner, saved)
+        return saved
+
+
+def _alert_from_row(row: AlertDB) -> Alert:
+    return Alert(**{c.name: getattr(row, c.name) for c in AlertDB.__table__.columns})
+
+
+class AlertRepository:
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    def record(self, owner: str, readings: List[SensorReading]) -> List[Alert]:
+        """
+        Run freshly stored readings through the alert engine and add the
+        resulting transitions to the current transaction (no commit). The
+        thresholds come from the settings cache: one lookup per batch.
+        """
+        if not readings:
+            return []
+        settings = SettingsRepository(self.db).get(owner)
+        events = alert_engine.evaluate(owner, readings, settings,
+                                       lambda: self.open_alerts(owner, primary=True))
+        if events:
+            self.db.execute(insert(AlertDB), [
+                {k: v for k, v in e.__dict__.items() if k != "id"} for e in events
+            ])
+        return events
+
+    def open_alerts(self, owner: str, primary: bool = False) -> List[Alert]:
+        """Alerts whose latest transition per (device, metric) is a raise."""
+        db = self.db if primary else self.read_db
+        latest = (
+            select(func.max(AlertDB.id))
+            .where(AlertDB.owner == owner)
+            .group_by(AlertDB.device_id, AlertDB.metric)
+        )
+        rows = db.execute(
+            select(AlertDB)
+            .where(AlertDB.id.in_(latest), AlertDB.state == RAISED)
+            .order_by(AlertDB.timestamp, AlertDB.id)
+        ).scalars()
+        return [_alert_from_row(r) for r in rows]
+
+    def fetch(self, owner: str, from_time=None, to_time=None,
+              device_id: Optional[str] = None, metric: Optional[str] = None,
+              state: Optional[str] = None, limit: int = 100) -> List[Alert]:
+        """The owner's transitions, newest first."""
+        stmt = select(AlertDB).where(AlertDB.owner == owner)
+        if from_time is not None:
+            stmt = stmt.where(AlertDB.timestamp >= from_time)
+        if to_time is not None:
+            stmt = stmt.where(AlertDB.timestamp <= to_time)
+        if device_id is not None:
+            stmt = stmt.where(AlertDB.device_id == device_id)
+        if metric is not None:
+            stmt = stmt.where(AlertDB.metric == metric)
+        if state is not None:
+            stmt = stmt.where(AlertDB.state == state)
+        stmt = stmt.order_by(AlertDB.timestamp.desc(), AlertDB.id.desc()).limit(limit)
+        return [_alert_from_row(r) for r in self.read_db.execute(stmt).scalars()]
 
 
 class UserRepository:
@@ -108,6 +756,7 @@ class UserRepository:
             row.is_first_login = True
         self.db.commit()
         self.db.refresh(row)
+        self._forget(username)
 
         data = {k: v for k, v in row.__dict__.items() if not k.startswith("_")}
         return User(
@@ -123,18 +772,72 @@ class UserRepository:
             row.password_hash = get_password_hash(new_password)
             row.is_first_login = False
             self.db.commit()
+            self._forget(username)
+
+    @staticmethod
+    def _forget(username: str):
+        # cached principals and known-bad passwords are stale now
+        principal_cache.invalidate(username)
+        failed_login_cache.discard_where(lambda key: key[0] == username)
 
 
 class TokenBlacklistRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def revoke(self, jti: str):
-        self.db.add(RevokedTokenDB(jti=jti))
+    def revoke(self, jti: str, expires_at: Optional[datetime] = None):
+        revoked_at = datetime.utcnow()
+        if expires_at is None:
+            # unknown exp: keep it for the longest lifetime a token can have
+            expires_at = revoked_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        self.db.add(RevokedTokenDB(jti=jti, revoked_at=revoked_at, expires_at=expires_at))
         self.db.commit()
+        revocation_cache.add(jti, expires_at)
 
     def is_revoked(self, jti: str) -> bool:
         return (
             self.db.query(RevokedTokenDB).filter_by(jti=jti).first()
             is not None
         )
+
+    def revoked_since(self, since: Optional[datetime] = None) -> List[RevokedToken]:
+        """
+        Unexpired revocations recorded at or after `since` (all if None).
+        Rows from before expires_at existed have it NULL and never expire
+        until `backfill_expiry` has run.
+        """
+        query = self.db.query(RevokedTokenDB).filter(or_(
+            RevokedTokenDB.expires_at.is_(None),
+            RevokedTokenDB.expires_at > datetime.utcnow(),
+        ))
+        if since is not None:
+            query = query.filter(RevokedTokenDB.revoked_at >= since)
+        return [
+            RevokedToken(jti=row.jti, revoked_at=row.revoked_at, expires_at=row.expires_at)
+            for row in query.all()
+        ]
+
+    def backfill_expiry(self) -> int:
+        """
+        Give rows without expires_at the latest expiry their token can have
+        (revoked_at plus the token lifetime, as `revoke` does for an
+        unknown exp), so `prune_expired` can eventually drop them.
+        """
+        rows = self.db.query(RevokedTokenDB).filter(RevokedTokenDB.expires_at.is_(None)).all()
+        lifetime = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        now = datetime.utcnow()
+        for row in rows:
+            row.expires_at = (row.revoked_at or now) + lifetime
+        self.db.commit()
+        return len(rows)
+
+    def prune_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete revocations whose token has expired anyway (NULL never has)."""
+        now = now or datetime.utcnow()
+        deleted = (
+            self.db.query(RevokedTokenDB)
+            .filter(RevokedTokenDB.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return deleted
@@ -0,0 +1,36 @@
+# adapters/events.py
+"""
+In-process hooks fired after sensor readings are committed. Every ingest
+path (single, batch, binary, queued, async) ends in
+`SensorRepository.insert_many`, which calls `readings_stored` with the rows
+it actually stored, so consumers (live stream, latest-value store, ...)
+see each reading exactly once without touching the database.
+"""
+import logging
+from typing import Callable, List
+
+from domain.entities import SensorReading
+
+logger = logging.getLogger(__name__)
+
+ReadingsListener = Callable[[List[SensorReading]], None]
+
+_listeners: List[ReadingsListener] = []
+
+
+def on_readings_stored(listener: ReadingsListener) -> ReadingsListener:
+    """Register `listener`; usable as a decorator. Listeners must not block."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def readings_stored(readings: List[SensorReading]):
+    if not readings:
+        return
+    for listener in list(_listeners):
+        try:
+            listener(readings)
+        except Exception:
+            # a broken consumer must never fail the write that already committed
+            logger.exception("Sensor readings listener %r failed", listener)
@@ -0,0 +1,149 @@
+# adapters/ingest_queue.py
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from adapters.db.repositories import SensorRepository
+from domain.entities import SensorReading
+
+logger = logging.getLogger(__name__)
+
+# (owner, reading): the owner's thresholds are evaluated when it is written
+_Item = Tuple[Optional[str], SensorReading]
+
+# "sync" writes every reading inside the request, "queue" hands it to the
+# background writer below and answers 202 straight away.
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "10000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+
+
+class IngestQueue:
+    """
+    Bounded in-process write-behind buffer for sensor readings.
+
+    A single worker thread drains the queue and writes a batch through
+    `SensorRepository.insert_many` as soon as either `batch_size` readings
+    are waiting or `flush_interval` seconds have passed since the first
+    reading of the batch arrived. A batch mixing several owners is
+    written as one transaction per owner.
+    """
+
+    def __init__(self,
+                 session_factory: Callable[[], Session] = SessionLocal,
+                 maxsize: int = INGEST_QUEUE_MAX,
+                 batch_size: int = INGEST_BATCH_SIZE,
+                 flush_interval: float = INGEST_FLUSH_INTERVAL,
+                 enabled: bool = INGEST_MODE == "queue"):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._queue: "queue.Queue[_Item]" = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, reading: SensorReading, owner: Optional[str] = None) -> bool:
+        """
+        Queue a reading; returns False when the queue is full. A reading
+        without a timestamp is stamped now: the column default would only
+        apply when the batch is written, after the whole queue delay.
+        """
+        if reading.timestamp is None:
+            reading = replace(reading, timestamp=datetime.now(timezone.utc))
+        try:
+            self._queue.put_nowait((owner, reading))
+        except queue.Full:
+            return False
+        return True
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker and write out everything still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Synchronously write every reading currently in the queue."""
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> List[_Item]:
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, limit: int) -> List[_Item]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[_Item]):
+        by_owner: Dict[Optional[str], List[SensorReading]] = {}
+        for owner, reading in batch:
+            by_owner.setdefault(owner, []).append(reading)
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                for owner, readings in by_owner.items():
+                    try:
+                        SensorRepository(db).insert_many(readings, owner)
+                    except Exception:
+                        db.rollback()
+                        logger.exception("Dropped %d queued sensor readings", len(readings))
+            finally:
+                db.close()
+
+
+ingest_queue = IngestQueue()
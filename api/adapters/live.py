@@ -0,0 +1,173 @@
+# adapters/live.py
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from adapters.events import on_readings_stored
+from domain.entities import SensorReading
+from metrics import metrics
+
+SENSOR_STREAM_MAX_SUBSCRIBERS = int(os.getenv("SENSOR_STREAM_MAX_SUBSCRIBERS", "1000"))
+# Readings stored by other workers only show up through the database, so a
+# latest value is re-checked once it has gone this long without an update.
+SENSOR_LATEST_MAX_AGE = float(os.getenv("SENSOR_LATEST_MAX_AGE", "30"))
+
+
+class Subscription:
+    """
+    One live-stream client. Instead of a queue it keeps a single slot per
+    device holding the newest unsent reading, so a slow consumer skips
+    intermediate values rather than growing a backlog.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, device_id: Optional[str] = None,
+                 on_close: Optional[Callable[["Subscription"], None]] = None):
+        self.loop = loop
+        self.device_id = device_id
+        self._on_close = on_close
+        self._pending: Dict[Optional[str], SensorReading] = {}
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+
+    def close(self):
+        """Unsubscribe; safe to call more than once."""
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def offer(self, readings: List[SensorReading]):
+        """Called from any thread by the hub."""
+        overwritten = 0
+        with self._lock:
+            for r in readings:
+                if self.device_id is not None and r.device_id != self.device_id:
+                    continue
+                current = self._pending.get(r.device_id)
+                if current is not None:
+                    if (r.timestamp, r.id) < (current.timestamp, current.id):
+                        continue
+                    overwritten += 1
+                self._pending[r.device_id] = r
+            wake = bool(self._pending)
+        if overwritten:
+            metrics.inc("sensor_stream_coalesced", overwritten)
+        if wake:
+            try:
+                self.loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # loop already closed; the subscription is going away
+
+    async def next(self, timeout: float) -> List[SensorReading]:
+        """Newest reading per device since the last call; [] on timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return sorted(pending.values(), key=lambda r: (r.timestamp, r.id))
+
+
+class SensorHubFull(Exception):
+    """The hub already has `max_subscribers` subscriptions."""
+
+
+class SensorHub:
+    """In-process fan-out of stored readings to live-stream subscribers."""
+
+    def __init__(self, max_subscribers: int = SENSOR_STREAM_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        metrics.gauge("sensor_stream_subscribers", lambda: len(self._subscribers))
+
+    def publish(self, readings: List[SensorReading]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(readings)
+
+    def subscribe(self, device_id: Optional[str] = None) -> Subscription:
+        """
+        Register a subscription, or raise SensorHubFull. The limit is checked
+        and the slot taken under one lock, so concurrent connects cannot
+        overshoot it. Close the subscription (or use it as a context
+        manager) to give the slot back.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SensorHubFull()
+            sub = Subscription(asyncio.get_running_loop(), device_id, self._unsubscribe)
+            self._subscribers.append(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.remove(sub)
+
+
+def _newer(a: SensorReading, b: Optional[SensorReading]) -> bool:
+    return b is None or (a.timestamp, a.id) > (b.timestamp, b.id)
+
+
+class LatestReadings:
+    """
+    Last-value store: the newest reading per device plus the newest
+    overall (key `ALL`), kept current by the ingest hook. A key that has
+    not been touched for `max_age` seconds (or was never loaded) is read
+    through `load` once and cached again, including "no readings yet".
+    """
+    ALL = object()
+
+    def __init__(self, max_age: float = SENSOR_LATEST_MAX_AGE):
+        self.max_age = max_age
+        self._entries: Dict[object, tuple] = {}   # key -> (checked_at, reading)
+        self._lock = threading.Lock()
+
+    def update(self, readings: List[SensorReading]):
+        now = time.monotonic()
+        with self._lock:
+            for r in readings:
+                for key in (self.ALL, r.device_id):
+                    self._store(key, r, now)
+
+    def get(self, device_id: Optional[str],
+            load: Callable[[], Optional[SensorReading]]) -> Optional[SensorReading]:
+        key = self.ALL if device_id is None else device_id
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.max_age:
+            metrics.inc("sensor_latest_hits")
+            return entry[1]
+        metrics.inc("sensor_latest_misses")
+        loaded = load()
+        with self._lock:
+            return self._store(key, loaded, time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, reading: Optional[SensorReading], now: float):
+        # an older reading (late upload, slow load) never replaces a newer
+        # one, but it still counts as a fresh check
+        entry = self._entries.get(key)
+        current = entry[1] if entry else None
+        if reading is not None and _newer(reading, current):
+            current = reading
+        self._entries[key] = (now, current)
+        return current
+
+
+sensor_hub = SensorHub()
+on_readings_stored(sensor_hub.publish)
+latest_readings = LatestReadings()
+on_readings_stored(latest_readings.update)
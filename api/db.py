@@ -1,15 +1,109 @@
 import os
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
+from metrics import metrics
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+# Optional replica for the heavy read-only queries (history, aggregates, ...).
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+_POOL_KWARGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+
+def _timed_pool(role: str):
+    """QueuePool subclass reporting how long each checkout waited."""
+    metric = f"db_pool_{role}_checkout_wait_seconds"
+
+    class TimedQueuePool(QueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.observe(metric, time.perf_counter() - start)
+
+    return TimedQueuePool
+
+
+def _make_engine(url: str, role: str):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    eng = create_engine(url, poolclass=_timed_pool(role), **_POOL_KWARGS)
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    metrics.gauge(f"db_pool_{role}_checked_out", lambda: eng.pool.checkedout())
+    metrics.gauge(f"db_pool_{role}_utilization",
+                  lambda: eng.pool.checkedout() / capacity if capacity else 0.0)
+    return eng
+
+
+engine = _make_engine(DATABASE_URL, "primary")
+read_engine = _make_engine(READ_DATABASE_URL, "replica") if READ_DATABASE_URL else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
+
+# Postgres only: declaratively partition sensor_data by time range ("day",
+# "week" or "month"), optionally hash sub-partitioned by device into
+# SENSOR_DEVICE_PARTITIONS buckets. Applies to schemas created with this
+# setting; an existing plain table has to be migrated by hand.
+SENSOR_PARTITION_INTERVAL = os.getenv("SENSOR_PARTITION_INTERVAL", "")
+SENSOR_DEVICE_PARTITIONS = int(os.getenv("SENSOR_DEVICE_PARTITIONS", "0"))
+SENSOR_PARTITIONED = bool(SENSOR_PARTITION_INTERVAL) and engine.dialect.name == "postgresql"
+
+# DB_ASYNC=1 mounts the async routers on an AsyncEngine (aiosqlite/asyncpg).
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver."""
+    scheme, sep, rest = url.partition("://")
+    driver = {
+        "sqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }.get(scheme, scheme)
+    return f"{driver}{sep}{rest}"
+
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if DB_ASYNC:
+    # imported lazily: the async drivers are only needed in async mode
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    def _make_async_engine(url: str):
+        kwargs = {} if url.startswith("sqlite") else _POOL_KWARGS
+        return create_async_engine(async_database_url(url), **kwargs)
+
+    async_engine = _make_async_engine(DATABASE_URL)
+    async_read_engine = (
+        _make_async_engine(READ_DATABASE_URL) if READ_DATABASE_URL else async_engine
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False
+    )
@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 @dataclass
 class SensorReading:
@@ -15,6 +15,22 @@ class SensorReading:
     acc_x: int = 0
     acc_y: int = 0
     acc_z: int = 0
+    # (device_id, seq) identifies a reading across client retries
+    device_id: Optional[str] = None
+    seq: Optional[int] = None
+
+@dataclass
+class FieldStats:
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+
+@dataclass
+class SensorAggregate:
+    bucket: datetime
+    count: int = 0
+    motion_count: int = 0
+    stats: Dict[str, FieldStats] = field(default_factory=dict)
 
 @dataclass
 class GreenhouseSettings:
@@ -40,3 +56,18 @@ class User:
 class RevokedToken:
     jti: str
     revoked_at: datetime = field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None
+
+@dataclass
+class Alert:
+    """A threshold alert changing state; one row per transition, not per sample."""
+    id: Optional[int] = None
+    owner: str = ""
+    device_id: Optional[str] = None
+    metric: str = ""
+    state: str = ""             # "raised" | "cleared"
+    bound: str = ""             # "min" | "max"
+    value: Optional[float] = None
+    threshold: Optional[float] = None
+    reading_id: Optional[int] = None
+    timestamp: Optional[datetime] = None
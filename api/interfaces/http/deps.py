@@ -1,15 +1,20 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from db import SessionLocal
+import db as database
+from db import SessionLocal, ReadSessionLocal
+from adapters.cache import principal_cache, revocation_cache
 from adapters.db.repositories import UserRepository, TokenBlacklistRepository
+from adapters.db.async_repositories import AsyncUserRepository
 from security import SECRET_KEY, ALGORITHM
 from domain.entities import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
 def db_session() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -18,24 +23,100 @@ def db_session() -> Generator[Session, None, None]:
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme),
-                     db: Session = Depends(db_session)) -> dict:
-    credentials_exception = HTTPException(
+def read_db_session() -> Generator[Session, None, None]:
+    """Session on the read replica (the primary when none is configured)."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def async_db_session() -> AsyncGenerator:
+    if database.AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires DB_ASYNC=1")
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+async def async_read_db_session() -> AsyncGenerator:
+    if database.AsyncReadSessionLocal is None:
+        raise RuntimeError("Async database access requires DB_ASYNC=1")
+    async with database.AsyncReadSessionLocal() as db:
+        yield db
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        jti: str = payload.get("jti")
-        if username is None or jti is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    if TokenBlacklistRepository(db).is_revoked(jti):
-        raise credentials_exception
-    user = UserRepository(db).get(username)
+        raise _credentials_exception()
+    if payload.get("sub") is None or payload.get("jti") is None:
+        raise _credentials_exception()
+    return payload
+
+def _principal(payload: dict, user: User) -> dict:
+    exp = payload.get("exp")
+    return {
+        "username": user.username,
+        "jti": payload["jti"],
+        "exp": datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None) if exp else None,
+        "is_first_login": user.is_first_login,
+    }
+
+def get_current_user(token: str = Depends(oauth2_scheme),
+                     db: Session = Depends(db_session)) -> dict:
+    payload = _decode_token(token)
+    username, jti = payload["sub"], payload["jti"]
+    # in-memory check; the cache syncs with revoked_tokens periodically
+    if revocation_cache.is_revoked(jti, TokenBlacklistRepository(db).revoked_since):
+        raise _credentials_exception()
+    stamp = payload.get("pwv")
+    user = principal_cache.get(username, stamp)
+    if user is None:
+        user = UserRepository(db).get(username)
+        if user is None:
+            raise _credentials_exception()
+        principal_cache.put(user, stamp)
+    return _principal(payload, user)
+
+def get_stream_user(token: Optional[str] = Depends(oauth2_scheme_optional),
+                    access_token: Optional[str] = Query(None),
+                    db: Session = Depends(db_session, scope="function")) -> dict:
+    """
+    Authenticate a long-lived stream once, at connect time. Browsers'
+    EventSource cannot send headers, so `?access_token=` is accepted too.
+    A token in the query string ends up in the access logs of every proxy
+    and load balancer on the way: prefer the header, and where the query
+    parameter is needed, strip it from those logs. The session is released
+    before streaming starts.
+    """
+    token = token or access_token
+    if not token:
+        raise _credentials_exception()
+    return get_current_user(token, db)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme),
+                                 db=Depends(async_db_session)) -> dict:
+    payload = _decode_token(token)
+    username, jti = payload["sub"], payload["jti"]
+    if revocation_cache.sync_due():
+        revoked = await db.run_sync(
+            lambda s: revocation_cache.is_revoked(jti, TokenBlacklistRepository(s).revoked_since)
+        )
+    else:
+        revoked = revocation_cache.contains(jti)
+    if revoked:
+        raise _credentials_exception()
+    stamp = payload.get("pwv")
+    user = principal_cache.get(username, stamp)
     if user is None:
-        raise credentials_exception
-    return {"username": user.username, "jti": jti, "is_first_login": user.is_first_login}
+        user = await AsyncUserRepository(db).get(username)
+        if user is None:
+            raise _credentials_exception()
+        principal_cache.put(user, stamp)
+    return _principal(payload, user)
@@ -0,0 +1,64 @@
+# interfaces/http/responses.py
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, List, Optional, Sequence
+
+from fastapi.responses import Response
+
+ETAG_HEADER = "ETag"
+
+try:  # optional speed-up; the stdlib encoder is the fallback
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, datetime) and obj.utcoffset() == timedelta(0):
+        # "Z" for UTC, like pydantic and orjson's OPT_UTC_Z
+        return obj.replace(tzinfo=None).isoformat() + "Z"
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # OPT_UTC_Z: UTC as "Z", matching the routes pydantic serialises
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with orjson when available. Routes returning it
+    skip FastAPI's response_model validation/serialisation, so hand it data
+    that is already in its final shape.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def rows_to_dicts(columns: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def etag_for(content: Any) -> str:
+    """Strong ETag derived from the JSON encoding of `content`."""
+    digest = hashlib.sha256(json_dumps(content)).hexdigest()[:16]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` comparison; weak validators match their strong twin."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag})
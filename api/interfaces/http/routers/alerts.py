@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from interfaces.http.schemas import AlertOut
+from adapters.alerts import ALERT_RULES, ALERT_STATES
+from adapters.db.repositories import AlertRepository
+from interfaces.http.deps import db_session, read_db_session, get_current_user
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+
+@router.get("/", response_model=List[AlertOut])
+def read_alerts(from_time: Optional[datetime] = Query(None, alias="from"),
+                to_time: Optional[datetime] = Query(None, alias="to"),
+                device_id: Optional[str] = None,
+                metric: Optional[str] = None,
+                state: Optional[str] = None,
+                limit: int = Query(100, ge=1, le=1000),
+                db=Depends(db_session), read_db=Depends(read_db_session),
+                user=Depends(get_current_user)):
+    """
+    Alert transitions (raised / cleared) of the current user's devices,
+    newest first, optionally narrowed by time range, device, metric and state.
+    """
+    if metric is not None and metric not in ALERT_RULES:
+        raise HTTPException(422, f"metric must be one of {','.join(ALERT_RULES)}")
+    if state is not None and state not in ALERT_STATES:
+        raise HTTPException(422, f"state must be one of {','.join(ALERT_STATES)}")
+    repo = AlertRepository(db, read_db)
+    alerts = repo.fetch(user["username"], from_time, to_time,
+                        device_id, metric, state, limit)
+    return [AlertOut(**a.__dict__) for a in alerts]
+
+
+@router.get("/open", response_model=List[AlertOut])
+def read_open_alerts(db=Depends(db_session), read_db=Depends(read_db_session),
+                     user=Depends(get_current_user)):
+    """Alerts raised and not cleared since, one per (device, metric)."""
+    alerts = AlertRepository(db, read_db).open_alerts(user["username"])
+    return [AlertOut(**a.__dict__) for a in alerts]
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import timedelta
 
 from interfaces.http.schemas import (
@@ -6,9 +6,11 @@ from interfaces.http.schemas import (
 )
 from interfaces.http.deps import db_session, get_current_user
 from adapters.db.repositories import UserRepository, TokenBlacklistRepository
-from use_cases.auth_service import AuthService
+from use_cases.auth_service import AuthService, TooManyAttempts
 from security import (
     create_access_token,
+    password_stamp,
+    HashingBusy,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -16,17 +18,27 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/token", response_model=LoginResponse)
-def login(payload: LoginRequest, db=Depends(db_session)):
+def login(payload: LoginRequest, request: Request, db=Depends(db_session)):
     user_repo = UserRepository(db)
     blk = TokenBlacklistRepository(db)
     auth = AuthService(user_repo, blk)
+    client = request.client.host if request.client else None
 
-    user = auth.authenticate(payload.username, payload.password)
+    try:
+        user = auth.authenticate(payload.username, payload.password, client)
+    except TooManyAttempts as e:
+        raise HTTPException(429, "Too many failed attempts",
+                            headers={"Retry-After": str(e.retry_after)})
+    except HashingBusy:
+        raise HTTPException(503, "Server busy, retry shortly",
+                            headers={"Retry-After": "1"})
     if not user:
         raise HTTPException(400, "Invalid credentials")
 
     expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = create_access_token({"sub": user.username}, expires)
+    token = create_access_token(
+        {"sub": user.username, "pwv": password_stamp(user.password_hash)}, expires
+    )
     return LoginResponse(
         access_token=token,
         token_type="bearer",
@@ -39,7 +51,7 @@ def logout(ctx=Depends(get_current_user), db=Depends(db_session)):
     _, jti = ctx["username"], ctx["jti"]
     blk = TokenBlacklistRepository(db)
     auth = AuthService(UserRepository(db), blk)
-    auth.revoke_token(jti)
+    auth.revoke_token(jti, ctx["exp"])
     return LogoutResponse(message=f"User '{ctx['username']}' logged out.")
 
 
@@ -50,5 +62,9 @@ def change_password(
         db=Depends(db_session)
 ):
     auth = AuthService(UserRepository(db), TokenBlacklistRepository(db))
-    auth.change_password(ctx["username"], payload.new_password)
+    try:
+        auth.change_password(ctx["username"], payload.new_password)
+    except HashingBusy:
+        raise HTTPException(503, "Server busy, retry shortly",
+                            headers={"Retry-After": "1"})
     return LogoutResponse(message="Password updated")
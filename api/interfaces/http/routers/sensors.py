@@ -1,35 +1,283 @@
-from fastapi import APIRouter, Depends
-from typing import List
+import asyncio
+import csv
+import io
+import os
+import re
+from dataclasses import asdict
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
 from datetime import datetime
 
-from interfaces.http.schemas import SensorDataCreate, SensorDataRead
-from adapters.db.repositories import SensorRepository
-from interfaces.http.deps import db_session, get_current_user
+from interfaces.http.schemas import (
+    SensorDataCreate, SensorDataRead, SensorAccepted,
+    SensorBatchError, SensorBatchResult, SensorAggregateOut,
+)
+from adapters.db.repositories import (
+    SensorRepository, AGGREGATE_FIELDS, SENSOR_COLUMNS
+)
+from adapters.ingest_queue import ingest_queue
+from adapters.live import SensorHubFull, Subscription, latest_readings, sensor_hub
+from interfaces.http.deps import (
+    db_session, read_db_session, get_current_user, get_stream_user
+)
+from interfaces.http.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+)
+from interfaces.http.responses import FastJSONResponse, json_dumps, rows_to_dicts
+from interfaces.http.telemetry import BINARY_MEDIA_TYPE, decode_readings
 from domain.entities import SensorReading
 
 router = APIRouter(prefix="/sensors", tags=["sensors"])
 
+MAX_BATCH_SIZE = int(os.getenv("SENSOR_BATCH_MAX_ROWS", "1000"))
+MAX_AGGREGATE_BUCKETS = int(os.getenv("SENSOR_AGGREGATE_MAX_BUCKETS", "10000"))
+# Live stream: minimum gap between pushes (updates in between are coalesced
+# to the newest reading per device) and the idle keep-alive period.
+STREAM_INTERVAL = float(os.getenv("SENSOR_STREAM_INTERVAL", "1.0"))
+STREAM_KEEPALIVE = float(os.getenv("SENSOR_STREAM_KEEPALIVE", "15"))
 
-@router.get("/", response_model=List[SensorDataRead])
+_BUCKET_RE = re.compile(r"^(\d+)([smhd])$")
+_BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_bucket(value: str) -> int:
+    m = _BUCKET_RE.match(value)
+    if not m or int(m.group(1)) == 0:
+        raise HTTPException(422, "bucket must look like 30s, 5m, 1h or 1d")
+    return int(m.group(1)) * _BUCKET_UNITS[m.group(2)]
+
+
+@router.get("/", response_model=List[SensorDataRead],
+            response_class=FastJSONResponse)
 def read_sensors(skip: int = 0, limit: int = 100,
-                 db=Depends(db_session), user=Depends(get_current_user)):
-    repo = SensorRepository(db)
-    records = repo.fetch_all(skip, limit)
-    return [SensorDataRead(**r.__dict__) for r in records]
+                 cursor: Optional[str] = None, device_id: Optional[str] = None,
+                 db=Depends(db_session), read_db=Depends(read_db_session),
+                 user=Depends(get_current_user)):
+    """
+    Readings ordered by (timestamp, id). Pass the `X-Next-Cursor` header of
+    a full page back as `cursor` (with the same `device_id`) to get the
+    next one; `skip` is kept for old clients but costs a scan of every
+    skipped row.
+    """
+    repo = SensorRepository(db, read_db)
+    if skip and cursor is None:
+        rows = repo.fetch_rows(skip, limit, device_id=device_id)
+    else:
+        after = decode_cursor(cursor) if cursor else None
+        rows = repo.fetch_rows(limit=limit, after=after, device_id=device_id)
+    response = FastJSONResponse(rows_to_dicts(SENSOR_COLUMNS, rows))
+    if rows and len(rows) == limit:
+        last = dict(zip(SENSOR_COLUMNS, rows[-1]))
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["timestamp"], last["id"])
+    return response
 
 
-@router.get("/history", response_model=List[SensorDataRead])
+@router.get("/latest", response_model=SensorDataRead)
+def latest_sensor(device_id: Optional[str] = None,
+                  db=Depends(db_session), read_db=Depends(read_db_session),
+                  user=Depends(get_current_user)):
+    """
+    Newest reading (of one device, or overall). Served from memory, kept
+    current by ingestion; the database is only read on a cold start or
+    after SENSOR_LATEST_MAX_AGE seconds without a local update.
+    """
+    repo = SensorRepository(db, read_db)
+    reading = latest_readings.get(device_id, lambda: repo.fetch_latest(device_id))
+    if reading is None:
+        raise HTTPException(404, "No readings yet")
+    return SensorDataRead(**reading.__dict__)
+
+
+@router.get("/history", response_model=List[SensorDataRead],
+            response_class=FastJSONResponse)
 def sensor_history(from_time: datetime, to_time: datetime,
-                   db=Depends(db_session), user=Depends(get_current_user)):
-    repo = SensorRepository(db)
-    records = repo.fetch_by_time(from_time, to_time)
-    return [SensorDataRead(**r.__dict__) for r in records]
+                   device_id: Optional[str] = None,
+                   db=Depends(db_session), read_db=Depends(read_db_session),
+                   user=Depends(get_current_user)):
+    repo = SensorRepository(db, read_db)
+    rows = repo.fetch_rows_by_time(from_time, to_time, device_id)
+    return FastJSONResponse(rows_to_dicts(SENSOR_COLUMNS, rows))
+
+
+@router.get("/aggregate", response_model=List[SensorAggregateOut])
+def sensor_aggregate(from_time: datetime = Query(..., alias="from"),
+                     to_time: datetime = Query(..., alias="to"),
+                     bucket: str = "1h",
+                     fields: str = ",".join(AGGREGATE_FIELDS),
+                     device_id: Optional[str] = None,
+                     db=Depends(db_session), read_db=Depends(read_db_session),
+                     user=Depends(get_current_user)):
+    seconds = _parse_bucket(bucket)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in AGGREGATE_FIELDS]
+    if not names or unknown:
+        raise HTTPException(
+            422, f"fields must be a subset of {','.join(AGGREGATE_FIELDS)}"
+        )
+    if (to_time - from_time).total_seconds() / seconds > MAX_AGGREGATE_BUCKETS:
+        raise HTTPException(422, "Too many buckets; use a coarser bucket")
+
+    repo = SensorRepository(db, read_db)
+    buckets = repo.aggregate(from_time, to_time, seconds, names, device_id)
+    return [SensorAggregateOut(**asdict(b)) for b in buckets]
+
+
+def _ndjson_stream(chunks: Iterator[Sequence[tuple]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = [json_dumps(dict(zip(SENSOR_COLUMNS, row))) for row in chunk]
+        yield b"\n".join(lines) + b"\n"
+
+
+def _csv_stream(chunks: Iterator[Sequence[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(SENSOR_COLUMNS)
+    yield buf.getvalue().encode()
+    for chunk in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(chunk)
+        yield buf.getvalue().encode()
+
+
+_EXPORT_FORMATS = {
+    "ndjson": (_ndjson_stream, "application/x-ndjson"),
+    "csv": (_csv_stream, "text/csv"),
+}
 
 
-@router.post("/", response_model=SensorDataRead, status_code=201)
-def create_sensor(data: SensorDataCreate,
+@router.get("/export")
+def sensor_export(from_time: datetime = Query(..., alias="from"),
+                  to_time: datetime = Query(..., alias="to"),
+                  format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                  device_id: Optional[str] = None,
+                  db=Depends(db_session), read_db=Depends(read_db_session),
+                  user=Depends(get_current_user)):
+    """
+    Stream the raw readings of a time range as NDJSON or CSV. Rows are
+    encoded chunk by chunk while the query is still being read.
+    """
+    encode, media_type = _EXPORT_FORMATS[format]
+    chunks = SensorRepository(db, read_db).stream_by_time(
+        from_time, to_time, device_id=device_id
+    )
+    return StreamingResponse(
+        encode(chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sensors.{format}"'},
+    )
+
+
+async def _sse_events(request: Request, sub: Subscription) -> AsyncIterator[bytes]:
+    with sub:
+        yield b"retry: 5000\n\n"
+        while not await request.is_disconnected():
+            readings = await sub.next(STREAM_KEEPALIVE)
+            if not readings:
+                yield b": keepalive\n\n"
+                continue
+            for r in readings:
+                yield b"event: reading\nid: %d\ndata: %s\n\n" % (r.id, json_dumps(asdict(r)))
+            await asyncio.sleep(STREAM_INTERVAL)
+
+
+@router.get("/stream")
+async def sensor_stream(request: Request, device_id: Optional[str] = None,
+                        user=Depends(get_stream_user)):
+    """
+    Server-sent events: one `reading` event per newly stored reading, at
+    most one per device every SENSOR_STREAM_INTERVAL seconds (newer values
+    replace unsent ones). Authenticated once, at connect time; see
+    `get_stream_user` about `?access_token=`.
+    """
+    try:
+        sub = sensor_hub.subscribe(device_id)
+    except SensorHubFull:
+        raise HTTPException(503, "Too many live subscribers", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        _sse_events(request, sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # frees the slot even if the client is gone before streaming starts
+        background=BackgroundTask(sub.close),
+    )
+
+
+@router.post("/", response_model=SensorDataRead, status_code=201,
+             responses={200: {"description": "Duplicate (device_id, seq); "
+                                             "the stored reading is returned"},
+                        202: {"model": SensorAccepted}})
+def create_sensor(data: SensorDataCreate, response: Response,
                   db=Depends(db_session), user=Depends(get_current_user)):
-    repo = SensorRepository(db)
     domain = SensorReading(**data.model_dump())
-    saved = repo.insert(domain)
+    if ingest_queue.enabled:
+        if not ingest_queue.submit(domain, user["username"]):
+            raise HTTPException(429, "Ingestion queue is full",
+                                headers={"Retry-After": "1"})
+        return JSONResponse(status_code=202,
+                            content=SensorAccepted(status="queued").model_dump())
+
+    repo = SensorRepository(db)
+    saved = repo.insert(domain, user["username"])
+    if saved is None:
+        response.status_code = 200
+        saved = repo.fetch_by_key(domain.device_id, domain.seq)
     return SensorDataRead(**saved.__dict__)
+
+
+@router.post("/batch", response_model=SensorBatchResult, status_code=201)
+def create_sensor_batch(payload: List[Any] = Body(...),
+                        db=Depends(db_session), user=Depends(get_current_user)):
+    """
+    Insert many readings in a single transaction. Rows are validated
+    individually: invalid rows are reported in `errors` and skipped, the
+    rest are stored.
+    """
+    if len(payload) > MAX_BATCH_SIZE:
+        raise HTTPException(413, f"Batch exceeds {MAX_BATCH_SIZE} rows")
+
+    valid_idx, readings, errors = [], [], []
+    for i, item in enumerate(payload):
+        try:
+            data = SensorDataCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append(SensorBatchError(
+                index=i,
+                errors=e.errors(include_url=False, include_context=False),
+            ))
+            continue
+        valid_idx.append(i)
+        readings.append(SensorReading(**data.model_dump()))
+
+    if not readings:
+        raise HTTPException(422, [e.model_dump() for e in errors])
+
+    saved = SensorRepository(db).insert_many(readings, user["username"])
+    ids = [None] * len(payload)
+    duplicates = []
+    for i, r in zip(valid_idx, saved):
+        if r is None:
+            duplicates.append(i)
+        else:
+            ids[i] = r.id
+    return SensorBatchResult(inserted=len(saved) - len(duplicates), ids=ids,
+                             errors=errors, duplicates=duplicates)
+
+
+@router.post("/binary", response_model=SensorBatchResult, status_code=201)
+def create_sensor_binary(payload: bytes = Body(..., media_type=BINARY_MEDIA_TYPE),
+                         db=Depends(db_session), user=Depends(get_current_user)):
+    """
+    Bulk insert of packed binary readings; see `interfaces/http/telemetry.py`
+    for the record layout. The body is all-or-nothing: one bad length or
+    unknown version byte rejects it with 400.
+    """
+    readings = decode_readings(payload, MAX_BATCH_SIZE)
+    saved = SensorRepository(db).insert_many(readings, user["username"])
+    ids = [r.id if r else None for r in saved]
+    duplicates = [i for i, r in enumerate(saved) if r is None]
+    return SensorBatchResult(inserted=len(saved) - len(duplicates), ids=ids,
+                             errors=[], duplicates=duplicates)
@@ -0,0 +1,81 @@
+"""
+`async def` versions of the hot sensor endpoints, mounted ahead of the sync
+router when DB_ASYNC=1 so they shadow the matching sync routes. Endpoints
+that are not redefined here keep being served by `sensors.py`.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from datetime import datetime
+
+from interfaces.http.schemas import SensorDataCreate, SensorDataRead, SensorAccepted
+from adapters.db.async_repositories import AsyncSensorRepository
+from adapters.db.repositories import SENSOR_COLUMNS
+from adapters.ingest_queue import ingest_queue
+from interfaces.http.deps import (
+    async_db_session, async_read_db_session, get_current_user_async
+)
+from interfaces.http.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+)
+from interfaces.http.responses import FastJSONResponse, rows_to_dicts
+from domain.entities import SensorReading
+
+router = APIRouter(prefix="/sensors", tags=["sensors"])
+
+
+@router.get("/", response_model=List[SensorDataRead],
+            response_class=FastJSONResponse)
+async def read_sensors(skip: int = 0, limit: int = 100,
+                       cursor: Optional[str] = None,
+                       device_id: Optional[str] = None,
+                       db=Depends(async_db_session),
+                       read_db=Depends(async_read_db_session),
+                       user=Depends(get_current_user_async)):
+    repo = AsyncSensorRepository(db, read_db)
+    if skip and cursor is None:
+        rows = await repo.fetch_rows(skip, limit, device_id=device_id)
+    else:
+        after = decode_cursor(cursor) if cursor else None
+        rows = await repo.fetch_rows(limit=limit, after=after, device_id=device_id)
+    response = FastJSONResponse(rows_to_dicts(SENSOR_COLUMNS, rows))
+    if rows and len(rows) == limit:
+        last = dict(zip(SENSOR_COLUMNS, rows[-1]))
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["timestamp"], last["id"])
+    return response
+
+
+@router.get("/history", response_model=List[SensorDataRead],
+            response_class=FastJSONResponse)
+async def sensor_history(from_time: datetime, to_time: datetime,
+                         device_id: Optional[str] = None,
+                         db=Depends(async_db_session),
+                         read_db=Depends(async_read_db_session),
+                         user=Depends(get_current_user_async)):
+    rows = await AsyncSensorRepository(db, read_db).fetch_rows_by_time(
+        from_time, to_time, device_id
+    )
+    return FastJSONResponse(rows_to_dicts(SENSOR_COLUMNS, rows))
+
+
+@router.post("/", response_model=SensorDataRead, status_code=201,
+             responses={200: {"description": "Duplicate (device_id, seq); "
+                                             "the stored reading is returned"},
+                        202: {"model": SensorAccepted}})
+async def create_sensor(data: SensorDataCreate, response: Response,
+                        db=Depends(async_db_session),
+                        user=Depends(get_current_user_async)):
+    domain = SensorReading(**data.model_dump())
+    if ingest_queue.enabled:
+        if not ingest_queue.submit(domain, user["username"]):
+            raise HTTPException(429, "Ingestion queue is full",
+                                headers={"Retry-After": "1"})
+        return JSONResponse(status_code=202,
+                            content=SensorAccepted(status="queued").model_dump())
+
+    repo = AsyncSensorRepository(db)
+    saved = await repo.insert(domain, user["username"])
+    if saved is None:
+        response.status_code = 200
+        saved = await repo.fetch_by_key(domain.device_id, domain.seq)
+    return SensorDataRead(**saved.__dict__)
@@ -1,23 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from typing import Optional
 
 from interfaces.http.schemas import SettingsIn, SettingsOut
+from interfaces.http.responses import (
+    ETAG_HEADER, etag_for, etag_matches, not_modified
+)
 from adapters.db.repositories import SettingsRepository
 from use_cases.settings_service import SettingsService
 from domain.entities import GreenhouseSettings
-from interfaces.http.deps import db_session, get_current_user
+from interfaces.http.deps import db_session, read_db_session, get_current_user
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
-@router.get("/", response_model=SettingsOut)
-def read_settings(db=Depends(db_session), user=Depends(get_current_user)):
-    svc = SettingsService(SettingsRepository(db))
+@router.get("/", response_model=SettingsOut,
+            responses={304: {"description": "Settings unchanged"}})
+def read_settings(response: Response,
+                  if_none_match: Optional[str] = Header(None),
+                  db=Depends(db_session), read_db=Depends(read_db_session),
+                  user=Depends(get_current_user)):
+    """
+    Sends an `ETag`; clients that echo it in `If-None-Match` get an empty
+    304 until the thresholds change.
+    """
+    svc = SettingsService(SettingsRepository(db, read_db))
     s = svc.get(user["username"])
     if not s:
         raise HTTPException(404, "Settings not found")
-    return SettingsOut(**s.__dict__)
+    out = SettingsOut(**s.__dict__)
+    etag = etag_for(out.model_dump())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers[ETAG_HEADER] = etag
+    return out
 
 @router.post("/", response_model=SettingsOut)
-def write_settings(payload: SettingsIn,
+def write_settings(payload: SettingsIn, response: Response,
                    db=Depends(db_session), user=Depends(get_current_user)):
     svc = SettingsService(SettingsRepository(db))
     gh = GreenhouseSettings(
@@ -32,4 +49,6 @@ def write_settings(payload: SettingsIn,
         soil_min=payload.soil_min
     )
     saved = svc.save(gh)
-    return SettingsOut(**saved.__dict__)
+    out = SettingsOut(**saved.__dict__)
+    response.headers[ETAG_HEADER] = etag_for(out.model_dump())
+    return out
@@ -0,0 +1,42 @@
+"""`async def` versions of the settings endpoints, used when DB_ASYNC=1."""
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from typing import Optional
+
+from interfaces.http.schemas import SettingsIn, SettingsOut
+from interfaces.http.responses import (
+    ETAG_HEADER, etag_for, etag_matches, not_modified
+)
+from adapters.db.async_repositories import AsyncSettingsRepository
+from domain.entities import GreenhouseSettings
+from interfaces.http.deps import (
+    async_db_session, async_read_db_session, get_current_user_async
+)
+
+router = APIRouter(prefix="/settings", tags=["settings"])
+
+@router.get("/", response_model=SettingsOut,
+            responses={304: {"description": "Settings unchanged"}})
+async def read_settings(response: Response,
+                        if_none_match: Optional[str] = Header(None),
+                        db=Depends(async_db_session),
+                        read_db=Depends(async_read_db_session),
+                        user=Depends(get_current_user_async)):
+    s = await AsyncSettingsRepository(db, read_db).get(user["username"])
+    if not s:
+        raise HTTPException(404, "Settings not found")
+    out = SettingsOut(**s.__dict__)
+    etag = etag_for(out.model_dump())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers[ETAG_HEADER] = etag
+    return out
+
+@router.post("/", response_model=SettingsOut)
+async def write_settings(payload: SettingsIn, response: Response,
+                         db=Depends(async_db_session),
+                         user=Depends(get_current_user_async)):
+    gh = GreenhouseSettings(owner=user["username"], **payload.model_dump())
+    saved = await AsyncSettingsRepository(db).upsert(gh)
+    out = SettingsOut(**saved.__dict__)
+    response.headers[ETAG_HEADER] = etag_for(out.model_dump())
+    return out
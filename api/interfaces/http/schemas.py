@@ -1,6 +1,6 @@
 # interfaces/http/schemas.py
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import re
 
@@ -17,6 +17,11 @@ class SensorDataCreate(BaseModel):
     acc_x: int
     acc_y: int
     acc_z: int
+    # Optional idempotency key: a retried upload carrying the same
+    # (device_id, seq) is stored once. `seq` can be any per-device value
+    # that never repeats, e.g. a persisted counter or the client's unix time.
+    device_id: Optional[str] = Field(None, max_length=64)
+    seq: Optional[int] = Field(None, ge=0)
 
 
 class SensorDataRead(SensorDataCreate):
@@ -24,6 +29,50 @@ class SensorDataRead(SensorDataCreate):
     timestamp: datetime
 
 
+class FieldStatsOut(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+
+
+class SensorAggregateOut(BaseModel):
+    bucket: datetime
+    count: int
+    motion_count: int
+    stats: Dict[str, FieldStatsOut]
+
+
+class SensorAccepted(BaseModel):
+    status: str
+
+
+class SensorBatchError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class SensorBatchResult(BaseModel):
+    inserted: int
+    # Aligned with the request array; None for rows that were rejected.
+    ids: List[Optional[int]]
+    errors: List[SensorBatchError]
+    # Indexes of rows skipped because their (device_id, seq) already exists.
+    duplicates: List[int] = []
+
+
+# --- Alerts ---
+class AlertOut(BaseModel):
+    id: int
+    device_id: Optional[str] = None
+    metric: str
+    state: str
+    bound: str
+    value: Optional[float] = None
+    threshold: Optional[float] = None
+    reading_id: Optional[int] = None
+    timestamp: datetime
+
+
 # --- Settings ---
 class SettingsIn(BaseModel):
     name: str
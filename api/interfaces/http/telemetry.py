@@ -0,0 +1,137 @@
+# interfaces/http/telemetry.py
+"""
+Packed binary sensor readings for devices that cannot afford JSON.
+
+A body is one schema-version byte followed by N fixed-size little-endian
+records, with no padding and no separators:
+
+    version 1, 25 bytes per record (struct "<ffHHHhhhBI"):
+        float32  temp
+        float32  hum
+        uint16   soil
+        uint16   light
+        uint16   dist
+        int16    acc_x, acc_y, acc_z
+        uint8    flags      bit 0: motion
+                            bit 1: timestamp present (else server time)
+        uint32   timestamp  unix seconds, UTC; ignored unless bit 1 is set
+
+    version 2, idempotent uploads from one device:
+        uint8    device id length n (1..64), then n bytes of ASCII device id
+        N records of 29 bytes (struct "<ffHHHhhhBII"): the version 1 record
+        followed by a uint32 seq. A retried body is stored only once.
+
+New layouts get a new version byte; old ones stay decodable.
+"""
+import struct
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from domain.entities import SensorReading
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+FLAG_MOTION = 0x01
+FLAG_TIMESTAMP = 0x02
+
+# float32 carries ~7 significant digits; readings never have more than two
+# decimals, so round away the representation noise (23.3 -> 23.299999).
+_FLOAT_DECIMALS = 2
+
+
+def _timestamp(flags: int, ts: int):
+    if not flags & FLAG_TIMESTAMP:
+        return None
+    # aware, like the JSON path: Postgres would read a naive value for a
+    # timestamptz column in the session TimeZone, which need not be UTC
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+def _decode_v1(rec: tuple, device_id: Optional[str] = None) -> SensorReading:
+    temp, hum, soil, light, dist, acc_x, acc_y, acc_z, flags, ts = rec[:10]
+    return SensorReading(
+        timestamp=_timestamp(flags, ts),
+        temp=round(temp, _FLOAT_DECIMALS),
+        hum=round(hum, _FLOAT_DECIMALS),
+        soil=soil, light=light, dist=dist,
+        motion=bool(flags & FLAG_MOTION),
+        acc_x=acc_x, acc_y=acc_y, acc_z=acc_z,
+    )
+
+
+def _decode_v2(rec: tuple, device_id: Optional[str] = None) -> SensorReading:
+    reading = _decode_v1(rec)
+    reading.device_id = device_id
+    reading.seq = rec[10]
+    return reading
+
+
+def _no_header(body: memoryview) -> Tuple[Optional[str], memoryview]:
+    return None, body
+
+
+def _device_header(body: memoryview) -> Tuple[Optional[str], memoryview]:
+    n = body[0] if len(body) else 0
+    if not 1 <= n <= 64 or len(body) < 1 + n:
+        raise HTTPException(400, "Invalid device id header")
+    try:
+        device_id = bytes(body[1:1 + n]).decode("ascii")
+    except UnicodeDecodeError:
+        raise HTTPException(400, "Invalid device id header")
+    return device_id, body[1 + n:]
+
+
+_Decoder = Callable[[tuple, Optional[str]], SensorReading]
+_Header = Callable[[memoryview], Tuple[Optional[str], memoryview]]
+
+FORMATS: Dict[int, Tuple[_Header, struct.Struct, _Decoder]] = {
+    1: (_no_header, struct.Struct("<ffHHHhhhBI"), _decode_v1),
+    2: (_device_header, struct.Struct("<ffHHHhhhBII"), _decode_v2),
+}
+
+
+def decode_readings(body: bytes, max_records: int) -> List[SensorReading]:
+    if not body:
+        raise HTTPException(400, "Empty payload")
+    version = body[0]
+    if version not in FORMATS:
+        raise HTTPException(400, f"Unsupported telemetry version {version}")
+    header, layout, decode = FORMATS[version]
+
+    device_id, records = header(memoryview(body)[1:])
+    count, rest = divmod(len(records), layout.size)
+    if rest or not count:
+        raise HTTPException(
+            400, f"Version {version} payload must be a whole number of "
+                 f"{layout.size}-byte records"
+        )
+    if count > max_records:
+        raise HTTPException(413, f"Batch exceeds {max_records} rows")
+    return [decode(rec, device_id) for rec in layout.iter_unpack(records)]
+
+
+def encode_readings(readings: List[SensorReading], version: int = 1) -> bytes:
+    """
+    Inverse of `decode_readings`; used by tests and load tools. Version 2
+    takes the device id of the first reading for the whole body.
+    """
+    _, layout, _ = FORMATS[version]
+    out = bytearray([version])
+    if version == 2:
+        device_id = readings[0].device_id.encode("ascii")
+        out += bytes([len(device_id)]) + device_id
+    for r in readings:
+        flags = (FLAG_MOTION if r.motion else 0)
+        ts = 0
+        if r.timestamp is not None:
+            flags |= FLAG_TIMESTAMP
+            aware = r.timestamp if r.timestamp.tzinfo else r.timestamp.replace(tzinfo=timezone.utc)
+            ts = int(aware.timestamp())
+        fields = (r.temp, r.hum, r.soil, r.light, r.dist,
+                  r.acc_x, r.acc_y, r.acc_z, flags, ts)
+        if version == 2:
+            fields += (r.seq,)
+        out += layout.pack(*fields)
+    return bytes(out)
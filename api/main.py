@@ -1,11 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from db import engine, Base
+from db import engine, Base, DB_ASYNC
 from adapters.db import models      # noqa: F401  (ensures SQLAlchemy sees all your models)
-from interfaces.http.routers import auth, sensors, settings
+from adapters.db.partitions import partition_maintainer
+from adapters.ingest_queue import ingest_queue
+from interfaces.http.pagination import NEXT_CURSOR_HEADER
+from interfaces.http.responses import ETAG_HEADER
+from interfaces.http.routers import alerts, auth, sensors, settings
+from interfaces.http.routers import sensors_async, settings_async
+from metrics import metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ingest_queue.enabled:
+        ingest_queue.start()
+    partition_maintainer.start()
+    yield
+    partition_maintainer.stop()
+    if ingest_queue.enabled:
+        # flush whatever devices already got a 202 for
+        await run_in_threadpool(ingest_queue.stop)
 
-app = FastAPI(title="Greenhouse Cloud API")
+
+app = FastAPI(title="Greenhouse Cloud API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +35,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -20,11 +43,22 @@ app.add_middleware(
 #       Tests will create tables in SQLite entirely via `conftest.py`.
 # ─────────────────────────────────────────────────────────────────────────────
 
+if DB_ASYNC:
+    # registered first, so these shadow the sync routes with the same path;
+    # auth (bcrypt-bound) and the remaining sensor endpoints stay sync
+    app.include_router(sensors_async.router)
+    app.include_router(settings_async.router)
 app.include_router(auth.router)
 app.include_router(sensors.router)
 app.include_router(settings.router)
+app.include_router(alerts.router)
 
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+def read_metrics():
+    return metrics.snapshot()
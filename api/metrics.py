@@ -0,0 +1,43 @@
+import threading
+from typing import Callable, Dict
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry: monotonically increasing counters,
+    timing summaries (count/sum/max) and gauges computed on read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            s = self._summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["sum"] += value
+            s["max"] = max(s["max"], value)
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        self._gauges[name] = fn
+
+    def counter(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            data.update({k: dict(v) for k, v in self._summaries.items()})
+        for name, fn in list(self._gauges.items()):
+            data[name] = fn()
+        return data
+
+
+metrics = Metrics()
@@ -0,0 +1,34 @@
+"""
+Move raw sensor readings older than the retention window into the Parquet
+archive (SENSOR_ARCHIVE_DIR) and delete them from `sensor_data`.
+
+Run from the API root, e.g. nightly from cron:
+
+    python -m scripts.archive_sensor_data              # SENSOR_RETENTION_DAYS
+    python -m scripts.archive_sensor_data --days 180
+"""
+import argparse
+
+from db import SessionLocal
+from adapters.archive import SENSOR_RETENTION_DAYS, retention_cutoff
+from adapters.db.repositories import SensorRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=SENSOR_RETENTION_DAYS)
+    args = parser.parse_args()
+    if args.days <= 0:
+        parser.error("set SENSOR_RETENTION_DAYS or pass --days")
+
+    cutoff = retention_cutoff(days=args.days)
+    db = SessionLocal()
+    try:
+        moved = SensorRepository(db).archive_older_than(cutoff)
+        print(f"Archived {moved} readings older than {cutoff:%Y-%m-%d}.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
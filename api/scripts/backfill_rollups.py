@@ -0,0 +1,61 @@
+"""
+Rebuild the sensor rollup tables from the raw `sensor_data` rows.
+
+Rollup tables created before the per-field value counts (`<field>_count`)
+existed get those columns first, seeded from each bucket's row count where
+the field's sum is set; the rebuild then makes them exact for every day
+that is not archived.
+
+Run from the API root (so `db`, `adapters`, ... are importable):
+
+    python -m scripts.backfill_rollups                      # everything
+    python -m scripts.backfill_rollups --from 2024-01-01 --to 2024-02-01
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from db import SessionLocal, engine
+from adapters.db.repositories import ROLLUP_FIELDS, ROLLUP_LEVELS, SensorRepository
+
+
+def add_count_columns(bind) -> list:
+    added = []
+    inspector = inspect(bind)
+    for _, model in ROLLUP_LEVELS:
+        table = model.__table__
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for f in ROLLUP_FIELDS:
+            name = f"{f}_count"
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+                conn.execute(text(
+                    f"UPDATE {table.name} SET {name} = "
+                    f"CASE WHEN {f}_sum IS NULL THEN 0 ELSE count END"
+                ))
+            added.append(f"{table.name}.{name}")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--from", dest="from_time", type=datetime.fromisoformat)
+    parser.add_argument("--to", dest="to_time", type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    for column in add_count_columns(engine):
+        print(f"Added {column}.")
+    db = SessionLocal()
+    try:
+        written = SensorRepository(db).rebuild_rollups(args.from_time, args.to_time)
+        print(f"Rebuilt {written} rollup rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
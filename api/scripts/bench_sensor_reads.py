@@ -0,0 +1,81 @@
+"""
+Compare the legacy ORM -> dataclass -> pydantic -> json path for sensor
+list reads with the tuple -> dict -> orjson fast path used by the routers.
+
+Runs against an in-memory SQLite database, so numbers are relative only:
+
+    python -m scripts.bench_sensor_reads --rows 20000 --limit 1000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db import Base
+from adapters.db.models import SensorDB
+from adapters.db.repositories import SENSOR_COLUMNS, SensorRepository
+from domain.entities import SensorReading
+from interfaces.http.responses import json_dumps, rows_to_dicts
+from interfaces.http.schemas import SensorDataRead
+
+
+def _seed(db, rows: int):
+    start = datetime(2024, 1, 1)
+    SensorRepository(db).insert_many([
+        SensorReading(timestamp=start + timedelta(seconds=i), temp=20 + i % 7,
+                      hum=40.5, soil=300, light=400, dist=8, motion=i % 2 == 0,
+                      acc_x=1, acc_y=2, acc_z=3)
+        for i in range(rows)
+    ])
+
+
+def legacy(db, limit: int) -> bytes:
+    records = (db.query(SensorDB).order_by(SensorDB.timestamp, SensorDB.id)
+               .limit(limit).all())
+    readings = [
+        SensorReading(**{k: v for k, v in r.__dict__.items() if not k.startswith("_")})
+        for r in records
+    ]
+    body = [SensorDataRead(**r.__dict__) for r in readings]
+    return json.dumps(jsonable_encoder(body)).encode()
+
+
+def fast(db, limit: int) -> bytes:
+    rows = SensorRepository(db).fetch_rows(limit=limit)
+    return json_dumps(rows_to_dicts(SENSOR_COLUMNS, rows))
+
+
+def _bench(fn, db, limit: int, repeat: int) -> float:
+    fn(db, limit)  # warm up statement caches
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(db, limit)
+        db.expunge_all()
+    return limit * repeat / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db, args.rows)
+
+    for name, fn in (("legacy", legacy), ("fast", fast)):
+        rate = _bench(fn, db, args.limit, args.repeat)
+        print(f"{name:>6}: {rate:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
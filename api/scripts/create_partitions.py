@@ -0,0 +1,29 @@
+"""
+Create the current and upcoming `sensor_data` partitions (Postgres with
+SENSOR_PARTITION_INTERVAL set). The API does this itself while running;
+use this after a schema reset or from cron when no API worker is up.
+
+Run from the API root:
+
+    python -m scripts.create_partitions --ahead 6
+"""
+import argparse
+
+from db import SENSOR_PARTITIONED
+from adapters.db.partitions import SENSOR_PARTITIONS_AHEAD, ensure_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ahead", type=int, default=SENSOR_PARTITIONS_AHEAD)
+    args = parser.parse_args()
+
+    if not SENSOR_PARTITIONED:
+        print("sensor_data is not partitioned (needs Postgres and SENSOR_PARTITION_INTERVAL).")
+        return
+    for name in ensure_partitions(ahead=args.ahead):
+        print(f"Partition {name} ready.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Bring a `revoked_tokens` table created before tokens' expiry was recorded
+up to date: add the `expires_at` column and the expires_at / revoked_at
+indexes if missing, then backfill expires_at for the existing rows.
+Until then those rows are treated as never expiring and are never pruned.
+Safe to run more than once.
+
+Run from the API root:
+
+    python -m scripts.migrate_revoked_tokens
+"""
+from sqlalchemy import inspect, text
+
+from db import SessionLocal, engine
+from adapters.db.models import RevokedTokenDB
+from adapters.db.repositories import TokenBlacklistRepository
+
+
+def add_missing_schema(bind) -> list:
+    table = RevokedTokenDB.__table__
+    changed = []
+    inspector = inspect(bind)
+    if "expires_at" not in {c["name"] for c in inspector.get_columns(table.name)}:
+        column_type = table.c.expires_at.type.compile(dialect=bind.dialect)
+        with bind.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN expires_at {column_type}"))
+        changed.append("column expires_at")
+    existing = {i["name"] for i in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(bind, checkfirst=True)
+            changed.append(f"index {index.name}")
+    return changed
+
+
+def main():
+    for change in add_missing_schema(engine):
+        print(f"Added {change}.")
+    db = SessionLocal()
+    try:
+        filled = TokenBlacklistRepository(db).backfill_expiry()
+        print(f"Backfilled expires_at on {filled} revoked tokens.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Delete revoked-token rows whose JWT has expired (a token past its `exp` is
+rejected on signature validation anyway, so the row is dead weight).
+
+Run from the API root, e.g. from cron every hour:
+
+    python -m scripts.prune_revoked_tokens
+"""
+from db import SessionLocal
+from adapters.db.repositories import TokenBlacklistRepository
+
+
+def main():
+    db = SessionLocal()
+    try:
+        deleted = TokenBlacklistRepository(db).prune_expired()
+        print(f"Pruned {deleted} expired revoked tokens.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
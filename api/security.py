@@ -1,23 +1,57 @@
+import hashlib
 import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import jwt
 from dotenv import load_dotenv
 
+from metrics import metrics
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "changeme")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# bcrypt runs on its own small pool so a login burst cannot occupy every
+# request thread; at most HASH_QUEUE_LIMIT calls may wait for a worker.
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "8"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
+
+class HashingBusy(Exception):
+    """The password hashing pool and its queue are full; retry later."""
+
+
+def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        metrics.inc("password_hash_rejected")
+        raise HashingBusy()
+    try:
+        return _hash_pool.submit(fn, *args).result()
+    finally:
+        _hash_slots.release()
+
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _run_hashing(pwd_context.verify, plain, hashed)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _run_hashing(pwd_context.hash, password)
+
+def password_stamp(password_hash: str) -> str:
+    """Short, non-reversible fingerprint of a password hash (changes with it)."""
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
 
 def create_access_token(data: dict, expires_delta: timedelta) -> str:
     to_encode = data.copy()
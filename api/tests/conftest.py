@@ -9,7 +9,12 @@ from fastapi.testclient import TestClient
 
 from db import Base
 from main import app
+from adapters.cache import (
+    failed_login_cache, principal_cache, revocation_cache, settings_cache
+)
 from adapters.db.repositories import UserRepository
+from adapters.alerts import alert_engine
+from adapters.live import latest_readings
 
 # Import the dependency functions from their actual locations:
 from interfaces.http import deps
@@ -46,6 +51,20 @@ def db_session(_engine):
         connection.close()
 
 
+# ---------------------------------------------------------------------------
+# Process-local caches outlive the per-test rollback, so start each test cold.
+# ---------------------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def _reset_caches():
+    revocation_cache.clear()
+    principal_cache.clear()
+    failed_login_cache.clear()
+    settings_cache.clear()
+    latest_readings.clear()
+    alert_engine.clear()
+    yield
+
+
 # ---------------------------------------------------------------------------
 # 2) Build a TestClient(app) and override EVERY db_session dependency to use SQLite.
 # ---------------------------------------------------------------------------
@@ -60,6 +79,7 @@ def client(db_session):
 
     # --- Override the dependency in deps.py directly ---
     app.dependency_overrides[deps.db_session] = _test_db
+    app.dependency_overrides[deps.read_db_session] = _test_db
 
     # --- Override the copy of db_session that each router imported at import‐time ---
     app.dependency_overrides[auth_router.db_session] = _test_db
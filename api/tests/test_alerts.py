@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from adapters.alerts import AlertEngine, alert_engine
+from adapters.db.repositories import AlertRepository, SensorRepository, SettingsRepository
+from domain.entities import GreenhouseSettings, SensorReading
+
+SETTINGS = GreenhouseSettings(owner="admin", temp_min=18, temp_max=28, light_min=0,
+                              light_max=1000, hum_min=0, hum_max=100, soil_min=0)
+T0 = datetime(2024, 1, 1)
+
+
+def _readings(temps, device_id="gh-1", start=0):
+    return [
+        SensorReading(id=start + i, timestamp=T0 + timedelta(seconds=start + i),
+                      temp=t, hum=50, soil=300, light=500, device_id=device_id)
+        for i, t in enumerate(temps)
+    ]
+
+
+def _login(client):
+    res = client.post("/auth/token", json={"username": "admin", "password": "secret"})
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def test_engine_debounces_and_applies_hysteresis():
+    engine = AlertEngine(debounce=3)
+    evaluate = lambda temps, start: engine.evaluate(
+        "admin", _readings(temps, start=start), SETTINGS, lambda: [])
+
+    # two samples above the bound are noise, the third in a row raises once
+    assert evaluate([29, 29, 20, 29, 29, 30, 31, 32], 0)[0].state == "raised"
+    assert evaluate([29, 30], 10) == []
+    # back under 28 but not under 28 - 0.5: still open
+    assert evaluate([27.8, 27.9, 27.6], 20) == []
+    events = evaluate([27, 27, 26], 30)
+    assert [(e.state, e.bound, e.value, e.threshold) for e in events] == [
+        ("cleared", "max", 26.0, 28),
+    ]
+    assert evaluate([20] * 5, 40) == []
+
+
+def test_ingest_stores_only_transitions(client, admin_user, db_session):
+    headers = _login(client)
+    config = {"name": "GH", "temp_min": 18, "temp_max": 28, "light_min": 0,
+              "light_max": 1000, "hum_min": 0, "hum_max": 100, "soil_min": 0}
+    assert client.post("/settings/", json=config, headers=headers).status_code == 200
+
+    temps = [20, 29, 30, 31, 32, 33, 20, 20, 20, 10, 10, 10]
+    batch = [
+        {"timestamp": (T0 + timedelta(minutes=i)).isoformat(), "temp": t, "hum": 50,
+         "soil": 300, "light": 500, "dist": 0, "motion": False,
+         "acc_x": 0, "acc_y": 0, "acc_z": 0, "device_id": "gh-1"}
+        for i, t in enumerate(temps)
+    ]
+    assert client.post("/sensors/batch", json=batch, headers=headers).status_code == 201
+
+    res = client.get("/alerts/", headers=headers)
+    assert res.status_code == 200
+    assert [(a["state"], a["bound"], a["value"]) for a in res.json()] == [
+        ("raised", "min", 10.0), ("cleared", "max", 20.0), ("raised", "max", 31.0),
+    ]
+    res = client.get("/alerts/", params={"state": "cleared", "device_id": "gh-1"},
+                     headers=headers)
+    assert [a["bound"] for a in res.json()] == ["max"]
+    assert client.get("/alerts/", params={"device_id": "other"}, headers=headers).json() == []
+    assert client.get("/alerts/", params={"metric": "co2"}, headers=headers).status_code == 422
+
+    open_ = client.get("/alerts/open", headers=headers).json()
+    assert [(a["metric"], a["bound"]) for a in open_] == [("temp", "min")]
+
+
+def test_engine_state_is_reseeded_from_open_alerts(db_session):
+    repo = SensorRepository(db_session)
+    SettingsRepository(db_session).upsert(SETTINGS)
+
+    repo.insert_many(_readings([10, 10, 10]), owner="admin")
+    assert len(AlertRepository(db_session).fetch("admin")) == 1
+
+    alert_engine.clear()    # e.g. a worker restart
+    repo.insert_many(_readings([10, 10, 10], start=10), owner="admin")
+    alerts = AlertRepository(db_session).fetch("admin")
+    assert [(a.state, a.bound) for a in alerts] == [("raised", "min")]
+
+
+def test_engine_loads_open_alerts_outside_its_lock():
+    engine = AlertEngine(debounce=1)
+    calls = []
+
+    def load_open():
+        calls.append(engine._lock.locked())
+        return []
+
+    engine.evaluate("admin", _readings([10]), SETTINGS, load_open)
+    engine.evaluate("admin", _readings([10], start=1), SETTINGS, load_open)
+    assert calls == [False]    # seeded once, without holding the lock
@@ -1,3 +1,18 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from adapters.db.repositories import SensorRepository
+from adapters.live import latest_readings
+from domain.entities import SensorReading
+from interfaces.http import responses
+from interfaces.http.schemas import SensorDataRead
+from interfaces.http.telemetry import decode_readings, encode_readings
+
+
 def _login(client):
     res = client.post("/auth/token", json={"username": "admin", "password": "secret"})
     assert res.status_code == 200
@@ -7,6 +22,20 @@ def _login(client):
 # ---------------------------------------------------------------------------
 # Misc
 # ---------------------------------------------------------------------------
+def test_json_encoding_matches_pydantic(monkeypatch):
+    # FastJSONResponse routes must agree with the response_model routes
+    for ts in (datetime(2024, 1, 1, 12, 0, 30, 250, tzinfo=timezone.utc),
+               datetime(2024, 1, 1, 12, 0)):
+        row = SensorDataRead(id=1, timestamp=ts, temp=21.5, hum=40.25, soil=300, light=500,
+                             dist=10, motion=True, acc_x=0, acc_y=0, acc_z=1,
+                             device_id="gh-1")
+        expected = row.model_dump_json().encode()
+        assert responses.json_dumps(row.model_dump()) == expected
+        with monkeypatch.context() as m:
+            m.setattr(responses, "orjson", None)
+            assert responses.json_dumps(row.model_dump()) == expected
+
+
 def test_health_endpoint(client):
     res = client.get("/health")
     assert res.status_code == 200
@@ -30,6 +59,33 @@ def test_login_and_logout_flow(client, admin_user):
     assert res.status_code == 401
 
 
+def test_authenticated_post_makes_no_reads(client, admin_user, db_session):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {
+        "temp": 20, "hum": 50, "soil": 300, "light": 400, "dist": 12,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+    # first request warms the revocation and principal caches
+    assert client.post("/sensors/", json=payload, headers=headers).status_code == 201
+
+    selects = []
+
+    def _record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    conn = db_session.get_bind()
+    event.listen(conn, "before_cursor_execute", _record)
+    try:
+        assert client.post("/sensors/", json=payload, headers=headers).status_code == 201
+    finally:
+        event.remove(conn, "before_cursor_execute", _record)
+    assert selects == []
+
+    assert client.get("/metrics").json()["principal_cache_hits"] >= 1
+
+
 # ---------------------------------------------------------------------------
 # Sensors
 # ---------------------------------------------------------------------------
@@ -57,7 +113,126 @@ def test_sensor_crud(client, admin_user):
     # list
     res = client.get("/sensors/", headers=headers)
     assert res.status_code == 200
-    assert len(res.json()) == 1
+    assert res.json() == [sensor]
+
+
+def test_sensor_batch_partial_failure(client, admin_user):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    good = {
+        "temp": 21.0,
+        "hum": 50,
+        "soil": 300,
+        "light": 400,
+        "dist": 12,
+        "motion": True,
+        "acc_x": 0,
+        "acc_y": 0,
+        "acc_z": 0,
+    }
+    bad = {**good, "temp": "hot"}
+
+    res = client.post("/sensors/batch", json=[good, bad, good], headers=headers)
+    assert res.status_code == 201
+    body = res.json()
+    assert body["inserted"] == 2
+    assert body["ids"][1] is None
+    assert body["ids"][0] is not None and body["ids"][2] is not None
+    assert [e["index"] for e in body["errors"]] == [1]
+
+    # a batch with no valid rows is rejected as a whole
+    res = client.post("/sensors/batch", json=[bad], headers=headers)
+    assert res.status_code == 422
+
+
+def test_sensor_cursor_pagination(client, admin_user):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    base = {
+        "temp": 20, "hum": 50, "soil": 300, "light": 400, "dist": 12,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+    # duplicate timestamps must still page deterministically via the id
+    stamps = ["2024-01-01T10:00:00"] * 3 + ["2024-01-01T09:00:00"] * 2
+    rows = [{**base, "timestamp": ts} for ts in stamps]
+    client.post("/sensors/batch", json=rows, headers=headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = client.get("/sensors/", params=params, headers=headers)
+        assert res.status_code == 200
+        seen += [r["id"] for r in res.json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 5
+
+    res = client.get("/sensors/", params={"cursor": "!!"}, headers=headers)
+    assert res.status_code == 400
+
+
+def test_sensor_export_streams_ndjson_and_csv(client, admin_user):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    base = {
+        "hum": 50, "soil": 300, "light": 400, "dist": 12,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+    rows = [
+        {**base, "timestamp": f"2024-01-01T10:0{i}:00", "temp": 20 + i}
+        for i in range(3)
+    ]
+    client.post("/sensors/batch", json=rows, headers=headers)
+    params = {"from": "2024-01-01T00:00:00", "to": "2024-01-02T00:00:00"}
+
+    res = client.get("/sensors/export", params=params, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [line["temp"] for line in lines] == [20, 21, 22]
+
+    res = client.get("/sensors/export", params={**params, "format": "csv"},
+                     headers=headers)
+    assert res.status_code == 200
+    table = list(csv.reader(io.StringIO(res.text)))
+    assert table[0][:3] == ["id", "timestamp", "temp"]
+    assert len(table) == 4
+
+
+def test_sensor_aggregate_endpoint(client, admin_user):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    base = {
+        "hum": 50, "soil": 300, "light": 400, "dist": 12,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+    rows = [
+        {**base, "timestamp": "2024-01-01T10:10:00", "temp": 20},
+        {**base, "timestamp": "2024-01-01T10:50:00", "temp": 22},
+        {**base, "timestamp": "2024-01-01T11:20:00", "temp": 30},
+    ]
+    assert client.post("/sensors/batch", json=rows, headers=headers).status_code == 201
+
+    params = {
+        "from": "2024-01-01T00:00:00",
+        "to": "2024-01-02T00:00:00",
+        "bucket": "1h",
+        "fields": "temp",
+    }
+    res = client.get("/sensors/aggregate", params=params, headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert [b["count"] for b in body] == [2, 1]
+    assert body[0]["stats"]["temp"] == {"min": 20, "max": 22, "avg": 21}
+
+    res = client.get("/sensors/aggregate",
+                     params={**params, "bucket": "5x"}, headers=headers)
+    assert res.status_code == 422
 
 
 # ---------------------------------------------------------------------------
@@ -88,3 +263,117 @@ def test_settings_read_write(client, admin_user):
     get = client.get("/settings/", headers=headers)
     assert get.status_code == 200
     assert get.json()["name"] == "Main GH"
+
+
+def test_settings_etag_and_cache(client, admin_user, db_session):
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    config = {
+        "name": "GH", "temp_min": 18, "temp_max": 28, "light_min": 300,
+        "light_max": 700, "hum_min": 40, "hum_max": 60, "soil_min": 200,
+    }
+    etag = client.post("/settings/", json=config, headers=headers).headers["ETag"]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        first = client.get("/settings/", headers=headers)
+        unchanged = client.get("/settings/", headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert first.headers["ETag"] == etag
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    # served from the write-through cache
+    assert not [s for s in statements if "FROM settings" in s]
+
+    client.post("/settings/", json={**config, "temp_max": 30}, headers=headers)
+    changed = client.get("/settings/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["temp_max"] == 30
+    assert changed.headers["ETag"] != etag
+
+
+def test_sensor_binary_ingest(client, admin_user):
+    headers = {
+        "Authorization": f"Bearer {_login(client)}",
+        "Content-Type": "application/octet-stream",
+    }
+    readings = [
+        SensorReading(timestamp=datetime(2024, 5, 1, 12), temp=23.3, hum=55.1,
+                      soil=250, light=40000, dist=10, motion=True,
+                      acc_x=-5, acc_y=0, acc_z=256),
+        SensorReading(temp=19.5, hum=60, soil=300, light=0, dist=3,
+                      motion=False, acc_x=0, acc_y=0, acc_z=0),
+    ]
+    body = encode_readings(readings)
+    assert len(body) == 1 + 2 * 25
+    decoded = decode_readings(body, max_records=10)
+    assert decoded[0].timestamp == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+    res = client.post("/sensors/binary", content=body, headers=headers)
+    assert res.status_code == 201
+    assert res.json()["inserted"] == 2
+
+    rows = client.get("/sensors/", headers=headers).json()
+    first = next(r for r in rows if r["light"] == 40000)
+    assert first["timestamp"].startswith("2024-05-01T12:00:00")
+    assert (first["temp"], first["hum"], first["motion"], first["acc_x"]) == (23.3, 55.1, True, -5)
+
+    assert client.post("/sensors/binary", content=body[:-1], headers=headers).status_code == 400
+    assert client.post("/sensors/binary", content=b"\x09" + body[1:], headers=headers).status_code == 400
+
+
+def test_sensor_post_is_idempotent_per_device_seq(client, admin_user):
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    payload = {
+        "temp": 21.0, "hum": 50, "soil": 300, "light": 400, "dist": 7,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+        "device_id": "gh-1", "seq": 42,
+    }
+    created = client.post("/sensors/", json=payload, headers=headers)
+    retried = client.post("/sensors/", json=payload, headers=headers)
+    assert (created.status_code, retried.status_code) == (201, 200)
+    assert retried.json() == created.json()
+
+    readings = [SensorReading(temp=20, device_id="gh-1", seq=s) for s in (42, 43)]
+    binary = {**headers, "Content-Type": "application/octet-stream"}
+    res = client.post("/sensors/binary", content=encode_readings(readings, version=2),
+                      headers=binary)
+    assert res.status_code == 201
+    assert res.json()["inserted"] == 1
+    assert res.json()["duplicates"] == [0]
+    assert len(client.get("/sensors/", headers=headers).json()) == 2
+
+
+def test_sensor_latest_is_served_from_memory(client, admin_user, db_session):
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.get("/sensors/latest", headers=headers).status_code == 404
+
+    repo = SensorRepository(db_session)
+    repo.insert_many([
+        SensorReading(timestamp=datetime(2024, 1, 1, 12), temp=20, device_id="gh-1"),
+        SensorReading(timestamp=datetime(2024, 1, 1, 13), temp=21, device_id="gh-2"),
+    ])
+    latest_readings.clear()   # cold start: falls back to the database
+    assert client.get("/sensors/latest", headers=headers).json()["temp"] == 21
+    assert client.get("/sensors/latest?device_id=gh-1", headers=headers).json()["temp"] == 20
+
+    payload = {
+        "timestamp": "2024-01-01T14:00:00", "temp": 22.0, "hum": 50, "soil": 300,
+        "light": 400, "dist": 7, "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+        "device_id": "gh-1",
+    }
+    client.post("/sensors/", json=payload, headers=headers)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        overall = client.get("/sensors/latest", headers=headers).json()
+        gh1 = client.get("/sensors/latest?device_id=gh-1", headers=headers).json()
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert overall["temp"] == gh1["temp"] == 22.0
+    assert statements == []
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from db import Base
+from adapters.db.repositories import UserRepository
+from interfaces.http import deps
+from interfaces.http.routers import sensors_async, settings_async
+from security import create_access_token
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with Session() as db:
+        await db.run_sync(lambda s: UserRepository(s).upsert_admin("admin", "secret"))
+
+    async def _test_db():
+        async with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(sensors_async.router)
+    app.include_router(settings_async.router)
+    app.dependency_overrides[deps.async_db_session] = _test_db
+    app.dependency_overrides[deps.async_read_db_session] = _test_db
+
+    token = create_access_token({"sub": "admin"}, timedelta(minutes=5))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        yield client
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sensor_and_settings_routes(async_client):
+    payload = {
+        "temp": 22.0, "hum": 45, "soil": 310, "light": 420, "dist": 9,
+        "motion": True, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+    created = await async_client.post("/sensors/", json=payload)
+    assert created.status_code == 201
+    assert created.json()["id"] is not None
+
+    res = await async_client.get("/sensors/")
+    assert res.status_code == 200
+    assert [r["temp"] for r in res.json()] == [22.0]
+
+    assert (await async_client.get("/settings/")).status_code == 404
+    config = {
+        "name": "GH", "temp_min": 18, "temp_max": 28, "light_min": 300,
+        "light_max": 700, "hum_min": 40, "hum_max": 60, "soil_min": 200,
+    }
+    assert (await async_client.post("/settings/", json=config)).status_code == 200
+    assert (await async_client.get("/settings/")).json()["name"] == "GH"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_auth_with_revocation_sync_due(tmp_path):
+    # the first revocation sync runs while other requests are authenticating
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        await db.run_sync(lambda s: UserRepository(s).upsert_admin("admin", "secret"))
+    token = create_access_token({"sub": "admin"}, timedelta(minutes=5))
+
+    async def authenticate():
+        async with Session() as db:
+            return await deps.get_current_user_async(token, db)
+
+    users = await asyncio.wait_for(
+        asyncio.gather(*(authenticate() for _ in range(10))), timeout=10
+    )
+    assert {u["username"] for u in users} == {"admin"}
+    await engine.dispose()
@@ -1,5 +1,10 @@
+import pytest
+
+import security
+from adapters import cache
 from adapters.db.repositories import UserRepository, TokenBlacklistRepository
-from use_cases.auth_service import AuthService
+from use_cases import auth_service
+from use_cases.auth_service import AuthService, TooManyAttempts
 
 
 def test_authenticate_and_change_password(db_session):
@@ -18,3 +23,60 @@ def test_authenticate_and_change_password(db_session):
     auth.change_password("admin", "newsecret")
     assert auth.authenticate("admin", "secret") is None
     assert auth.authenticate("admin", "newsecret") is not None
+
+
+def test_failed_attempts_skip_bcrypt_and_throttle(db_session, monkeypatch):
+    user_repo = UserRepository(db_session)
+    auth = AuthService(user_repo, TokenBlacklistRepository(db_session))
+    user_repo.upsert_admin("admin", "secret")
+
+    calls = []
+
+    def counting_verify(plain, hashed):
+        calls.append(plain)
+        return security.verify_password(plain, hashed)
+
+    monkeypatch.setattr(auth_service, "verify_password", counting_verify)
+    monkeypatch.setattr(auth_service, "AUTH_MAX_FAILURES", 3)
+
+    assert auth.authenticate("admin", "wrong") is None
+    assert auth.authenticate("admin", "wrong") is None
+    assert calls == ["wrong"]
+
+    assert auth.authenticate("admin", "wrong2") is None
+    assert auth.authenticate("admin", "wrong3") is None
+    with pytest.raises(TooManyAttempts):
+        auth.authenticate("admin", "secret")
+
+    # a password change forgets the failures
+    auth.change_password("admin", "wrong")
+    assert auth.authenticate("admin", "wrong") is not None
+
+
+def test_failure_window_is_fixed_and_per_client(db_session, monkeypatch):
+    user_repo = UserRepository(db_session)
+    auth = AuthService(user_repo, TokenBlacklistRepository(db_session))
+    user_repo.upsert_admin("admin", "secret")
+    monkeypatch.setattr(auth_service, "AUTH_MAX_FAILURES", 2)
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+
+    assert auth.authenticate("admin", "wrong1", "10.0.0.1") is None
+    # a later failure does not restart the window of the first one
+    now[0] += cache.AUTH_FAILURE_TTL - 1
+    assert auth.authenticate("admin", "wrong2", "10.0.0.1") is None
+    with pytest.raises(TooManyAttempts) as refused:
+        auth.authenticate("admin", "secret", "10.0.0.1")
+    assert refused.value.retry_after == 1      # what is left of the window
+    # another client is not locked out by the first one
+    assert auth.authenticate("admin", "secret", "10.0.0.2") is not None
+
+    now[0] += 2
+    assert auth.authenticate("admin", "secret", "10.0.0.1") is not None
+
+
+def test_hashing_pool_rejects_when_saturated(monkeypatch):
+    monkeypatch.setattr(security, "_hash_slots", security.threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+    with pytest.raises(security.HashingBusy):
+        security.get_password_hash("secret")
@@ -0,0 +1,71 @@
+from datetime import date
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import db
+from db import Base, async_database_url
+from adapters.db.partitions import (
+    partition_ddl, partition_with_default_rows_ddl, planned_partitions
+)
+from adapters.db.repositories import SensorRepository, SettingsRepository
+from domain.entities import SensorReading, GreenhouseSettings
+from metrics import metrics
+
+
+def test_reads_are_routed_to_the_replica_session(db_session):
+    replica_engine = create_engine("sqlite://")
+    Base.metadata.create_all(replica_engine)
+    replica = sessionmaker(bind=replica_engine)()
+    try:
+        repo = SensorRepository(db_session, replica)
+        repo.insert(SensorReading(temp=21))
+        # the (empty) replica answers the read, the primary took the write
+        assert repo.fetch_all() == []
+        assert len(SensorRepository(db_session).fetch_all()) == 1
+
+        settings = SettingsRepository(db_session, replica)
+        settings.upsert(GreenhouseSettings(owner="bob", name="GH"))
+        assert SettingsRepository(db_session).get("bob") is not None
+    finally:
+        replica.close()
+        replica_engine.dispose()
+
+
+def test_pool_checkout_wait_is_recorded():
+    eng = create_engine("sqlite://", poolclass=db._timed_pool("probe"), pool_size=1)
+    with eng.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    eng.dispose()
+    assert metrics.snapshot()["db_pool_probe_checkout_wait_seconds"]["count"] >= 1
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert (async_database_url("postgresql://u:p@h/db")
+            == "postgresql+asyncpg://u:p@h/db")
+
+
+def test_partition_plan_and_ddl():
+    plan = planned_partitions(date(2024, 1, 31), "month", ahead=2)
+    assert plan == [
+        (date(2024, 1, 1), date(2024, 2, 1)),
+        (date(2024, 2, 1), date(2024, 3, 1)),
+        (date(2024, 3, 1), date(2024, 4, 1)),
+    ]
+    assert planned_partitions(date(2024, 1, 3), "week", 0) == [
+        (date(2024, 1, 1), date(2024, 1, 8))
+    ]
+
+    ddl = partition_ddl(date(2024, 1, 1), date(2024, 1, 2), device_partitions=2)
+    assert ddl[0].startswith("CREATE TABLE IF NOT EXISTS sensor_data_p20240101 PARTITION OF sensor_data")
+    assert ddl[0].endswith("PARTITION BY HASH (device_id)")
+    assert "MODULUS 2, REMAINDER 1" in ddl[2]
+
+    # rows already caught by the DEFAULT partition are moved into the new one
+    ddl = partition_with_default_rows_ddl(date(2024, 1, 1), date(2024, 1, 2))
+    assert ddl[0] == "ALTER TABLE sensor_data DETACH PARTITION sensor_data_default"
+    assert ddl[1].startswith("CREATE TABLE IF NOT EXISTS sensor_data_p20240101")
+    assert ddl[2].startswith("INSERT INTO sensor_data SELECT * FROM sensor_data_default WHERE")
+    assert ddl[3].startswith("DELETE FROM sensor_data_default WHERE")
+    assert ddl[-1] == "ALTER TABLE sensor_data ATTACH PARTITION sensor_data_default DEFAULT"
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from adapters.db.repositories import SensorRepository
+from adapters.ingest_queue import IngestQueue
+from domain.entities import SensorReading
+from interfaces.http.routers import sensors as sensors_router
+
+
+def _queue(db_session, **kw):
+    # share the test connection so the worker sees the rolled-back schema
+    conn = db_session.get_bind()
+    return IngestQueue(session_factory=lambda: Session(bind=conn), **kw)
+
+
+def test_queue_backpressure_and_flush(db_session):
+    q = _queue(db_session, maxsize=2, batch_size=10, enabled=True)
+    assert q.submit(SensorReading(temp=1))
+    assert q.submit(SensorReading(temp=2))
+    assert q.submit(SensorReading(temp=3)) is False
+
+    assert q.flush() == 2
+    assert q.qsize() == 0
+    assert [r.temp for r in SensorRepository(db_session).fetch_all()] == [1, 2]
+
+
+def test_queued_readings_are_stamped_on_arrival(db_session):
+    q = _queue(db_session, enabled=True)
+    before = datetime.now(timezone.utc)
+    # as the routes build it from a payload without a timestamp
+    assert q.submit(SensorReading(temp=1, timestamp=None))
+    after = datetime.now(timezone.utc)
+    _, queued = q._queue.queue[0]
+    assert before <= queued.timestamp <= after
+
+    q.flush()
+    (stored,) = SensorRepository(db_session).fetch_all()
+    assert stored.timestamp == queued.timestamp.replace(tzinfo=None)
+
+
+def test_worker_writes_time_triggered_batches(db_session):
+    q = _queue(db_session, batch_size=100, flush_interval=0.05, enabled=True)
+    q.start()
+    for i in range(5):
+        q.submit(SensorReading(temp=i))
+    q.stop(timeout=2)
+    assert len(SensorRepository(db_session).fetch_all()) == 5
+
+
+def test_post_returns_202_in_queue_mode(client, admin_user, db_session, monkeypatch):
+    q = _queue(db_session, maxsize=1, enabled=True)
+    monkeypatch.setattr(sensors_router, "ingest_queue", q)
+
+    token = client.post(
+        "/auth/token", json={"username": "admin", "password": "secret"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {
+        "temp": 20.5, "hum": 40, "soil": 300, "light": 200, "dist": 5,
+        "motion": False, "acc_x": 0, "acc_y": 0, "acc_z": 0,
+    }
+
+    res = client.post("/sensors/", json=payload, headers=headers)
+    assert res.status_code == 202
+    assert res.json() == {"status": "queued"}
+
+    res = client.post("/sensors/", json=payload, headers=headers)
+    assert res.status_code == 429
+
+    q.flush()
+    assert len(SensorRepository(db_session).fetch_all()) == 1
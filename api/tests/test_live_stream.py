@@ -0,0 +1,78 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from adapters.db.repositories import SensorRepository
+from adapters.live import SensorHub, SensorHubFull, sensor_hub
+from domain.entities import SensorReading
+from interfaces.http.routers import sensors as sensors_router
+
+
+def _reading(i, device="gh-1"):
+    return SensorReading(id=i, timestamp=datetime(2024, 1, 1) + timedelta(seconds=i),
+                         temp=i, device_id=device)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_latest_value_per_device():
+    hub = SensorHub()
+    with hub.subscribe() as sub, hub.subscribe(device_id="gh-2") as only_gh2:
+        publisher = threading.Thread(target=lambda: [
+            hub.publish([_reading(i), _reading(100 + i, "gh-2")]) for i in range(50)
+        ])
+        publisher.start()
+        publisher.join()
+
+        latest = await sub.next(timeout=1)
+        assert [(r.device_id, r.temp) for r in latest] == [("gh-1", 49), ("gh-2", 149)]
+        assert [r.temp for r in await only_gh2.next(timeout=1)] == [149]
+        assert await sub.next(timeout=0.01) == []
+
+
+@pytest.mark.asyncio
+async def test_stored_readings_reach_the_stream(db_session, monkeypatch):
+    monkeypatch.setattr(sensors_router, "STREAM_INTERVAL", 0)
+
+    class _Request:
+        calls = 0
+
+        async def is_disconnected(self):
+            self.calls += 1
+            return self.calls > 1
+
+    events = sensors_router._sse_events(_Request(), sensor_hub.subscribe())
+    assert await events.__anext__() == b"retry: 5000\n\n"
+    SensorRepository(db_session).insert(SensorReading(temp=21.5, device_id="gh-1"))
+    event = await events.__anext__()
+    assert event.startswith(b"event: reading\nid: ")
+    assert b'"temp":21.5' in event
+    await events.aclose()
+    assert not sensor_hub._subscribers
+
+
+@pytest.mark.asyncio
+async def test_hub_reserves_slots_atomically():
+    hub = SensorHub(max_subscribers=2)
+    first, second = hub.subscribe(), hub.subscribe()
+    with pytest.raises(SensorHubFull):
+        hub.subscribe()
+    first.close()
+    first.close()
+    with hub.subscribe():
+        assert len(hub._subscribers) == 2
+    second.close()
+    assert not hub._subscribers
+
+
+def test_stream_is_refused_when_the_hub_is_full(client, admin_user, monkeypatch):
+    monkeypatch.setattr(sensor_hub, "max_subscribers", 0)
+    res = client.post("/auth/token", json={"username": "admin", "password": "secret"})
+    token = res.json()["access_token"]
+    res = client.get(f"/sensors/stream?access_token={token}")
+    assert res.status_code == 503 and res.headers["retry-after"] == "5"
+
+
+def test_stream_requires_a_token(client):
+    assert client.get("/sensors/stream").status_code == 401
+    assert client.get("/sensors/stream?access_token=nope").status_code == 401
@@ -1,11 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from adapters.db import repositories
 from adapters.db.repositories import (
     SensorRepository,
     SettingsRepository,
     TokenBlacklistRepository,
 )
+from adapters.archive import COLUMN_NAMES, SensorArchive, sensor_archive
+from adapters.cache import RevocationCache
+from adapters.db.models import RevokedTokenDB, SensorDB, SensorRollupHourDB
+from db import Base
 from domain.entities import SensorReading, GreenhouseSettings
+from scripts import migrate_revoked_tokens
 
 
 def test_sensor_insert_and_fetch(db_session):
@@ -65,6 +74,272 @@ def test_sensor_fetch_by_time(db_session):
     assert [r.temp for r in rows] == [21]
 
 
+def test_keyset_pages_over_readings_of_one_second(db_session):
+    repo = SensorRepository(db_session)
+    repo.insert_many([SensorReading(temp=i, timestamp=None) for i in range(5)])
+    seen, after = [], None
+    while True:
+        page = repo.fetch_page(limit=2, after=after)
+        if not page:
+            break
+        seen += [r.temp for r in page]
+        after = (page[-1].timestamp, page[-1].id)
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_sensor_insert_many_keeps_input_order(db_session):
+    repo = SensorRepository(db_session)
+    ts = datetime(2024, 1, 1, 12, 0)
+    saved = repo.insert_many(
+        [
+            SensorReading(timestamp=None, temp=1),
+            SensorReading(timestamp=ts, temp=2),
+            SensorReading(timestamp=None, temp=3),
+        ]
+    )
+    assert [r.temp for r in saved] == [1, 2, 3]
+    assert len({r.id for r in saved}) == 3
+    assert saved[1].timestamp == ts
+    assert saved[0].timestamp is not None
+    assert len(repo.fetch_all()) == 3
+
+
+def test_sensor_insert_many_skips_duplicate_keys(db_session):
+    repo = SensorRepository(db_session)
+    ts = datetime(2024, 1, 1, 12, 0)
+    first = repo.insert(SensorReading(timestamp=ts, temp=1, device_id="gh-1", seq=7))
+    saved = repo.insert_many(
+        [
+            SensorReading(timestamp=ts, temp=1, device_id="gh-1", seq=7),  # retry
+            SensorReading(timestamp=ts, temp=2, device_id="gh-1", seq=8),
+            SensorReading(timestamp=ts, temp=9, device_id="gh-1", seq=8),  # repeat
+            SensorReading(timestamp=ts, temp=3),                           # keyless
+            SensorReading(timestamp=ts, temp=4),
+        ]
+    )
+    assert saved[0] is None and saved[2] is None
+    assert [r.temp for r in saved if r] == [2, 3, 4]
+    assert repo.fetch_by_key("gh-1", 7).id == first.id
+    assert len(repo.fetch_all()) == 4
+    # duplicates must not reach the rollups either
+    hour = db_session.query(SensorRollupHourDB).one()
+    assert (hour.count, hour.temp_sum) == (4, 10)
+
+
+def test_insert_many_matches_rows_by_the_full_dedup_key(tmp_path, monkeypatch):
+    # partitioned tables key retries on (device_id, seq, timestamp)
+    engine = create_engine(f"sqlite:///{tmp_path / 'keyed.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_sensor_data_device_seq"))
+        conn.execute(text("CREATE UNIQUE INDEX ux_sensor_data_device_seq "
+                          "ON sensor_data (device_id, seq, timestamp)"))
+    monkeypatch.setattr(repositories, "SENSOR_DEDUP_KEY", ("device_id", "seq", "timestamp"))
+    ts = datetime(2024, 1, 1, 12, 0)
+    with Session(engine) as db:
+        saved = SensorRepository(db).insert_many([
+            SensorReading(timestamp=ts, temp=1, device_id="gh-1", seq=7),
+            SensorReading(timestamp=ts + timedelta(seconds=1), temp=2, device_id="gh-1", seq=7),
+            SensorReading(timestamp=ts, temp=3, device_id="gh-1", seq=7),   # repeat
+        ])
+        assert [r and r.temp for r in saved] == [1, 2, None]
+        assert len(SensorRepository(db).fetch_all()) == 2
+    engine.dispose()
+
+
+def test_sensor_reads_filter_by_device(db_session):
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 1, 1, 10, 0)
+    repo.insert_many([
+        SensorReading(timestamp=base + timedelta(minutes=i), temp=i,
+                      device_id="gh-1" if i % 2 else "gh-2")
+        for i in range(6)
+    ])
+    page = repo.fetch_page(limit=2, device_id="gh-1")
+    assert [r.temp for r in page] == [1, 3]
+    rest = repo.fetch_page(limit=2, after=(page[-1].timestamp, page[-1].id),
+                           device_id="gh-1")
+    assert [r.temp for r in rest] == [5]
+    assert [r.temp for r in repo.fetch_by_time(base, base + timedelta(hours=1), "gh-2")] == [0, 2, 4]
+
+    # 1h buckets would normally come from the fleet-wide rollups
+    (bucket,) = repo.aggregate(base, base + timedelta(hours=1), 3600, ["temp"], "gh-2")
+    assert (bucket.count, bucket.stats["temp"].avg) == (3, 2)
+
+
+def test_sensor_archive_moves_old_days_and_reads_them_back(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(sensor_archive, "root", str(tmp_path))
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 1, 1, 22, 0)
+    repo.insert_many([
+        SensorReading(timestamp=base + timedelta(hours=i), temp=i,
+                      device_id="gh-1" if i % 2 else "gh-2")
+        for i in range(30)   # 2024-01-01 22:00 .. 2024-01-03 03:00
+    ])
+
+    moved = repo.archive_older_than(datetime(2024, 1, 3), chunk_rows=4)
+    assert moved == 26
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["date=2024-01-01", "date=2024-01-02"]
+    assert len(repo.fetch_all(limit=100)) == 4
+
+    window = (datetime(2024, 1, 1), datetime(2024, 1, 4))
+    assert [r.temp for r in repo.fetch_by_time(*window)] == list(range(30))
+    assert [r.temp for r in repo.fetch_by_time(*window, device_id="gh-1")] == list(range(1, 30, 2))
+    chunks = list(repo.stream_by_time(*window, chunk_size=7))
+    assert [len(c) for c in chunks] == [7, 7, 7, 7, 2]
+    # rollups are kept, so aggregates still cover archived days
+    assert sum(b.count for b in repo.aggregate(*window, 86400, ["temp"])) == 30
+    # and a backfill leaves the archived days' rollups alone
+    assert repo.rebuild_rollups(*window) > 0
+    assert [b.count for b in repo.aggregate(*window, 86400, ["temp"])] == [2, 24, 4]
+
+
+def test_raw_aggregates_include_archived_days(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(sensor_archive, "root", str(tmp_path))
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 1, 1, 23, 58)
+    repo.insert_many([
+        SensorReading(timestamp=base + timedelta(seconds=20 * i), temp=i % 7,
+                      dist=None if i % 5 == 0 else 10 * i, motion=i % 3 == 0,
+                      device_id="gh-1" if i % 2 else "gh-2")
+        for i in range(20)   # 2024-01-01 23:58 .. 2024-01-02 00:04:20
+    ])
+    window = (base, base + timedelta(minutes=10))
+
+    def snapshot():
+        # a device, a field the rollups lack and sub-minute buckets: all raw
+        return [repo.aggregate(*window, 30, ["temp"], device_id="gh-1"),
+                repo.aggregate(*window, 60, ["temp", "dist"]),
+                repo.aggregate(*window, 30, ["temp"])]
+
+    before = snapshot()
+    assert repo.archive_older_than(datetime(2024, 1, 2, 0, 3)) == 15
+    assert snapshot() == before
+
+
+def test_sensor_archive_read_is_lazy_and_sorted_per_day(tmp_path):
+    archive = SensorArchive(str(tmp_path))
+    day = datetime(2024, 1, 1)
+
+    def row(i, minutes):
+        r = SensorDB(id=i, timestamp=day + timedelta(minutes=minutes), temp=i)
+        return tuple(getattr(r, c.name) for c in SensorDB.__table__.columns)
+
+    # two files of the same day, each out of order with the other
+    archive.write_day(day.date(), [[row(1, 30), row(2, 90)]])
+    archive.write_day(day.date(), [[row(3, 10), row(4, 60)], [row(5, 20)]])
+    archive.write_day(date(2024, 1, 2), [[row(6, 1440 + 5)]])
+
+    rows = archive.read(day, day + timedelta(days=2), batch_size=1)
+    assert not isinstance(rows, list)
+    assert [r[COLUMN_NAMES.index("id")] for r in rows] == [3, 5, 1, 4, 2, 6]
+    window = archive.read(day + timedelta(minutes=20), day + timedelta(minutes=60))
+    assert [r[COLUMN_NAMES.index("id")] for r in window] == [5, 1, 4]
+
+
+def test_sensor_aggregate_buckets(db_session):
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 1, 1, 10, 0)
+    repo.insert_many(
+        [
+            SensorReading(timestamp=base + timedelta(minutes=1), temp=20, soil=100),
+            SensorReading(timestamp=base + timedelta(minutes=4), temp=24, soil=300),
+            SensorReading(timestamp=base + timedelta(minutes=7), temp=30, soil=500),
+        ]
+    )
+    buckets = repo.aggregate(base, base + timedelta(hours=1), 300, ["temp", "soil"])
+    assert [b.bucket for b in buckets] == [base, base + timedelta(minutes=5)]
+    assert [b.count for b in buckets] == [2, 1]
+    first = buckets[0].stats
+    assert (first["temp"].min, first["temp"].max, first["temp"].avg) == (20, 24, 22)
+    assert first["soil"].avg == 200
+
+
+def test_rollups_match_raw_aggregation(db_session):
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 3, 1, 0, 0)
+    readings = [
+        SensorReading(timestamp=base + timedelta(minutes=17 * i),
+                      temp=15 + i % 9, hum=40 + i % 5, soil=200 + 7 * i,
+                      light=100 * (i % 4), motion=i % 3 == 0)
+        for i in range(200)
+    ]
+    # half through the incremental path, half as raw rows + backfill
+    repo.insert_many(readings[:100])
+    for r in readings[100:]:
+        db_session.add(SensorDB(**{k: v for k, v in r.__dict__.items() if k != "id"}))
+    db_session.commit()
+    assert repo.rebuild_rollups(base, base + timedelta(days=3)) > 0
+
+    hours = db_session.query(SensorRollupHourDB).count()
+    assert hours == len({(r.timestamp.date(), r.timestamp.hour) for r in readings})
+
+    # incremental upserts land on the backfilled bucket rows
+    extra = SensorReading(timestamp=base + timedelta(minutes=5), temp=16, hum=41,
+                          soil=210, light=100)
+    readings.append(extra)
+    repo.insert(extra)
+    assert db_session.query(SensorRollupHourDB).count() == hours
+
+    span = (base, base + timedelta(days=3))
+    fields = ["temp", "hum", "soil", "light"]
+    for bucket in (3600, 6 * 3600, 86400):
+        rolled = repo.aggregate(*span, bucket, fields)
+        raw = repo._aggregate_raw(*span, bucket, fields)
+        assert [(b.bucket, b.count, b.motion_count) for b in rolled] == \
+            [(b.bucket, b.count, b.motion_count) for b in raw]
+        for a, b in zip(rolled, raw):
+            for f in fields:
+                assert a.stats[f].min == b.stats[f].min
+                assert a.stats[f].max == b.stats[f].max
+                assert abs(a.stats[f].avg - b.stats[f].avg) < 1e-9
+
+
+def test_rollups_average_over_non_null_values(db_session):
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 3, 1)
+    repo.insert(SensorReading(timestamp=base, temp=20, hum=None))
+    repo.insert(SensorReading(timestamp=base + timedelta(minutes=1), temp=None, hum=None))
+    repo.insert(SensorReading(timestamp=base + timedelta(minutes=2), temp=30, hum=None))
+    span, fields = (base, base + timedelta(hours=1)), ["temp", "hum"]
+
+    raw = repo._aggregate_raw(*span, 3600, fields)
+    for _ in range(2):      # incremental upserts, then a backfill
+        (bucket,) = repo.aggregate(*span, 3600, fields)
+        assert bucket.count == 3
+        assert bucket.stats["temp"].avg == 25 and bucket.stats["hum"].avg is None
+        assert bucket.stats == raw[0].stats
+        repo.rebuild_rollups(*span)
+
+
+def test_rollup_aggregates_respect_range_edges(db_session):
+    repo = SensorRepository(db_session)
+    base = datetime(2024, 3, 1, 0, 0)
+    repo.insert_many([
+        SensorReading(timestamp=base + timedelta(minutes=10 * i), temp=i, hum=50)
+        for i in range(4 * 6 + 1)   # 00:00 .. 04:00, one every 10 minutes
+    ])
+    fields = ["temp", "hum"]
+    for span in [
+        (base + timedelta(minutes=25), base + timedelta(hours=2, minutes=35)),
+        (base + timedelta(hours=1), base + timedelta(hours=3, minutes=30)),
+        (base + timedelta(minutes=30), base + timedelta(hours=3)),
+        (base, base + timedelta(hours=4)),      # aligned, reading on to_time
+        (base + timedelta(seconds=1), base + timedelta(days=1)),
+    ]:
+        rolled = repo.aggregate(*span, 3600, fields)
+        raw = repo._aggregate_raw(*span, 3600, fields)
+        assert [(b.bucket, b.count, b.stats["temp"].min, b.stats["temp"].max)
+                for b in rolled] == \
+            [(b.bucket, b.count, b.stats["temp"].min, b.stats["temp"].max) for b in raw]
+
+    # an aligned range still reads the hour rollups: edges are not widened
+    span = (base + timedelta(hours=1), base + timedelta(hours=3))
+    db_session.query(SensorDB).filter(SensorDB.timestamp <= span[1]).delete()
+    (first, second) = repo.aggregate(*span, 3600, fields)
+    assert (first.count, second.count) == (6, 6)
+
+
 def test_settings_upsert_and_get(db_session):
     repo = SettingsRepository(db_session)
     config = GreenhouseSettings(
@@ -93,3 +368,41 @@ def test_token_blacklist(db_session):
     assert repo.is_revoked(jti) is False
     repo.revoke(jti)
     assert repo.is_revoked(jti) is True
+
+
+def test_revocation_cache_delta_sync_and_prune(db_session):
+    repo = TokenBlacklistRepository(db_session)
+    cache = RevocationCache(sync_interval=0)
+    now = datetime.utcnow()
+
+    # revocations written by "another worker" show up on the next sync
+    repo.revoke("live", now + timedelta(minutes=30))
+    repo.revoke("stale", now - timedelta(minutes=1))
+    assert cache.is_revoked("live", repo.revoked_since)
+    assert not cache.is_revoked("stale", repo.revoked_since)
+
+    assert repo.prune_expired() == 1
+    assert repo.is_revoked("stale") is False
+    assert repo.is_revoked("live") is True
+
+
+def test_revocations_without_expiry_never_expire_until_backfilled(db_session, tmp_path):
+    # a row from before expires_at was recorded
+    db_session.add(RevokedTokenDB(jti="legacy", revoked_at=datetime.utcnow() - timedelta(days=2)))
+    db_session.commit()
+    repo = TokenBlacklistRepository(db_session)
+    assert RevocationCache(sync_interval=0).is_revoked("legacy", repo.revoked_since)
+    assert repo.prune_expired() == 0
+
+    assert repo.backfill_expiry() == 1
+    assert repo.prune_expired() == 1
+    assert repo.backfill_expiry() == 0
+
+    # the migration adds the column and indexes to a table created without them
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE revoked_tokens (id INTEGER PRIMARY KEY, "
+                          "jti VARCHAR NOT NULL UNIQUE, revoked_at DATETIME)"))
+    assert "column expires_at" in migrate_revoked_tokens.add_missing_schema(engine)
+    assert migrate_revoked_tokens.add_missing_schema(engine) == []
+    engine.dispose()
@@ -1,21 +1,57 @@
+import hashlib
+import hmac
+import math
+import os
+from datetime import datetime
 from typing import Optional
 from domain.entities import User
+from adapters.cache import failed_login_cache
 from adapters.db.repositories import UserRepository, TokenBlacklistRepository
-from security import verify_password
+from security import verify_password, SECRET_KEY
+
+# Failed attempts per username and client address tolerated within
+# AUTH_FAILURE_TTL seconds of the first one before further attempts from
+# that client are refused without running bcrypt.
+AUTH_MAX_FAILURES = int(os.getenv("AUTH_MAX_FAILURES", "5"))
+
+
+class TooManyAttempts(Exception):
+    """Too many recent failed logins for this username from this client."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after  # seconds until the failure window ends
+
+
+def _attempt_digest(password: str) -> str:
+    # keyed so the cache never holds a plain fast hash of a password
+    return hmac.new(SECRET_KEY.encode(), password.encode(), hashlib.sha256).hexdigest()
+
 
 class AuthService:
     def __init__(self, user_repo: UserRepository, blacklist_repo: TokenBlacklistRepository):
         self.user_repo = user_repo
         self.blacklist_repo = blacklist_repo
 
-    def authenticate(self, username: str, password: str) -> Optional[User]:
+    def authenticate(self, username: str, password: str,
+                     client: Optional[str] = None) -> Optional[User]:
+        attempt = (username, _attempt_digest(password))
+        if failed_login_cache.get(attempt):
+            return None
+        counter = (username, None, client)
+        if (failed_login_cache.get(counter) or 0) >= AUTH_MAX_FAILURES:
+            raise TooManyAttempts(max(1, math.ceil(failed_login_cache.remaining(counter))))
+
         user = self.user_repo.get(username)
         if user and verify_password(password, user.password_hash):
+            failed_login_cache.discard(counter)
             return user
+        failed_login_cache.set(attempt, True)
+        failed_login_cache.increment(counter)
         return None
 
-    def revoke_token(self, jti: str):
-        self.blacklist_repo.revoke(jti)
+    def revoke_token(self, jti: str, expires_at: Optional[datetime] = None):
+        self.blacklist_repo.revoke(jti, expires_at)
 
     def change_password(self, username: str, new_password: str):
         self.user_repo.change_password(username, new_password)
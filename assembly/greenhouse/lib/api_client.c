@@ -16,12 +16,13 @@ static uint32_t jwt_exp = 0;      /* millis() when it dies */
 /* Very small helper that re-uses your existing AT commands.
    Blocks for ≤150 ms on a typical LAN.
 */
-static bool http_request(const char *req, char *resp, size_t resp_sz)
+static bool http_request_n(const uint8_t *req, size_t req_len,
+                           char *resp, size_t resp_sz)
 {
     if (wifi_command_create_TCP_connection(API_HOST, API_PORT, NULL, NULL) != WIFI_OK)
         return false;
 
-    if (wifi_command_TCP_transmit((uint8_t *)req, strlen(req)) != WIFI_OK)
+    if (wifi_command_TCP_transmit((uint8_t *)req, req_len) != WIFI_OK)
         return false;
 
     /* crude RX – we only care about the body part that fits in resp */
@@ -39,6 +40,11 @@ static bool http_request(const char *req, char *resp, size_t resp_sz)
     return true;
 }
 
+static bool http_request(const char *req, char *resp, size_t resp_sz)
+{
+    return http_request_n((const uint8_t *)req, strlen(req), resp, resp_sz);
+}
+
 /* ------------------------------------------------------------------ */
 bool api_authenticate(void)
 {
@@ -112,34 +118,129 @@ bool api_send_reading(const SensorState *s)
 }
 
 /* ------------------------------------------------------------------ */
+/* Packed record for POST /sensors/binary (telemetry format version 1,
+   see api/interfaces/http/telemetry.py). Written byte by byte so the
+   layout does not depend on compiler packing; all fields little-endian. */
+#define TELEMETRY_VERSION   1
+#define TELEMETRY_REC_SIZE  25
+
+static uint8_t *put16(uint8_t *p, uint16_t v)
+{
+    *p++ = v & 0xFF; *p++ = v >> 8;
+    return p;
+}
+
+static uint8_t *put32(uint8_t *p, uint32_t v)
+{
+    p = put16(p, v & 0xFFFF);
+    return put16(p, v >> 16);
+}
+
+static uint8_t *putf(uint8_t *p, float f)
+{
+    uint32_t v;
+    memcpy(&v, &f, sizeof(v));
+    return put32(p, v);
+}
+
+bool api_send_reading_bin(const SensorState *s)
+{
+    if (!api_authenticate()) return false;
+
+    uint8_t body[1 + TELEMETRY_REC_SIZE];
+    uint8_t *p = body;
+    *p++ = TELEMETRY_VERSION;
+    p = putf(p, s->tmp_i + s->tmp_d / 10.0f);
+    p = putf(p, s->hum_i + s->hum_d / 10.0f);
+    p = put16(p, s->soil);
+    p = put16(p, s->light);
+    p = put16(p, s->dist);
+    p = put16(p, (uint16_t)s->acc_x);
+    p = put16(p, (uint16_t)s->acc_y);
+    p = put16(p, (uint16_t)s->acc_z);
+    *p++ = s->motion ? 0x01 : 0x00;   /* no RTC: let the server stamp it */
+    p = put32(p, 0);
+
+    char req[400 + sizeof(body)];
+    snprintf(req, 400,
+        "POST /sensors/binary HTTP/1.1\r\n"
+        "Host: " API_HOST "\r\n"
+        "Content-Type: application/octet-stream\r\n"
+        "Content-Length: %d\r\n",
+        (int)sizeof(body));
+    add_auth_hdr(req);
+    strcat(req, "\r\n");
+    size_t hdr_len = strlen(req);
+    memcpy(req + hdr_len, body, sizeof(body));
+
+    char dummy[32];
+    return http_request_n((const uint8_t *)req, hdr_len + sizeof(body),
+                          dummy, sizeof(dummy));
+}
+
+/* ------------------------------------------------------------------ */
+/* Last settings we parsed and the ETag they came with. The server answers
+   304 with no body while the ETag still matches, so a poll only costs a
+   few header bytes until somebody changes the thresholds. */
+static GreenhouseSettings settings_cache;
+static char settings_etag[24];
+
+static void remember_etag(const char *resp)
+{
+    const char *p = strstr(resp, "etag: ");
+    if (!p) p = strstr(resp, "ETag: ");
+    if (!p) { settings_etag[0] = '\0'; return; }
+    p += 6;
+    size_t n = strcspn(p, "\r\n");
+    if (n >= sizeof(settings_etag)) { settings_etag[0] = '\0'; return; }
+    memcpy(settings_etag, p, n); settings_etag[n] = '\0';
+}
+
 bool api_get_settings(GreenhouseSettings *gs)
 {
     if (!api_authenticate()) return false;
 
-    char req[200];
+    char req[400];
     strcpy(req,
         "GET /settings/ HTTP/1.1\r\n"
         "Host: " API_HOST "\r\n");
     add_auth_hdr(req);
+    if (settings_etag[0]) {
+        strcat(req, "If-None-Match: ");
+        strcat(req, settings_etag);
+        strcat(req, "\r\n");
+    }
     strcat(req, "\r\n");
 
-    char resp[256];
+    char resp[384];
     if (!http_request(req, resp, sizeof(resp)))
         return false;
 
+    /* "HTTP/1.1 304 ..." – thresholds unchanged, reuse the cached copy */
+    if (settings_etag[0] && strncmp(resp + 9, "304", 3) == 0) {
+        *gs = settings_cache;
+        return true;
+    }
+
     /* Tiny JSON payload – parse with sscanf + strstr for speed */
     int tmin, tmax, lmin, lmax, hmin, hmax, soil;
-    if (sscanf(resp,
+    const char *body = strstr(resp, "\r\n\r\n");
+    if (!body || sscanf(body,
         "%*[^t]temp_min\":%d%*[^t]temp_max\":%d%*[^l]light_min\":%d"
         "%*[^l]light_max\":%d%*[^h]hum_min\":%d%*[^h]hum_max\":%d"
         "%*[^s]soil_min\":%d",
-        &tmin, &tmax, &lmin, &lmax, &hmin, &hmax, &soil) != 7)
+        &tmin, &tmax, &lmin, &lmax, &hmin, &hmax, &soil) != 7) {
+        settings_etag[0] = '\0';
         return false;
+    }
 
     gs->temp_min  = tmin;   gs->temp_max  = tmax;
     gs->light_min = lmin;   gs->light_max = lmax;
     gs->hum_min   = hmin;   gs->hum_max   = hmax;
     gs->soil_min  = soil;
+
+    settings_cache = *gs;
+    remember_etag(resp);
     return true;
 }
 
@@ -15,6 +15,8 @@
 */
 bool api_authenticate(void);                       
 bool api_send_reading(const SensorState *s);       
+/* Same reading as a 26-byte packed record (POST /sensors/binary) */
+bool api_send_reading_bin(const SensorState *s);
 bool api_get_settings(GreenhouseSettings *dst);    
 
 /* NEW: return true if successful and `*should_irrigate` is set; else false */
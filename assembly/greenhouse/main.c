@@ -174,7 +174,7 @@ int main(void)
             send_flag = false;
 
             /* A) Push sensor reading to backend */
-            api_send_reading((SensorState*)&g_state);
+            api_send_reading_bin((SensorState*)&g_state);
 
             /* B) Pull settings from backend */
             GreenhouseSettings gh;
@@ -0,0 +1,160 @@
+"""
+Compact model artifact for fast cold starts: a directory of plain .npy
+arrays plus a small manifest, evaluated with NumPy alone.
+
+    pump_model/
+        model.json                          {"kind": ..., "classes": [...],
+                                             "features": [...] (if named)}
+        coef.npy, intercept.npy             kind "linear"
+        left.npy, right.npy, feature.npy,   kind "trees" (all trees' nodes
+        threshold.npy, value.npy, roots.npy  concatenated, roots[i] = tree i)
+
+Arrays are memory-mapped, so opening a bundle costs a few syscalls instead
+of unpickling scikit-learn, and only the pages prediction touches are read.
+The loaded objects expose `classes_`, `predict` and `predict_proba` like
+the estimators they were exported from.
+
+    python -m src.compact_model models/pump_model.joblib models/pump_model
+"""
+import json
+import os
+
+import numpy as np
+
+MANIFEST = "model.json"
+_LEAF = -1
+
+
+class LinearModel:
+    """Logistic-regression style classifier (binary or multinomial)."""
+
+    def __init__(self, classes, coef, intercept, features=None):
+        self.classes_ = np.asarray(classes)
+        if features is not None:
+            self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.coef = coef
+        self.intercept = intercept
+
+    def predict_proba(self, X):
+        z = np.asarray(X, dtype=float) @ self.coef.T + self.intercept
+        if z.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-z[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        e = np.exp(z - z.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class TreeEnsemble:
+    """A decision tree or a random forest (mean of per-tree class fractions)."""
+
+    def __init__(self, classes, left, right, feature, threshold, value, roots,
+                 features=None):
+        self.classes_ = np.asarray(classes)
+        if features is not None:
+            self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+
+    def predict_proba(self, X):
+        # scikit-learn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        out = np.zeros((len(X), len(self.classes_)))
+        for root in self.roots:
+            node = np.full(len(X), root, dtype=np.int64)
+            # walk all rows down the tree together, one level per iteration
+            while True:
+                left = self.left[node]
+                inner = left != _LEAF
+                if not inner.any():
+                    break
+                at = node[inner]
+                go_left = X[rows[inner], self.feature[at]] <= self.threshold[at]
+                node[inner] = np.where(go_left, left[inner], self.right[at])
+            out += self.value[node]
+        return out / len(self.roots)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_bundle(model, path: str):
+    """Write a fitted linear classifier, decision tree or random forest to `path`."""
+    estimators = getattr(model, "estimators_", None)
+    if hasattr(model, "tree_") or isinstance(estimators, list):
+        trees = [model.tree_] if hasattr(model, "tree_") else [e.tree_ for e in estimators]
+        arrays = _pack_trees(trees)
+        kind = "trees"
+    elif hasattr(model, "coef_"):
+        arrays = {"coef": np.asarray(model.coef_, dtype=float),
+                  "intercept": np.asarray(model.intercept_, dtype=float)}
+        kind = "linear"
+    else:
+        raise TypeError(f"Cannot export {type(model).__name__} as a compact bundle")
+
+    os.makedirs(path, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), arr)
+    # manifest last: a bundle without one is never loaded half-written
+    meta = {"kind": kind, "classes": np.asarray(model.classes_).tolist()}
+    if hasattr(model, "feature_names_in_"):
+        meta["features"] = [str(f) for f in model.feature_names_in_]
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(meta, f)
+
+
+def _pack_trees(trees) -> dict:
+    parts = {k: [] for k in ("left", "right", "feature", "threshold", "value")}
+    roots, offset = [], 0
+    for t in trees:
+        roots.append(offset)
+        for name, children in (("left", t.children_left), ("right", t.children_right)):
+            parts[name].append(np.where(children == _LEAF, _LEAF, children + offset))
+        parts["feature"].append(t.feature)
+        parts["threshold"].append(t.threshold)
+        value = t.value[:, 0, :]
+        parts["value"].append(value / value.sum(axis=1, keepdims=True))
+        offset += t.node_count
+    packed = {k: np.concatenate(v) for k, v in parts.items()}
+    packed["left"] = packed["left"].astype(np.int64)
+    packed["right"] = packed["right"].astype(np.int64)
+    packed["feature"] = packed["feature"].astype(np.int64)
+    packed["roots"] = np.asarray(roots, dtype=np.int64)
+    return packed
+
+
+def load_bundle(path: str):
+    with open(os.path.join(path, MANIFEST)) as f:
+        meta = json.load(f)
+
+    def arr(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    if meta["kind"] == "linear":
+        return LinearModel(meta["classes"], arr("coef"), arr("intercept"),
+                           meta.get("features"))
+    if meta["kind"] == "trees":
+        return TreeEnsemble(meta["classes"], arr("left"), arr("right"), arr("feature"),
+                            arr("threshold"), arr("value"), arr("roots"),
+                            meta.get("features"))
+    raise ValueError(f"Unknown model bundle kind {meta['kind']!r}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export a joblib model as a compact .npy bundle")
+    parser.add_argument("source", help="joblib file with a fitted estimator")
+    parser.add_argument("target", help="bundle directory to (over)write")
+    args = parser.parse_args()
+    export_bundle(joblib.load(args.source), args.target)
+    print(f"wrote {args.target}")
@@ -1,11 +1,136 @@
+import asyncio
+import base64
+import json
 import os
-import requests
+import threading
+import time
+
+# requests is imported where it is used: it is a noticeable share of a
+# Lambda cold start and the batch/HTTP paths may never need it.
 
 # Environment variables for authentication and API endpoint
 GH_API_URL   = os.getenv("GH_API_URL", "https://api.my-greenhouse.com")
 GH_API_USER  = os.getenv("GH_API_USER")
 GH_API_PASS  = os.getenv("GH_API_PASSWORD")
 GH_API_TOKEN = os.getenv("GH_API_TOKEN")
+# Comma-separated devices the scheduled Lambda evaluates in one run
+GH_DEVICE_IDS = [d.strip() for d in os.getenv("GH_DEVICE_IDS", "").split(",") if d.strip()]
+
+# Connection pool / request policy of the shared session
+GH_API_POOL_SIZE       = int(os.getenv("GH_API_POOL_SIZE", "10"))
+GH_API_CONNECT_TIMEOUT = float(os.getenv("GH_API_CONNECT_TIMEOUT", "3.05"))
+GH_API_READ_TIMEOUT    = float(os.getenv("GH_API_READ_TIMEOUT", "10"))
+GH_API_RETRIES         = int(os.getenv("GH_API_RETRIES", "3"))
+# Retry n sleeps about backoff * 2**(n-1) seconds plus up to `backoff` of jitter
+GH_API_BACKOFF         = float(os.getenv("GH_API_BACKOFF", "0.5"))
+# A cached access token is replaced this many seconds before its exp
+GH_TOKEN_REFRESH_MARGIN = float(os.getenv("GH_TOKEN_REFRESH_MARGIN", "60"))
+
+_TIMEOUT = (GH_API_CONNECT_TIMEOUT, GH_API_READ_TIMEOUT)
+# Used when a token's exp cannot be read; a 401 refreshes it sooner anyway
+_FALLBACK_TOKEN_TTL = 300
+
+_session = None
+_session_lock = threading.Lock()
+_token = None           # (access token, exp as unix time)
+_token_lock = threading.Lock()
+
+def get_session():
+    """
+    The process-wide keep-alive session: one pool of up to
+    GH_API_POOL_SIZE connections per host, and bounded retries with
+    jittered exponential backoff for connection errors and 429/5xx
+    (honouring Retry-After). Logins are not retried on 429: that is the
+    API refusing further attempts, and retrying only prolongs it.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def _retry(statuses, methods):
+    from urllib3.util.retry import Retry
+
+    return Retry(
+        total=GH_API_RETRIES,
+        backoff_factor=GH_API_BACKOFF,
+        backoff_jitter=GH_API_BACKOFF,  # urllib3 >= 2
+        status_forcelist=statuses,
+        allowed_methods=frozenset(methods),
+        raise_on_status=False,
+    )
+
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_maxsize=GH_API_POOL_SIZE,
+                          max_retries=_retry((429, 500, 502, 503, 504), {"GET"}))
+    # the token request is a login, safe to repeat on a server error
+    login = HTTPAdapter(pool_maxsize=1,
+                        max_retries=_retry((500, 502, 503, 504), {"POST"}))
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.mount(f"{GH_API_URL}/auth/token", login)
+    return session
+
+def _jwt_exp(token):
+    """`exp` claim of a JWT, read without verifying it (the API does that)."""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+
+def _bearer_token(refresh=False):
+    """
+    Access token for the API: GH_API_TOKEN if set, otherwise one obtained
+    from /auth/token with GH_API_USER / GH_API_PASSWORD and reused until
+    shortly before it expires. None when no credentials are configured.
+    """
+    global _token
+    if GH_API_TOKEN:
+        return GH_API_TOKEN
+    if not (GH_API_USER and GH_API_PASS):
+        return None
+    with _token_lock:
+        now = time.time()
+        if refresh or _token is None or now >= _token[1] - GH_TOKEN_REFRESH_MARGIN:
+            response = get_session().post(
+                f"{GH_API_URL}/auth/token",
+                json={"username": GH_API_USER, "password": GH_API_PASS},
+                timeout=_TIMEOUT,
+            )
+            response.raise_for_status()
+            token = response.json()["access_token"]
+            try:
+                exp = _jwt_exp(token)
+            except (IndexError, KeyError, ValueError):
+                exp = now + _FALLBACK_TOKEN_TTL
+            _token = (token, exp)
+        return _token[0]
+
+def _get(path, params=None):
+    """GET on the API; a 401 (token revoked or expired early) gets one fresh-token retry."""
+    session = get_session()
+    token = _bearer_token()
+    for retried in (False, True):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = session.get(f"{GH_API_URL}{path}", params=params,
+                               headers=headers, timeout=_TIMEOUT)
+        if response.status_code != 401 or retried or token is None or GH_API_TOKEN:
+            return response
+        token = _bearer_token(refresh=True)
+
+def _features(data):
+    return {
+        # lets features.FeatureStore tell a new reading from a repeated one
+        "timestamp": data.get("timestamp"),
+        "temperature": data.get("temp"),
+        "humidity":    data.get("hum"),
+        "soil_moisture": data.get("soil")
+    }
 
 def get_sensor_data():
     """
@@ -19,21 +144,37 @@ def get_sensor_data():
     Assumes the greenhouse API has an endpoint GET {GH_API_URL}/sensors/latest
     that returns JSON fields “temp”, “hum”, and “soil”.
     """
-    auth = None
-    headers = {}
+    response = _get("/sensors/latest")
+    response.raise_for_status()
+    return _features(response.json())
 
-    if GH_API_TOKEN:
-        headers["Authorization"] = f"Bearer {GH_API_TOKEN}"
-    elif GH_API_USER and GH_API_PASS:
-        auth = (GH_API_USER, GH_API_PASS)
+def _device_record(device_id):
+    response = _get("/sensors/latest", params={"device_id": device_id})
+    if response.status_code == 404:
+        data = {}
+    else:
+        response.raise_for_status()
+        data = response.json()
+    return {"device_id": device_id, **_features(data)}
 
-    url = f"{GH_API_URL}/sensors/latest"
-    response = requests.get(url, auth=auth, headers=headers)
-    response.raise_for_status()
-    data = response.json()
+def get_fleet_sensor_data(device_ids):
+    """
+    Latest readings of several devices, as records for
+    `predictor.predict_batch`: {"device_id", "temperature", "humidity",
+    "soil_moisture"}. A device without readings (404) gets None features
+    instead of failing the whole fleet.
+    """
+    return [_device_record(d) for d in device_ids]
 
-    return {
-        "temperature": data.get("temp"),
-        "humidity":    data.get("hum"),
-        "soil_moisture": data.get("soil")
-    }
+async def get_fleet_sensor_data_async(device_ids, concurrency=GH_API_POOL_SIZE):
+    """
+    Same as `get_fleet_sensor_data`, with up to `concurrency` requests in
+    flight at once over the shared pool; results keep the input order.
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch(device_id):
+        async with limit:
+            return await asyncio.to_thread(_device_record, device_id)
+
+    return list(await asyncio.gather(*(fetch(d) for d in device_ids)))
@@ -0,0 +1,303 @@
+"""
+Temporal features for the pump model, kept incrementally per device.
+
+Each reading a device reports (polled from /sensors/latest or streamed)
+is folded into a fixed-size ring buffer per metric. Running sums give the
+least-squares slope and monotonic queues the min/max over every window in
+FEATURE_WINDOWS, and an exponentially weighted mean follows each metric,
+so adding a reading and building a feature vector are both O(1) (amortised)
+and the window is never re-fetched. A rise in soil moisture of at least
+FEATURE_WATERING_JUMP between two readings counts as a watering.
+
+Feature names, for windows "15m,1h":
+    temperature, humidity, soil_moisture           latest values
+    <metric>_ewma
+    <metric>_slope_15m, <metric>_slope_1h          change per hour
+    <metric>_min_15m, <metric>_max_15m, ...
+    minutes_since_watering
+
+A feature that needs more history than has been seen is None. State lives
+in process memory: a Lambda keeps it across warm invocations only.
+"""
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+METRICS = ("temperature", "humidity", "soil_moisture")
+
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_windows(spec: str) -> List[Tuple[str, float]]:
+    """"15m,1h" -> [("15m", 900.0), ("1h", 3600.0)]"""
+    windows = []
+    for label in (w.strip() for w in spec.split(",")):
+        if not label:
+            continue
+        if label[-1] not in _UNITS or not label[:-1].isdigit() or int(label[:-1]) == 0:
+            raise ValueError(f"Bad feature window {label!r}; use e.g. 30s, 15m or 1h")
+        windows.append((label, float(int(label[:-1]) * _UNITS[label[-1]])))
+    return windows
+
+
+FEATURE_WINDOWS = parse_windows(os.getenv("FEATURE_WINDOWS", "15m,1h"))
+# Readings kept per device and metric; bounds memory and, at high sample
+# rates, shortens the longest window (one hour at one reading per 5 s).
+FEATURE_BUFFER_SIZE = int(os.getenv("FEATURE_BUFFER_SIZE", "720"))
+# Time constant (seconds) of the exponentially weighted means
+FEATURE_EWMA_SECONDS = float(os.getenv("FEATURE_EWMA_SECONDS", "600"))
+FEATURE_WATERING_JUMP = float(os.getenv("FEATURE_WATERING_JUMP", "5"))
+
+
+def feature_names(windows=FEATURE_WINDOWS) -> List[str]:
+    names = list(METRICS)
+    for m in METRICS:
+        names.append(f"{m}_ewma")
+        for label, _ in windows:
+            names += [f"{m}_slope_{label}", f"{m}_min_{label}", f"{m}_max_{label}"]
+    names.append("minutes_since_watering")
+    return names
+
+
+def _timestamp(value) -> Optional[float]:
+    """Unix seconds from a datetime, ISO string (naive = UTC) or number."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # fromisoformat only accepts a "Z" suffix from Python 3.11 on
+        if value.endswith(("Z", "z")):
+            value = value[:-1] + "+00:00"
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RingBuffer:
+    """The last `capacity` (t, v) samples, addressed by absolute sample index."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._t = [0.0] * capacity
+        self._v = [0.0] * capacity
+        self.total = 0          # samples ever appended
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.total - self.capacity)
+
+    @property
+    def full(self) -> bool:
+        return self.total >= self.capacity
+
+    def append(self, t: float, v: float) -> int:
+        i = self.total % self.capacity
+        self._t[i], self._v[i] = t, v
+        self.total += 1
+        return self.total - 1
+
+    def get(self, index: int) -> Tuple[float, float]:
+        i = index % self.capacity
+        return self._t[i], self._v[i]
+
+
+class WindowStats:
+    """
+    Slope, min and max over the trailing `seconds` of a RingBuffer. The
+    owner evicts samples before the buffer overwrites them (`drop_through`).
+    """
+
+    def __init__(self, buffer: RingBuffer, seconds: float):
+        self.buffer = buffer
+        self.seconds = seconds
+        self.first = 0                  # absolute index of the oldest sample in the window
+        self._origin = 0.0              # time origin of the sums, for precision
+        self._n = 0
+        self._st = self._sv = self._stt = self._stv = 0.0
+        self._evictions = 0
+        self._min: deque = deque()      # absolute indexes, values increasing
+        self._max: deque = deque()      # absolute indexes, values decreasing
+
+    def add(self, index: int, t: float, v: float):
+        if self._n == 0:
+            self._origin = t
+            self._st = self._sv = self._stt = self._stv = 0.0
+        self._sum(t, v, +1)
+        while self._min and self.buffer.get(self._min[-1])[1] >= v:
+            self._min.pop()
+        self._min.append(index)
+        while self._max and self.buffer.get(self._max[-1])[1] <= v:
+            self._max.pop()
+        self._max.append(index)
+        while self.first < index and self.buffer.get(self.first)[0] < t - self.seconds:
+            self._evict()
+
+    def drop_through(self, index: int):
+        while self.first <= index and self._n:
+            self._evict()
+
+    def _evict(self):
+        self._sum(*self.buffer.get(self.first), -1)
+        for q in (self._min, self._max):
+            if q and q[0] == self.first:
+                q.popleft()
+        self.first += 1
+        self._evictions += 1
+        if self._evictions >= self.buffer.capacity:
+            self._resum()    # cancel the rounding drift of add/subtract pairs
+
+    def _sum(self, t: float, v: float, sign: int):
+        x = t - self._origin
+        self._n += sign
+        self._st += sign * x
+        self._sv += sign * v
+        self._stt += sign * x * x
+        self._stv += sign * x * v
+
+    def _resum(self):
+        self._evictions = 0
+        self._n, self._st, self._sv, self._stt, self._stv = 0, 0.0, 0.0, 0.0, 0.0
+        if self.first < self.buffer.total:
+            self._origin = self.buffer.get(self.first)[0]
+        for i in range(self.first, self.buffer.total):
+            self._sum(*self.buffer.get(i), +1)
+
+    def slope(self) -> Optional[float]:
+        """Least-squares change per hour; None without two distinct times."""
+        denom = self._n * self._stt - self._st * self._st
+        if self._n < 2 or denom <= 1e-9 * max(1.0, self._n * self._stt):
+            return None
+        return (self._n * self._stv - self._st * self._sv) / denom * 3600.0
+
+    def min(self) -> Optional[float]:
+        return self.buffer.get(self._min[0])[1] if self._min else None
+
+    def max(self) -> Optional[float]:
+        return self.buffer.get(self._max[0])[1] if self._max else None
+
+
+class Series:
+    """One metric of one device: ring buffer, windows and EWMA."""
+
+    def __init__(self, windows, capacity: int, ewma_seconds: float):
+        self.buffer = RingBuffer(capacity)
+        self.windows = {label: WindowStats(self.buffer, sec) for label, sec in windows}
+        self.ewma_seconds = ewma_seconds
+        self.ewma: Optional[float] = None
+        self.last: Optional[Tuple[float, float]] = None
+
+    def add(self, t: float, v: float):
+        if self.buffer.full:
+            for w in self.windows.values():
+                w.drop_through(self.buffer.oldest)
+        index = self.buffer.append(t, v)
+        for w in self.windows.values():
+            w.add(index, t, v)
+        if self.ewma is None:
+            self.ewma = v
+        else:
+            # irregular sampling: weight by the time since the last reading
+            alpha = 1.0 - math.exp(-(t - self.last[0]) / self.ewma_seconds)
+            self.ewma += alpha * (v - self.ewma)
+        self.last = (t, v)
+
+
+class DeviceFeatures:
+    def __init__(self, windows, capacity: int, ewma_seconds: float, watering_jump: float):
+        self.series = {m: Series(windows, capacity, ewma_seconds) for m in METRICS}
+        self.watering_jump = watering_jump
+        self.last_t: Optional[float] = None
+        self.last_watering: Optional[float] = None
+
+    def update(self, t: float, reading: dict) -> bool:
+        """Fold in one reading; a repeat or out-of-order timestamp is ignored."""
+        if self.last_t is not None and t <= self.last_t:
+            return False
+        soil = self.series["soil_moisture"]
+        moisture = reading.get("soil_moisture")
+        if moisture is not None and soil.last is not None \
+                and moisture - soil.last[1] >= self.watering_jump:
+            self.last_watering = t
+        for m, series in self.series.items():
+            v = reading.get(m)
+            if v is not None:
+                series.add(t, float(v))
+        self.last_t = t
+        return True
+
+    def features(self) -> Dict[str, Optional[float]]:
+        out: Dict[str, Optional[float]] = {}
+        for m, series in self.series.items():
+            out[m] = series.last[1] if series.last else None
+        for m, series in self.series.items():
+            out[f"{m}_ewma"] = series.ewma
+            for label, w in series.windows.items():
+                out[f"{m}_slope_{label}"] = w.slope()
+                out[f"{m}_min_{label}"] = w.min()
+                out[f"{m}_max_{label}"] = w.max()
+        out["minutes_since_watering"] = (
+            None if self.last_watering is None else (self.last_t - self.last_watering) / 60.0
+        )
+        return out
+
+
+class FeatureStore:
+    """Rolling features of every device seen, keyed by device_id (None = unnamed)."""
+
+    def __init__(self, windows=FEATURE_WINDOWS, capacity: int = FEATURE_BUFFER_SIZE,
+                 ewma_seconds: float = FEATURE_EWMA_SECONDS,
+                 watering_jump: float = FEATURE_WATERING_JUMP):
+        self.windows = windows
+        self.capacity = capacity
+        self.ewma_seconds = ewma_seconds
+        self.watering_jump = watering_jump
+        self._devices: Dict[Optional[str], DeviceFeatures] = {}
+        self._lock = threading.Lock()
+
+    def update(self, record: dict) -> bool:
+        """
+        Fold a record ({"device_id", "timestamp", "temperature", ...}) into
+        its device's history. Records without a timestamp are skipped.
+        """
+        t = _timestamp(record.get("timestamp"))
+        if t is None:
+            return False
+        device_id = record.get("device_id")
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is None:
+                device = self._devices[device_id] = DeviceFeatures(
+                    self.windows, self.capacity, self.ewma_seconds, self.watering_jump)
+            return device.update(t, record)
+
+    def features(self, device_id: Optional[str]) -> Dict[str, Optional[float]]:
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is None:
+                return dict.fromkeys(feature_names(self.windows))
+            return device.features()
+
+    def enrich(self, records: List[dict]) -> List[dict]:
+        """Update from each record, then return them merged with their features."""
+        out = []
+        for r in records:
+            self.update(r)
+            features = self.features(r.get("device_id"))
+            # the record's own values win over the stored latest ones; a
+            # metric missing from this reading stays None rather than
+            # taking a stale value, so the pump decision stays null
+            own = {k: v for k, v in r.items() if v is not None or k in METRICS}
+            out.append({**features, **own})
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._devices.clear()
+
+
+feature_store = FeatureStore()
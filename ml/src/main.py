@@ -1,30 +1,46 @@
+from . import timing  # first, so its clock starts before the other imports
+
 import os
-from fastapi import FastAPI, HTTPException
-from mangum import Mangum
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, ConfigDict, Field
 
 from .data_fetcher import get_sensor_data
-from .predictor   import should_activate_pump
+from .features     import feature_store
+from .model_loader import registry
+from .predictor   import predict_batch, pump_decision
+# re-exported: existing deployments point their handler at main.lambda_handler
+from .scheduled   import lambda_handler, preload_model  # noqa: F401
 
-app = FastAPI(title="Greenhouse Pump Predictor")
+# Upper bound on records per POST /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_MAX", "10000"))
 
-@app.on_event("startup")
-def startup_event():
-    """
-    Preload the model into memory on cold start.
-    Any errors here will cause the Lambda to fail early.
-    """
-    try:
-        from .model_loader import load_model
-        load_model()
-    except Exception as e:
-        print(f"Error loading model at startup: {e}")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # importing .scheduled has already preloaded the model (MODEL_PRELOAD);
+    # this only covers a load that failed then
+    preload_model()
+    yield
+
+app = FastAPI(title="Greenhouse Pump Predictor", lifespan=lifespan)
+
+@app.middleware("http")
+async def server_timing_header(request: Request, call_next):
+    """Expose this process's cold-start timings (import, load, predict)."""
+    response = await call_next(request)
+    if timing.timings:
+        response.headers["Server-Timing"] = timing.server_timing()
+    return response
 
 @app.get("/predict")
 def predict_pump():
     """
     1. Fetch latest sensor data from the greenhouse API.
     2. Use the ML model to decide if the pump should activate.
-    3. Return {"activate_pump": true/false}.
+    3. Return {"activate_pump": true/false, "model_version": ...}.
     """
     try:
         sensor_data = get_sensor_data()
@@ -32,24 +48,66 @@ def predict_pump():
         raise HTTPException(status_code=502, detail=f"Error fetching sensor data: {e}")
 
     try:
-        activate = should_activate_pump(sensor_data)
+        return pump_decision(feature_store.enrich([sensor_data])[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during prediction: {e}")
 
-    return {"activate_pump": activate}
+class SensorRecord(BaseModel):
+    # extra fields are passed on as features, e.g. for a model trained on
+    # precomputed ones
+    model_config = ConfigDict(extra="allow")
+
+    device_id: Optional[str] = None
+    # with a timestamp the record also advances the device's rolling features
+    timestamp: Optional[datetime] = None
+    temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    soil_moisture: Optional[float] = None
+
+class BatchRequest(BaseModel):
+    readings: List[SensorRecord] = Field(..., max_length=MAX_BATCH_SIZE)
 
-# Handler for AWS Lambda (API Gateway / Lambda Function URL)
-handler = Mangum(app)
+class PumpDecision(BaseModel):
+    device_id: Optional[str] = None
+    activate_pump: Optional[bool] = None
+    probability: Optional[float] = None
+    model_version: Optional[str] = None
 
-def lambda_handler(event, context):
+class BatchResponse(BaseModel):
+    predictions: List[PumpDecision]
+
+@app.post("/predict/batch", response_model=BatchResponse)
+def predict_pump_batch(payload: BatchRequest):
     """
-    Direct Lambda entrypoint (e.g. EventBridge scheduled trigger).
-    Returns a JSON dict with the prediction result. If an exception
-    is raised, Lambda will record a failure.
+    Pump decisions for many devices with one model call. Predictions come
+    back in request order; a record with a missing feature gets nulls.
     """
     try:
-        sensor_data = get_sensor_data()
-        activate = should_activate_pump(sensor_data)
-        return {"activate_pump": activate}
+        records = feature_store.enrich([r.model_dump() for r in payload.readings])
+        predictions = predict_batch(records)
     except Exception as e:
-        raise e
+        raise HTTPException(status_code=500, detail=f"Error during prediction: {e}")
+    return {"predictions": predictions}
+
+@app.get("/model")
+def model_info():
+    """Active and previous (kept for rollback) model versions."""
+    if registry is None:
+        raise HTTPException(status_code=404, detail="No model registry configured")
+    active, previous = registry.versions()
+    return {"version": active, "previous": previous}
+
+_mangum = None
+
+def handler(event, context):
+    """
+    Handler for AWS Lambda (API Gateway / Lambda Function URL). Mangum is
+    imported on the first HTTP event rather than with the module.
+    """
+    global _mangum
+    if _mangum is None:
+        from mangum import Mangum
+        _mangum = Mangum(app)
+    return _mangum(event, context)
+
+timing.since_start("import")
@@ -1,17 +1,173 @@
+import json
 import os
-import joblib
+import threading
+import time
+import traceback
+from typing import Any, Optional, Tuple
 
-# Default path; can be overridden via environment variable MODEL_PATH
+from .timing import timed
+
+# Default path; can be overridden via environment variable MODEL_PATH.
+# A directory is read as a compact .npy bundle (see compact_model), which
+# loads without importing joblib or scikit-learn.
 MODEL_PATH = os.getenv("MODEL_PATH", "models/pump_model.joblib")
+# Version reported for MODEL_PATH; defaults to the artifact's file name.
+MODEL_VERSION = os.getenv("MODEL_VERSION") or os.path.basename(MODEL_PATH.rstrip("/"))
+# When set, models come from this registry directory instead of MODEL_PATH.
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR")
+# How often (seconds) the registry manifest is stat'ed for a new version.
+MODEL_CHECK_SECONDS = float(os.getenv("MODEL_CHECK_SECONDS", "10"))
+
+MANIFEST = "manifest.json"
 
 _model = None
 
 def load_model():
     """
     Load (and cache) the ML model from disk.
-    Returns a scikit-learn estimator (or similar) loaded via joblib.
+    Returns a scikit-learn estimator loaded via joblib, or the NumPy
+    equivalent for a compact bundle.
     """
+    return load_versioned_model()[1]
+
+def load_versioned_model() -> Tuple[str, Any]:
+    """(version, model) to predict with; both always belong together."""
     global _model
+    if registry is not None:
+        return registry.get()
     if _model is None:
-        _model = joblib.load(MODEL_PATH)
-    return _model
+        with timed("load"):
+            _model = _load(MODEL_PATH)
+    return MODEL_VERSION, _model
+
+def _load(path):
+    if os.path.isdir(path):
+        from .compact_model import load_bundle
+        return load_bundle(path)
+    import joblib
+    return joblib.load(path)
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts in one directory, selected by a manifest:
+
+        <root>/manifest.json    {"version": "2024-06-01", "path": "2024-06-01"}
+        <root>/2024-06-01/      a compact bundle, or a joblib file;
+                                "path" defaults to the version
+
+    The manifest is stat'ed at most every `check_interval` seconds on the
+    request path and only parsed when that changes. A new version is loaded
+    in a background thread while the current one keeps serving, then
+    swapped in; the version it replaced stays loaded, so going back to it
+    (`rollback`, or the manifest naming it again) is instant. Publish a
+    version by writing the manifest elsewhere and renaming it into place.
+    """
+
+    def __init__(self, root: str, check_interval: float = MODEL_CHECK_SECONDS):
+        self.root = root
+        self.check_interval = check_interval
+        self._active: Optional[Tuple[str, Any]] = None
+        self._previous: Optional[Tuple[str, Any]] = None
+        self._stamp = None
+        self._next_check = 0.0
+        self._loader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def get(self) -> Tuple[str, Any]:
+        if self._active is None:
+            # cold start: nothing to serve yet, so load in the foreground
+            with self._lock:
+                if self._active is None:
+                    self._stamp = self._manifest_stamp()
+                    self._next_check = time.monotonic() + self.check_interval
+                    version, path = self._read_manifest()
+                    with timed("load"):
+                        self._active = (version, _load(path))
+        elif time.monotonic() >= self._next_check:
+            self.check()
+        return self._active
+
+    def versions(self) -> Tuple[Optional[str], Optional[str]]:
+        """(active, previous) version names."""
+        active, previous = self._active, self._previous
+        return (active[0] if active else None, previous[0] if previous else None)
+
+    def check(self, wait: bool = False):
+        """Look at the manifest now; with `wait`, block until a new version is in."""
+        if self._check_lock.acquire(blocking=False):
+            try:
+                self._check()
+            finally:
+                self._check_lock.release()
+        # else another request is already checking
+        loader = self._loader
+        if wait and loader is not None:
+            loader.join()
+
+    def _check(self):
+        self._next_check = time.monotonic() + self.check_interval
+        stamp = self._manifest_stamp()
+        if stamp is None or stamp == self._stamp:
+            return
+        try:
+            version, path = self._read_manifest()
+        except (ValueError, KeyError):
+            return  # caught mid-write; the next check sees the whole file
+        if self._active is not None and version == self._active[0]:
+            self._stamp = stamp
+            return
+        if self._previous is not None and version == self._previous[0]:
+            self._stamp = stamp
+            self.rollback()
+            return
+        if self._loader is not None and self._loader.is_alive():
+            return  # picked up by a later check, once this load is done
+        self._stamp = stamp
+        self._loader = threading.Thread(
+            target=self._load_and_swap, args=(version, path),
+            name="model-loader", daemon=True,
+        )
+        self._loader.start()
+
+    def rollback(self) -> str:
+        """Swap the previous version back in; returns the now active version."""
+        with self._lock:
+            if self._previous is None:
+                raise RuntimeError("No previous model version to roll back to")
+            self._active, self._previous = self._previous, self._active
+            print(f"Model version {self._active[0]} active (rollback)")
+            return self._active[0]
+
+    def _load_and_swap(self, version: str, path: str):
+        try:
+            model = _load(path)
+        except Exception:
+            print(f"Error loading model version {version}; keeping the current one:")
+            traceback.print_exc()
+            return
+        with self._lock:
+            self._previous, self._active = self._active, (version, model)
+        print(f"Model version {version} active")
+
+    def _manifest_stamp(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        # the inode changes on every rename-into-place, even within one mtime tick
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_manifest(self) -> Tuple[str, str]:
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        version = str(manifest["version"])
+        return version, os.path.join(self.root, manifest.get("path", version))
+
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None
@@ -1,4 +1,20 @@
-from .model_loader import load_model
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .model_loader import load_versioned_model
+from .timing import report, timed
+
+# Feature order of models trained without named features. Models fitted
+# on named columns (feature_names_in_, e.g. the temporal features of
+# features.FeatureStore) are fed those columns instead.
+FEATURES = ("temperature", "humidity", "soil_moisture")
+
+
+def model_features(model) -> Sequence[str]:
+    names = getattr(model, "feature_names_in_", None)
+    return FEATURES if names is None else tuple(names)
+
 
 def should_activate_pump(sensor_data: dict) -> bool:
     """
@@ -6,12 +22,69 @@ def should_activate_pump(sensor_data: dict) -> bool:
     be activated, False otherwise. Assumes the loaded model’s predict()
     returns 0 or 1 (0 = no, 1 = yes).
     """
-    model = load_model()
+    return pump_decision(sensor_data)["activate_pump"]
+
+
+def pump_decision(sensor_data: dict) -> dict:
+    """{"activate_pump", "model_version"} for one set of sensor readings."""
+    version, model = load_versioned_model()
     # The model expects features in this exact order:
-    features = [
-        sensor_data.get("temperature"),
-        sensor_data.get("humidity"),
-        sensor_data.get("soil_moisture")
+    features = [sensor_data.get(f) for f in model_features(model)]
+    with timed("predict"):
+        prediction = model.predict([features])
+    report()
+    return {"activate_pump": bool(prediction[0]), "model_version": version}
+
+
+def feature_matrix(records: Iterable[dict], names: Sequence[str] = FEATURES) -> np.ndarray:
+    """
+    Stack records into an (n, len(names)) float matrix. Missing or null
+    features become NaN so the caller can mask those rows out.
+    """
+    rows = [[r.get(f) for f in names] for r in records]
+    if not rows:
+        return np.empty((0, len(names)))
+    return np.array(rows, dtype=float)
+
+
+def predict_batch(records: List[dict]) -> List[dict]:
+    """
+    Pump decisions for many devices with a single model call.
+
+    Each record holds an optional "device_id" plus the FEATURES. Returns,
+    in input order, {"device_id", "activate_pump", "probability",
+    "model_version"}; records with a missing feature get None for the
+    decision and probability. The probability (of
+    activating) is only present when the model has predict_proba, and the
+    decision is then taken from it rather than by a second predict call.
+    """
+    if not records:
+        return []
+    version, model = load_versioned_model()
+    X = feature_matrix(records, model_features(model))
+    complete = ~np.isnan(X).any(axis=1)
+    decisions: List[Optional[bool]] = [None] * len(records)
+    probabilities: List[Optional[float]] = [None] * len(records)
+
+    if complete.any():
+        rows = np.flatnonzero(complete)
+        if hasattr(model, "predict_proba"):
+            with timed("predict"):
+                proba = model.predict_proba(X[complete])
+            classes = list(model.classes_)
+            predicted = np.asarray(model.classes_)[proba.argmax(axis=1)]
+            positive = proba[:, classes.index(1)] if 1 in classes else np.zeros(len(rows))
+            for i, p in zip(rows, positive.tolist()):
+                probabilities[i] = p
+        else:
+            with timed("predict"):
+                predicted = model.predict(X[complete])
+        report()
+        for i, y in zip(rows, predicted.tolist()):
+            decisions[i] = bool(y)
+
+    return [
+        {"device_id": r.get("device_id"), "activate_pump": d, "probability": p,
+         "model_version": version}
+        for r, d, p in zip(records, decisions, probabilities)
     ]
-    prediction = model.predict([features])
-    return bool(prediction[0])
@@ -0,0 +1,59 @@
+"""
+Entry point for scheduled invocations (e.g. EventBridge). It deliberately
+imports neither FastAPI nor Mangum, which the HTTP app needs and a
+scheduled run does not: point the function's handler at
+`scheduled.lambda_handler` to keep them out of its cold start.
+"""
+from . import timing  # first, so its clock starts before the other imports
+
+import asyncio
+import os
+import traceback
+
+from .data_fetcher import GH_DEVICE_IDS, get_fleet_sensor_data_async, get_sensor_data
+from .features import feature_store
+from .model_loader import load_model
+from .predictor import predict_batch, pump_decision
+
+# Load the model while the module is imported, i.e. in the Lambda init
+# phase, instead of in the first (billed, latency-sensitive) invocation.
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"
+
+
+def preload_model():
+    """Load the model ahead of the first request; failures are logged, not fatal."""
+    if not MODEL_PRELOAD:
+        return
+    try:
+        load_model()
+    except Exception:
+        # the first prediction retries the load and reports the error
+        print("Error preloading model:")
+        traceback.print_exc()
+
+
+def lambda_handler(event, context):
+    """
+    Direct Lambda entrypoint (e.g. EventBridge scheduled trigger).
+    Returns a JSON dict with the prediction result. If an exception
+    is raised, Lambda will record a failure.
+
+    The whole fleet is evaluated with one model call when the event has
+    "readings" (records as for POST /predict/batch) or "device_ids", or
+    GH_DEVICE_IDS is set; the result is then {"predictions": [...]}.
+    Otherwise the single-greenhouse {"activate_pump": ...} is returned.
+    Either way the readings also advance the rolling per-device features.
+    """
+    event = event or {}
+    readings = event.get("readings")
+    device_ids = event.get("device_ids") or GH_DEVICE_IDS
+    if readings is None and device_ids:
+        readings = asyncio.run(get_fleet_sensor_data_async(device_ids))
+    if readings is not None:
+        return {"predictions": predict_batch(feature_store.enrich(readings))}
+
+    return pump_decision(feature_store.enrich([get_sensor_data()])[0])
+
+
+timing.since_start("import")
+preload_model()
@@ -0,0 +1,45 @@
+"""
+Cold-start timings of this process, in milliseconds: module import, model
+load and first prediction. Each phase is recorded only the first time it
+happens; the complete set is logged once as a JSON line and sent by the
+HTTP app in a `Server-Timing` header.
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+PROCESS_START = time.perf_counter()
+
+timings: Dict[str, float] = {}
+_reported = False
+
+
+def record(phase: str, ms: float):
+    if phase not in timings:
+        timings[phase] = round(ms, 2)
+
+
+def since_start(phase: str):
+    """Record the time elapsed since this module was first imported."""
+    record(phase, (time.perf_counter() - PROCESS_START) * 1000)
+
+
+@contextmanager
+def timed(phase: str):
+    """Record how long the block took; a block that raises is not recorded."""
+    start = time.perf_counter()
+    yield
+    record(phase, (time.perf_counter() - start) * 1000)
+
+
+def report():
+    """Log the cold-start timings once, after the first prediction."""
+    global _reported
+    if not _reported and "predict" in timings:
+        _reported = True
+        print(json.dumps({"cold_start_ms": timings}))
+
+
+def server_timing() -> str:
+    return ", ".join(f"{phase};dur={ms}" for phase, ms in timings.items())
@@ -0,0 +1,31 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from src.compact_model import export_bundle, load_bundle
+
+rng = np.random.default_rng(0)
+X = rng.uniform([10, 20, 0], [35, 90, 100], size=(300, 3))
+y = ((X[:, 2] < 40) & (X[:, 0] > 18)).astype(int)
+X_new = rng.uniform([10, 20, 0], [35, 90, 100], size=(200, 3))
+
+
+def _roundtrip(model, tmp_path):
+    export_bundle(model.fit(X, y), str(tmp_path / "bundle"))
+    return load_bundle(str(tmp_path / "bundle"))
+
+
+def test_linear_bundle_matches_sklearn(tmp_path):
+    model = LogisticRegression(max_iter=1000)
+    compact = _roundtrip(model, tmp_path)
+    np.testing.assert_allclose(compact.predict_proba(X_new), model.predict_proba(X_new))
+    np.testing.assert_array_equal(compact.predict(X_new), model.predict(X_new))
+
+
+def test_tree_bundles_match_sklearn(tmp_path):
+    for model in (DecisionTreeClassifier(max_depth=5, random_state=0),
+                  RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0)):
+        compact = _roundtrip(model, tmp_path)
+        np.testing.assert_allclose(compact.predict_proba(X_new), model.predict_proba(X_new))
+        np.testing.assert_array_equal(compact.predict(X_new), model.predict(X_new))
@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import json as _json
+import time
+
+import pytest
+
+from src import data_fetcher
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Stands in for the pooled session; hands out tokens expiring in `ttl` seconds."""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self.logins = 0
+        self.gets = []
+        self.revoked = set()
+
+    def post(self, url, json=None, timeout=None):
+        assert url.endswith("/auth/token") and timeout
+        self.logins += 1
+        claims = {"sub": json["username"], "exp": time.time() + self.ttl, "n": self.logins}
+        payload = base64.urlsafe_b64encode(_json.dumps(claims).encode()).rstrip(b"=").decode()
+        return FakeResponse(200, {"access_token": f"h.{payload}.s"})
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        assert timeout == data_fetcher._TIMEOUT
+        token = headers["Authorization"].split()[1]
+        self.gets.append(token)
+        if token in self.revoked:
+            return FakeResponse(401)
+        device = (params or {}).get("device_id")
+        if device == "empty":
+            return FakeResponse(404)
+        return FakeResponse(200, {"temp": 21.0, "hum": 55.0, "soil": len(device or "")})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(data_fetcher, "get_session", lambda: fake)
+    monkeypatch.setattr(data_fetcher, "GH_API_TOKEN", None)
+    monkeypatch.setattr(data_fetcher, "GH_API_USER", "admin")
+    monkeypatch.setattr(data_fetcher, "GH_API_PASS", "secret")
+    monkeypatch.setattr(data_fetcher, "_token", None)
+    return fake
+
+
+def test_token_is_cached_until_close_to_expiry(session):
+    data_fetcher.get_sensor_data()
+    data_fetcher.get_sensor_data()
+    assert session.logins == 1
+
+    session.ttl = data_fetcher.GH_TOKEN_REFRESH_MARGIN / 2
+    data_fetcher._bearer_token(refresh=True)
+    data_fetcher.get_sensor_data()     # inside the refresh margin
+    assert session.logins == 3
+
+
+def test_rejected_token_is_refreshed_once(session):
+    data_fetcher.get_sensor_data()
+    session.revoked.add(session.gets[-1])
+    assert data_fetcher.get_sensor_data()["temperature"] == 21.0
+    assert session.logins == 2
+
+
+def test_async_fleet_fetch_keeps_order(session):
+    devices = ["a", "empty", "ccc"]
+    records = asyncio.run(data_fetcher.get_fleet_sensor_data_async(devices, concurrency=2))
+    assert [(r["device_id"], r["soil_moisture"]) for r in records] == [
+        ("a", 1), ("empty", None), ("ccc", 3),
+    ]
+    assert session.logins == 1
+    assert records == data_fetcher.get_fleet_sensor_data(devices)
+
+
+def test_session_retry_policies():
+    session = data_fetcher._build_session()
+    api = session.get_adapter(f"{data_fetcher.GH_API_URL}/sensors/latest").max_retries
+    login = session.get_adapter(f"{data_fetcher.GH_API_URL}/auth/token").max_retries
+    assert 429 in api.status_forcelist and api.allowed_methods == {"GET"}
+    assert 429 not in login.status_forcelist and login.allowed_methods == {"POST"}
+    assert api.backoff_jitter == data_fetcher.GH_API_BACKOFF
@@ -0,0 +1,75 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.features import FeatureStore, _timestamp, feature_names, parse_windows
+
+WINDOWS = parse_windows("60s,5m")
+
+
+def _brute(history, now, seconds, capacity):
+    """Slope (per hour), min and max recomputed from the raw history."""
+    kept = history[-capacity:]
+    window = [(t, v) for t, v in kept if t >= now - seconds]
+    t = np.array([w[0] for w in window])
+    v = np.array([w[1] for w in window])
+    slope = np.polyfit(t - t[0], v, 1)[0] * 3600 if len(window) > 1 else None
+    return slope, v.min(), v.max()
+
+
+def test_rolling_stats_match_recomputation():
+    store = FeatureStore(windows=WINDOWS, capacity=40, ewma_seconds=120, watering_jump=50)
+    rng = random.Random(1)
+    history, t = [], 1_700_000_000.0
+    for _ in range(500):
+        t += rng.choice([1, 5, 10, 30])
+        soil = 400 + 20 * math.sin(t / 300) + rng.uniform(-3, 3)
+        store.update({"device_id": "gh-1", "timestamp": t, "temperature": 21,
+                      "humidity": 50, "soil_moisture": soil})
+        history.append((t, soil))
+
+        f = store.features("gh-1")
+        for label, seconds in WINDOWS:
+            slope, lo, hi = _brute(history, t, seconds, capacity=40)
+            assert f[f"soil_moisture_min_{label}"] == lo
+            assert f[f"soil_moisture_max_{label}"] == hi
+            if slope is None:
+                assert f[f"soil_moisture_slope_{label}"] is None
+            else:
+                assert f[f"soil_moisture_slope_{label}"] == pytest.approx(slope, rel=1e-6, abs=1e-9)
+    assert f["soil_moisture"] == history[-1][1]
+    assert set(f) == set(feature_names(WINDOWS))
+
+
+def test_watering_repeats_and_unknown_devices():
+    store = FeatureStore(windows=WINDOWS, capacity=10, ewma_seconds=60, watering_jump=5)
+    base = {"device_id": "gh-1", "temperature": 20, "humidity": 50}
+    assert store.update({**base, "timestamp": "2024-06-01T12:00:00", "soil_moisture": 30})
+    assert store.update({**base, "timestamp": "2024-06-01T12:01:00", "soil_moisture": 40})
+    # polling /sensors/latest again returns the same reading: not counted twice
+    assert not store.update({**base, "timestamp": "2024-06-01T12:01:00", "soil_moisture": 40})
+    assert store.update({**base, "timestamp": "2024-06-01T12:11:00Z", "soil_moisture": 38})
+
+    f = store.features("gh-1")
+    assert f["minutes_since_watering"] == 10
+    assert f["soil_moisture_slope_60s"] is None      # one reading in the last minute
+    assert f["soil_moisture_ewma"] == pytest.approx(38, abs=0.01)
+    assert store.features("other") == dict.fromkeys(feature_names(WINDOWS))
+
+    enriched = store.enrich([{"device_id": "gh-1", "soil_moisture": 37}])
+    assert enriched[0]["soil_moisture"] == 37 and enriched[0]["soil_moisture_ewma"] == f["soil_moisture_ewma"]
+    # a reading without soil moisture does not inherit the last one
+    enriched = store.enrich([{"device_id": "gh-1", "temperature": 21, "soil_moisture": None}])
+    assert enriched[0]["soil_moisture"] is None and enriched[0]["humidity"] == 50
+
+
+def test_timestamp_formats():
+    t = 1_717_243_200.0     # 2024-06-01T12:00:00 UTC
+    assert _timestamp("2024-06-01T12:00:00Z") == t
+    assert _timestamp("2024-06-01T12:00:00.000Z") == t
+    assert _timestamp("2024-06-01T12:00:00+00:00") == t
+    assert _timestamp("2024-06-01T14:00:00+02:00") == t
+    assert _timestamp("2024-06-01T12:00:00") == t
+    assert _timestamp(t) == t and _timestamp(None) is None
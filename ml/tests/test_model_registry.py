@@ -0,0 +1,54 @@
+import json
+import os
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from src.compact_model import export_bundle
+from src.model_loader import ModelRegistry
+
+X = np.array([[20, 50, s] for s in range(0, 100, 5)], dtype=float)
+
+
+def _publish(root, version, activate_below):
+    """Export a model that activates below a soil moisture, then point the manifest at it."""
+    y = (X[:, 2] < activate_below).astype(int)
+    export_bundle(LogisticRegression().fit(X, y), os.path.join(root, version))
+    tmp = os.path.join(root, "manifest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": version}, f)
+    os.replace(tmp, os.path.join(root, "manifest.json"))
+
+
+def test_new_version_is_swapped_in_and_rolled_back(tmp_path):
+    root = str(tmp_path)
+    _publish(root, "v1", activate_below=20)
+    registry = ModelRegistry(root, check_interval=3600)
+    version, model = registry.get()
+    assert version == "v1" and model.predict([[20, 50, 30]])[0] == 0
+
+    _publish(root, "v2", activate_below=50)
+    assert registry.get()[0] == "v1"   # not due for a check yet
+    registry.check(wait=True)
+    version, model = registry.get()
+    assert version == "v2" and model.predict([[20, 50, 30]])[0] == 1
+    assert registry.versions() == ("v2", "v1")
+
+    assert registry.rollback() == "v1"
+    assert registry.versions() == ("v1", "v2")
+    # the manifest naming the loaded previous version swaps without a load
+    _publish(root, "v2", activate_below=50)
+    registry.check()
+    assert registry.versions() == ("v2", "v1")
+
+
+def test_broken_version_keeps_serving_current(tmp_path):
+    root = str(tmp_path)
+    _publish(root, "v1", activate_below=20)
+    registry = ModelRegistry(root, check_interval=0)
+    registry.get()
+
+    with open(os.path.join(root, "manifest.json"), "w") as f:
+        json.dump({"version": "v3", "path": "missing"}, f)
+    registry.check(wait=True)
+    assert registry.get()[0] == "v1"
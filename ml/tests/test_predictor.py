@@ -0,0 +1,50 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from src import predictor
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+
+def _model():
+    # activate when the soil is dry
+    X = np.array([[20, 50, s] for s in range(0, 100, 5)], dtype=float)
+    y = (X[:, 2] < 40).astype(int)
+    return LogisticRegression().fit(X, y)
+
+
+def test_predict_batch_makes_one_model_call(monkeypatch):
+    model = CountingModel(_model())
+    monkeypatch.setattr(predictor, "load_versioned_model", lambda: ("v1", model))
+
+    records = [
+        {"device_id": "dry", "temperature": 20, "humidity": 50, "soil_moisture": 5},
+        {"device_id": "gone", "temperature": None, "humidity": 50, "soil_moisture": 5},
+        {"device_id": "wet", "temperature": 20, "humidity": 50, "soil_moisture": 90},
+    ]
+    out = predictor.predict_batch(records)
+
+    assert model.calls == 1
+    assert [(p["device_id"], p["activate_pump"]) for p in out] == [
+        ("dry", True), ("gone", None), ("wet", False),
+    ]
+    assert out[0]["probability"] > 0.5 > out[2]["probability"]
+    assert out[1]["probability"] is None
+    assert {p["model_version"] for p in out} == {"v1"}
+    # same decisions as the one-at-a-time path
+    monkeypatch.setattr(predictor, "load_versioned_model", lambda: ("v1", model.model))
+    assert predictor.should_activate_pump(records[0]) is True
+    assert predictor.should_activate_pump(records[2]) is False
+
+
+def test_predict_batch_empty():
+    assert predictor.predict_batch([]) == []
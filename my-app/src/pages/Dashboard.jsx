@@ -28,11 +28,11 @@ export default function Dashboard() {
     const fetchLive = async () => {
       try {
         const [sensorRes, settingsRes] = await Promise.all([
-          api.get('/sensors/', { headers: { Authorization: `Bearer ${token}` } }),
+          api.get('/sensors/latest', { headers: { Authorization: `Bearer ${token}` } }),
           api.get('/settings/', { headers: { Authorization: `Bearer ${token}` } }),
         ]);
 
-        const latest = sensorRes.data[0];
+        const latest = sensorRes.data;
         const userSettings = settingsRes.data;
 
         setSensors(latest);
@@ -47,6 +47,22 @@ export default function Dashboard() {
     fetchLive();
   }, [token]);
 
+  // Push updates instead of polling: the API streams each stored reading.
+  useEffect(() => {
+    if (!token) return;
+
+    const url = `${api.defaults.baseURL}/sensors/stream?access_token=${encodeURIComponent(token)}`;
+    const source = new EventSource(url);
+    source.addEventListener('reading', (e) => {
+      const reading = JSON.parse(e.data);
+      setSensors(reading);
+      setStatusMap(evaluateStatus(reading, settings));
+    });
+    source.onerror = (err) => console.error('Live stream error:', err);
+
+    return () => source.close();
+  }, [token, settings]);
+
   const fetchHistory = async () => {
     if (!fromTime || !toTime || !token) return;
 